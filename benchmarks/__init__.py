@@ -0,0 +1,3 @@
+"""
+Benchmark suite for the Stock Selector project.
+"""
\ No newline at end of file
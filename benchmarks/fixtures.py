@@ -0,0 +1,604 @@
+"""
+Synthetic benchmark fixtures for the Stock Selector project.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+from src.data_acquisition.price_store import PriceStore
+from src.llm_processing.fundamentals import CANONICAL_METRICS
+from src.llm_processing.tag_normalization import TAG_TAXONOMY
+
+# Form types of a master.idx file and their approximate share of its lines
+FORM_MIX = {
+    "4": 0.40,
+    "8-K": 0.12,
+    "10-Q": 0.05,
+    "SC 13G/A": 0.08,
+    "424B2": 0.10,
+    "D": 0.05,
+    "3": 0.05,
+    "13F-HR": 0.03,
+    "10-K": 0.02,
+    "10-K/A": 0.002,
+    "6-K": 0.05,
+    "S-8": 0.05
+}
+
+MASTER_HEADER = (
+    "Description:           Master Index of EDGAR Dissemination Feed\n"
+    "Last Data Received:    {last_date}\n"
+    "Comments:              webmaster@sec.gov\n"
+    "Anonymous FTP:         ftp://ftp.sec.gov/edgar/\n"
+    "Cloud HTTP:            https://www.sec.gov/Archives/\n"
+    " \n \n \n \n"
+    "CIK|Company Name|Form Type|Date Filed|Filename\n"
+    "--------------------------------------------------------------------------------\n"
+)
+
+QUARTER_START_MONTHS = {"QTR1": 1, "QTR2": 4, "QTR3": 7, "QTR4": 10}
+
+EXCHANGES = ["NYSE", "Nasdaq", "OTC", "CBOE"]
+
+# Marker written once a fixture directory is complete
+COMPLETE_MARKER = ".complete"
+
+
+def _is_complete(directory: str) -> bool:
+    """
+    Check whether a fixture directory was fully generated by an earlier run.
+    
+    Args:
+        directory (str): Fixture directory
+    
+    Returns:
+        bool: True if the completion marker exists
+    """
+    return os.path.exists(os.path.join(directory, COMPLETE_MARKER))
+
+
+def _mark_complete(directory: str) -> None:
+    """
+    Mark a fixture directory as fully generated.
+    
+    Args:
+        directory (str): Fixture directory
+    """
+    with open(os.path.join(directory, COMPLETE_MARKER), "w") as f:
+        f.write("")
+
+
+def accession_path(cik: int, sequence: int, year: int) -> str:
+    """
+    Build the EDGAR archive path of a synthetic filing.
+    
+    Args:
+        cik (int): Company CIK
+        sequence (int): Filing number, unique per year
+        year (int): Filing year
+    
+    Returns:
+        str: Path relative to the archive root, as listed in master.idx
+    """
+    return f"edgar/data/{cik}/{1000000000 + cik:010d}-{year % 100:02d}-{sequence:06d}.txt"
+
+
+def write_master_indexes(
+    root: str,
+    quarters: List[Tuple[int, str]],
+    lines_per_file: int,
+    companies: int,
+    seed: int = 0
+) -> List[str]:
+    """
+    Write master.idx files under root/<year>/<quarter>/.
+    
+    Args:
+        root (str): Index directory, laid out like storage.filings_dir
+        quarters (List[Tuple[int, str]]): (year, "QTRn") pairs to write
+        lines_per_file (int): Filing lines per index file
+        companies (int): Number of distinct filers
+        seed (int): Random seed
+    
+    Returns:
+        List[str]: Paths of the written files
+    """
+    forms = list(FORM_MIX)
+    weights = np.array(list(FORM_MIX.values()))
+    weights = weights / weights.sum()
+    paths = [os.path.join(root, str(year), quarter, "master.idx") for year, quarter in quarters]
+    if _is_complete(root):
+        return paths
+    rng = np.random.default_rng(seed)
+    
+    for (year, quarter), path in zip(quarters, paths):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        ciks = rng.integers(1000, 1000 + companies, lines_per_file)
+        form_ids = rng.choice(len(forms), lines_per_file, p=weights)
+        start = pd.Timestamp(year=year, month=QUARTER_START_MONTHS[quarter], day=1)
+        days = rng.integers(0, 90, lines_per_file)
+        dates = (start + pd.to_timedelta(days, "D")).strftime("%Y-%m-%d")
+        
+        lines = [
+            f"{cik}|COMPANY {cik} INC|{forms[form]}|{date}|{accession_path(cik, i, year)}\n"
+            for i, (cik, form, date) in enumerate(zip(ciks, form_ids, dates))
+        ]
+        with open(path, "w", encoding="latin-1") as f:
+            f.write(MASTER_HEADER.format(last_date=dates.max()))
+            f.writelines(lines)
+    
+    _mark_complete(root)
+    return paths
+
+
+def _filing_facts(fiscal_year: int, facts: int, seed: int) -> List[Tuple[str, str, int]]:
+    """
+    Draw the us-gaap facts of a synthetic filing.
+    
+    Canonical metrics are rounded to thousands so that they can be displayed
+    in thousands by an inline XBRL rendition; one in a hundred filler facts
+    is zero.
+    
+    Args:
+        fiscal_year (int): Fiscal year of the report
+        facts (int): Number of facts
+        seed (int): Random seed
+    
+    Returns:
+        List[Tuple[str, str, int]]: Concept local name, context id and value
+    """
+    rng = np.random.default_rng(seed)
+    years = [fiscal_year - 2, fiscal_year - 1, fiscal_year]
+    values = []
+    for year in years:
+        for metric in CANONICAL_METRICS:
+            values.append((metric, f"FY{year}", int(round(rng.normal(5e8, 2e8), -3))))
+    for i in range(max(facts - len(values), 0)):
+        value = int(round(rng.normal(1e6, 5e5))) if i % 100 else 0
+        values.append((f"SupplementalDisclosureItem{i}", f"I{years[i % len(years)]}", value))
+    return values
+
+
+def _inline_fact(name: str, context: str, value: int, scale: int, number_format: str) -> str:
+    """
+    Render a numeric fact as displayed in an inline XBRL document.
+    
+    Args:
+        name (str): Concept local name
+        context (str): Context id
+        value (int): Value of the fact
+        scale (int): Power of ten the displayed value is in
+        number_format (str): Transformation format of the displayed value
+    
+    Returns:
+        str: Table cell with the ix:nonFraction element
+    """
+    shown = f"{abs(value) // 10 ** scale:,}"
+    if number_format == "ixt:num-comma-decimal":
+        shown = shown.replace(",", ".")
+    elif number_format == "ixt:fixed-zero":
+        shown = "&#8212;"
+    sign = ' sign="-"' if value < 0 else ""
+    cell = (
+        f'<ix:nonFraction name="us-gaap:{name}" contextRef="{context}" unitRef="usd" decimals="-{scale}" '
+        f'scale="{scale}" format="{number_format}"{sign}>{shown}</ix:nonFraction>'
+    )
+    return f"<td>$</td><td>({cell})</td>" if value < 0 else f"<td>$</td><td>{cell}</td>"
+
+
+def _inline_document(cik: int, fiscal_year: int, values: List[Tuple[str, str, int]], narrative: str) -> str:
+    """
+    Render a 10-K HTML document with its facts tagged as inline XBRL.
+    
+    The facts are spread over tables between narrative sections. Besides
+    the facts of the instance, the document has segment facts in a
+    dimensional context and a text block split over a continuation.
+    
+    Args:
+        cik (int): Company CIK
+        fiscal_year (int): Fiscal year of the report
+        values (List[Tuple[str, str, int]]): Facts from _filing_facts
+        narrative (str): HTML narrative to interleave with the tables
+    
+    Returns:
+        str: HTML document
+    """
+    years = [fiscal_year - 2, fiscal_year - 1, fiscal_year]
+    entity = (
+        f'<xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">{cik:010d}</xbrli:identifier>'
+    )
+    contexts = []
+    for year in years:
+        contexts.append(
+            f'<xbrli:context id="FY{year}">{entity}</xbrli:entity><xbrli:period>'
+            f'<xbrli:startDate>{year}-01-01</xbrli:startDate><xbrli:endDate>{year}-12-31</xbrli:endDate>'
+            '</xbrli:period></xbrli:context>'
+        )
+        contexts.append(
+            f'<xbrli:context id="I{year}">{entity}</xbrli:entity><xbrli:period>'
+            f'<xbrli:instant>{year}-12-31</xbrli:instant></xbrli:period></xbrli:context>'
+        )
+    contexts.append(
+        f'<xbrli:context id="FY{fiscal_year}_Retail">{entity}<xbrli:segment>'
+        '<xbrldi:explicitMember dimension="us-gaap:StatementBusinessSegmentsAxis">'
+        'company:RetailMember</xbrldi:explicitMember></xbrli:segment></xbrli:entity><xbrli:period>'
+        f'<xbrli:startDate>{fiscal_year}-01-01</xbrli:startDate><xbrli:endDate>{fiscal_year}-12-31</xbrli:endDate>'
+        '</xbrli:period></xbrli:context>'
+    )
+    header = (
+        '<div style="display:none"><ix:header><ix:resources>'
+        + "".join(contexts)
+        + '<xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>'
+        '</ix:resources></ix:header></div>\n'
+    )
+    
+    rows = []
+    for i, (name, context, value) in enumerate(values):
+        if name in CANONICAL_METRICS:
+            rows.append(_inline_fact(name, context, value, 3, "ixt:num-dot-decimal"))
+        elif value == 0:
+            rows.append(_inline_fact(name, context, value, 0, "ixt:fixed-zero"))
+        else:
+            rows.append(_inline_fact(
+                name, context, value, 0, "ixt:num-comma-decimal" if i % 7 == 0 else "ixt:num-dot-decimal"))
+    for metric in CANONICAL_METRICS:
+        rows.append(_inline_fact(metric, f"FY{fiscal_year}_Retail", 1000, 3, "ixt:num-dot-decimal"))
+    
+    sections = narrative.split("\n")
+    tables = []
+    for start in range(0, len(rows), 50):
+        tables.append("<table>" + "".join(f"<tr>{row}</tr>" for row in rows[start:start + 50]) + "</table>\n")
+    step = max(len(sections) // max(len(tables), 1), 1)
+    body = []
+    for i, table in enumerate(tables):
+        body.append("\n".join(sections[i * step:(i + 1) * step]))
+        body.append(table)
+    body.append("\n".join(sections[len(tables) * step:]))
+    
+    text_block = (
+        f'<ix:nonNumeric name="us-gaap:SegmentReportingDisclosureTextBlock" contextRef="FY{fiscal_year}" '
+        'escape="true" continuedAt="segment-note-1"><p>The Company has one reportable segment.</p>'
+        '</ix:nonNumeric>'
+    )
+    continuation = (
+        '<ix:continuation id="segment-note-1"><p>Segment results are reviewed by the chief operating '
+        'decision maker.<ix:exclude> Page 42</ix:exclude></p></ix:continuation>'
+    )
+    return (
+        '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL">'
+        f"<body>\n{header}{text_block}\n" + "".join(body) + f"\n{continuation}\n</body></html>"
+    )
+
+
+def filing_document(
+    cik: int,
+    fiscal_year: int,
+    facts: int,
+    narrative_kb: int = 200,
+    seed: int = 0,
+    inline: bool = False,
+    sequence: int = 1
+) -> str:
+    """
+    Render a full-submission 10-K text file with its XBRL facts.
+    
+    The facts cover duration and instant contexts for three fiscal years,
+    with the canonical metrics for each and filler us-gaap facts up to the
+    requested count. They are in an XBRL instance document, or tagged inline
+    in the 10-K HTML document when inline is set; both renditions of the
+    same seed hold the same facts.
+    
+    Args:
+        cik (int): Company CIK
+        fiscal_year (int): Fiscal year of the report
+        facts (int): Number of us-gaap facts in the instance
+        narrative_kb (int): Approximate size of the HTML narrative in kilobytes
+        seed (int): Random seed
+        inline (bool): Tag the facts inline instead of adding an instance document
+        sequence (int): Filing number in the accession number, as in accession_path
+    
+    Returns:
+        str: Filing text
+    """
+    years = [fiscal_year - 2, fiscal_year - 1, fiscal_year]
+    values = _filing_facts(fiscal_year, facts, seed)
+    
+    paragraph = "<p>The Company operates in a competitive environment and is subject to risks. </p>\n"
+    narrative = paragraph * max(narrative_kb * 1024 // len(paragraph), 1)
+    
+    header = (
+        "<SEC-DOCUMENT>\n"
+        "<SEC-HEADER>\n"
+        f"ACCESSION NUMBER:\t\t{1000000000 + cik:010d}-{(fiscal_year + 1) % 100:02d}-{sequence:06d}\n"
+        "CONFORMED SUBMISSION TYPE:\t10-K\n"
+        f"CONFORMED PERIOD OF REPORT:\t{fiscal_year}1231\n"
+        f"FILED AS OF DATE:\t\t{fiscal_year + 1}0215\n"
+        "FILER:\n"
+        "\tCOMPANY DATA:\n"
+        f"\t\tCOMPANY CONFORMED NAME:\t\t\tCOMPANY {cik} INC\n"
+        f"\t\tCENTRAL INDEX KEY:\t\t\t{cik:010d}\n"
+        f"\t\tSTANDARD INDUSTRIAL CLASSIFICATION:\tSERVICES [{7370 + cik % 10}]\n"
+        "\t\tFISCAL YEAR END:\t\t\t1231\n"
+        "</SEC-HEADER>\n"
+        "<DOCUMENT>\n<TYPE>10-K\n<SEQUENCE>1\n<FILENAME>form10k.htm\n<TEXT>\n"
+    )
+    if inline:
+        return (
+            header + _inline_document(cik, fiscal_year, values, narrative) + "\n"
+            "</TEXT>\n</DOCUMENT>\n"
+            "</SEC-DOCUMENT>\n"
+        )
+    
+    contexts = []
+    for year in years:
+        contexts.append(
+            f'<context id="FY{year}"><entity><identifier scheme="http://www.sec.gov/CIK">{cik:010d}</identifier>'
+            f'</entity><period><startDate>{year}-01-01</startDate><endDate>{year}-12-31</endDate></period></context>'
+        )
+        contexts.append(
+            f'<context id="I{year}"><entity><identifier scheme="http://www.sec.gov/CIK">{cik:010d}</identifier>'
+            f'</entity><period><instant>{year}-12-31</instant></period></context>'
+        )
+    
+    fact_lines = []
+    for name, context, value in values:
+        decimals = -6 if name in CANONICAL_METRICS else -3
+        fact_lines.append(
+            f'<us-gaap:{name} contextRef="{context}" unitRef="usd" decimals="{decimals}">{value}</us-gaap:{name}>'
+        )
+    
+    return (
+        header + f"<html><body>\n{narrative}</body></html>\n"
+        "</TEXT>\n</DOCUMENT>\n"
+        f"<DOCUMENT>\n<TYPE>EX-101.INS\n<SEQUENCE>2\n<FILENAME>company-{fiscal_year}1231.xml\n<TEXT>\n<XBRL>\n"
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<xbrl xmlns="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2023">\n'
+        + "\n".join(contexts) + "\n"
+        + "\n".join(fact_lines) + "\n"
+        "</xbrl>\n</XBRL>\n</TEXT>\n</DOCUMENT>\n"
+        "</SEC-DOCUMENT>\n"
+    )
+
+
+def write_filings(
+    archive_root: str,
+    count: int,
+    facts: int,
+    narrative_kb: int = 50,
+    fiscal_year: int = 2023,
+    seed: int = 0,
+    inline: bool = False
+) -> pd.DataFrame:
+    """
+    Write 10-K filings into an EDGAR-style archive tree.
+    
+    Args:
+        archive_root (str): Archive root served as the EDGAR base URL
+        count (int): Number of filings
+        facts (int): us-gaap facts per filing
+        narrative_kb (int): Narrative size per filing in kilobytes
+        fiscal_year (int): Fiscal year of every filing
+        seed (int): Random seed
+        inline (bool): Tag the facts inline in the 10-K document
+    
+    Returns:
+        pd.DataFrame: Filings list rows (CIK, Company, Form, Date, path relative to archive_root)
+    """
+    complete = _is_complete(archive_root)
+    rows = []
+    for i in range(count):
+        cik = 1000 + i
+        path = accession_path(cik, i, fiscal_year + 1)
+        rows.append({
+            "CIK": cik,
+            "Company": f"COMPANY {cik} INC",
+            "Form": "10-K",
+            "Date": f"{fiscal_year + 1}-02-15",
+            "Path": path
+        })
+        if not complete:
+            full_path = os.path.join(archive_root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(filing_document(cik, fiscal_year, facts, narrative_kb, seed + i, inline, i))
+    
+    if not complete:
+        _mark_complete(archive_root)
+    return pd.DataFrame(rows)
+
+
+def write_ticker_sources(
+    directory: str,
+    companies: int,
+    json_share: float = 0.85,
+    txt_share: float = 0.10,
+    seed: int = 0
+) -> Dict[str, str]:
+    """
+    Write CIK folders and the ticker source files read by generate_cik_ticker_mapping.
+    
+    Most CIKs are listed in company_tickers_exchange.json, some only in
+    ticker.txt and the rest in neither. The JSON also lists companies with
+    no filings, like the SEC file does.
+    
+    Args:
+        directory (str): Fixture directory
+        companies (int): Number of CIK folders
+        json_share (float): Share of CIKs found in the JSON file
+        txt_share (float): Share of CIKs found only in the TXT file
+        seed (int): Random seed
+    
+    Returns:
+        Dict[str, str]: Paths keyed by "filings_dir", "json_file" and "txt_file"
+    """
+    paths = {
+        "filings_dir": os.path.join(directory, "filings"),
+        "json_file": os.path.join(directory, "company_tickers_exchange.json"),
+        "txt_file": os.path.join(directory, "ticker.txt")
+    }
+    if _is_complete(directory):
+        return paths
+    
+    rng = np.random.default_rng(seed)
+    ciks = np.arange(1000, 1000 + companies)
+    for cik in ciks:
+        os.makedirs(os.path.join(paths["filings_dir"], str(cik)), exist_ok=True)
+    
+    source = rng.random(companies)
+    in_json = ciks[source < json_share]
+    in_txt = ciks[(source >= json_share) & (source < json_share + txt_share)]
+    unlisted = np.arange(1000 + companies, 1000 + 2 * companies)
+    
+    data = [
+        [int(cik), f"Company {cik} Inc", f"T{cik}", EXCHANGES[cik % len(EXCHANGES)]]
+        for cik in np.concatenate([in_json, unlisted])
+    ]
+    with open(paths["json_file"], "w") as f:
+        json.dump({"fields": ["cik", "name", "ticker", "exchange"], "data": data}, f)
+    with open(paths["txt_file"], "w") as f:
+        f.writelines(f"t{cik}\t{cik}\n" for cik in np.concatenate([in_txt, in_json]))
+    
+    _mark_complete(directory)
+    return paths
+
+
+def write_price_store(
+    directory: str,
+    tickers: int,
+    days: int,
+    benchmark: str = "^GSPC",
+    seed: int = 0
+) -> List[str]:
+    """
+    Fill a price store with random-walk histories in the yfinance layout.
+    
+    A tenth of the tickers start trading partway through the period.
+    
+    Args:
+        directory (str): Price store directory
+        tickers (int): Number of tickers, not counting the benchmark
+        days (int): Business days of history
+        benchmark (str): Benchmark ticker, added as the mean of the others
+        seed (int): Random seed
+    
+    Returns:
+        List[str]: Stored tickers
+    """
+    symbols = [f"T{1000 + i}" for i in range(tickers)]
+    if _is_complete(directory):
+        return symbols + [benchmark]
+    
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-06-30", periods=days)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (days, tickers)), axis=0))
+    starts = np.where(rng.random(tickers) < 0.1, rng.integers(0, days // 2, tickers), 0)
+    
+    store = PriceStore(directory)
+    for i, ticker in enumerate(symbols + [benchmark]):
+        close = closes[:, i] if i < tickers else closes.mean(axis=1)
+        start = starts[i] if i < tickers else 0
+        close = close[start:]
+        hist = pd.DataFrame({
+            "Date": dates[start:].strftime("%Y-%m-%d"),
+            "Open": close * 0.995,
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": rng.integers(10000, 1000000, len(close)),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0
+        })
+        store.write(ticker, hist)
+    store.save_index()
+    
+    _mark_complete(directory)
+    return symbols + [benchmark]
+
+
+def fundamentals_table(
+    companies: int,
+    years: range = range(2005, 2025),
+    seed: int = 0
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Build a fundamentals table and matching security list.
+    
+    Args:
+        companies (int): Number of companies
+        years (range): Fiscal years with a 10-K per company
+        seed (int): Random seed
+    
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Fundamentals in the extract_fundamentals layout,
+            and securities with cik, name, ticker, exchange and ipo_date
+    """
+    rng = np.random.default_rng(seed)
+    ciks = np.arange(1000, 1000 + companies)
+    frames = []
+    for year in years:
+        revenue = rng.uniform(1e8, 1e10, companies)
+        net_income = revenue * rng.normal(0.08, 0.06, companies)
+        frames.append(pd.DataFrame({
+            "cik": ciks,
+            "fiscal_year": year,
+            "filing_date": pd.Timestamp(f"{year + 1}-02-15") + pd.to_timedelta(
+                rng.integers(0, 60, companies), "D"),
+            "form": "10-K",
+            "NetIncomeLoss": net_income,
+            "EarningsPerShareBasic": net_income / 1e8 * 1.1 ** (year - years[0]),
+            "DebtCurrent": revenue * 0.05,
+            "LongTermDebt": revenue * rng.uniform(0, 1, companies),
+            "CashAndCashEquivalentsAtCarryingValue": revenue * 0.1,
+            "OperatingIncomeLoss": net_income * 1.3,
+            "StockholdersEquity": revenue * rng.uniform(0.2, 1.5, companies),
+            "Revenues": revenue,
+            "IncomeTaxExpenseBenefit": net_income * 0.25,
+            "IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest":
+                net_income * 1.25,
+            "DepreciationDepletionAndAmortization": revenue * 0.03,
+            "EarningsBeforeInterestTaxesDepreciationAmortizationEBITDA": np.nan
+        }))
+    fundamentals = pd.concat(frames, ignore_index=True)
+    
+    securities = pd.DataFrame({
+        "cik": ciks,
+        "name": [f"Company {cik} Inc" for cik in ciks],
+        "ticker": [f"T{cik}" for cik in ciks],
+        "exchange": [EXCHANGES[cik % len(EXCHANGES)] for cik in ciks],
+        "ipo_date": (pd.Timestamp("1990-01-01") + pd.to_timedelta(
+            rng.integers(0, 9000, companies), "D")).strftime("%Y-%m-%d")
+    })
+    return fundamentals, securities
+
+def fact_table(facts: int, facts_per_filing: int = 500, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a long table of XBRL facts as extracted from many filings.
+    
+    Each filing reports its metrics under the canonical tag or one of the
+    alternatives of the tag taxonomy, among filler facts.
+    
+    Args:
+        facts (int): Number of facts
+        facts_per_filing (int): Facts per filing
+        seed (int): Random seed
+    
+    Returns:
+        pd.DataFrame: One row per fact with cik, fiscal_year, tag and value
+    """
+    rng = np.random.default_rng(seed)
+    filings = max(facts // facts_per_filing, 1)
+    tags = [
+        f"us-gaap:{tag.lower()}"
+        for metric, alternatives in TAG_TAXONOMY.items()
+        for tag in [metric] + alternatives
+    ]
+    tags += [f"us-gaap:supplementaldisclosureitem{i}" for i in range(facts_per_filing)]
+    filing = rng.integers(0, filings, facts)
+    return pd.DataFrame({
+        "cik": 1000 + filing // 20,
+        "fiscal_year": 2005 + filing % 20,
+        "tag": np.array(tags, dtype=object)[rng.integers(0, len(tags), facts)],
+        "value": rng.normal(1e6, 5e5, facts)
+    })
\ No newline at end of file
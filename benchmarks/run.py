@@ -0,0 +1,234 @@
+"""
+Benchmark runner for the Stock Selector project.
+
+Run from the project root so that config/config.yaml is found:
+
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --bench Xbrl --compare benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stderr
+from typing import Dict, List, Optional
+from benchmarks.suite import BENCHMARKS, SIZES
+
+
+def _git_commit() -> Optional[str]:
+    """
+    Get the commit the benchmarks run against.
+    
+    Returns:
+        Optional[str]: Commit hash, or None outside a git checkout
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _time_call(func, repeat: int) -> List[float]:
+    """
+    Time a benchmark method after one untimed warm-up call.
+    
+    Progress bars are sent to the null device so that terminal output does
+    not add noise to the samples.
+    
+    Args:
+        func: Benchmark method
+        repeat (int): Number of timed calls
+    
+    Returns:
+        List[float]: Duration of each call in seconds
+    """
+    samples = []
+    with open(os.devnull, "w") as devnull, redirect_stderr(devnull):
+        func()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _peak_memory(func) -> List[float]:
+    """
+    Measure the peak memory traced by tracemalloc during a benchmark method.
+    
+    Memory held by C libraries that bypass the Python allocator, and pages
+    of memory-mapped files, are not counted.
+    
+    Args:
+        func: Benchmark method
+    
+    Returns:
+        List[float]: Peak traced bytes of one call after an untimed warm-up call
+    """
+    with open(os.devnull, "w") as devnull, redirect_stderr(devnull):
+        func()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return [float(peak)]
+
+
+def run_benchmarks(
+    sizes: Dict,
+    fixtures_dir: str,
+    work_dir: str,
+    repeat: int = 5,
+    pattern: Optional[str] = None
+) -> List[Dict]:
+    """
+    Run every benchmark whose name matches a pattern.
+    
+    Args:
+        sizes (Dict): Fixture sizes, one of SIZES
+        fixtures_dir (str): Directory where generated fixtures are kept between runs
+        work_dir (str): Scratch directory for outputs
+        repeat (int): Timed calls per benchmark
+        pattern (Optional[str]): Regular expression matched against "Class.method" (all if None)
+    
+    Returns:
+        List[Dict]: One entry per benchmark and parameter with samples and summary statistics
+    """
+    results = []
+    for benchmark_class in BENCHMARKS:
+        methods = [
+            name for name in dir(benchmark_class)
+            if name.startswith(("time_", "peakmem_")) and (
+                pattern is None or re.search(pattern, f"{benchmark_class.__name__}.{name}"))
+        ]
+        if not methods:
+            continue
+        
+        group = benchmark_class(fixtures_dir, work_dir, sizes)
+        for param in group.params():
+            print(f"Setting up {benchmark_class.__name__}" + (f" [{param}]" if param is not None else ""))
+            group.setup(param)
+            try:
+                for method in methods:
+                    name = f"{benchmark_class.__name__}.{method}"
+                    timed = method.startswith("time_")
+                    if timed:
+                        samples = _time_call(getattr(group, method), repeat)
+                    else:
+                        samples = _peak_memory(getattr(group, method))
+                    result = {
+                        "benchmark": name,
+                        "param": param,
+                        "unit": "seconds" if timed else "bytes",
+                        "samples": samples,
+                        "min": min(samples),
+                        "median": statistics.median(samples),
+                        "mean": statistics.mean(samples),
+                        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0
+                    }
+                    label = f"{name}[{param}]" if param is not None else name
+                    if not timed:
+                        print(f"  {label:<55} peak {result['median'] / 1024 ** 2:.1f} MB")
+                    elif group.work_bytes:
+                        result["throughput_mb_s"] = group.work_bytes / 1024 ** 2 / result["median"]
+                        print(f"  {label:<55} median {result['median']:.4f}s  "
+                              f"min {result['min']:.4f}s  {result['throughput_mb_s']:.1f} MB/s")
+                    else:
+                        print(f"  {label:<55} median {result['median']:.4f}s  min {result['min']:.4f}s")
+                    results.append(result)
+            finally:
+                group.teardown()
+    return results
+
+
+def compare_results(results: List[Dict], baseline_file: str) -> None:
+    """
+    Print the change in median time against an earlier results file.
+    
+    Args:
+        results (List[Dict]): Results of this run
+        baseline_file (str): JSON file written by an earlier run
+    """
+    with open(baseline_file, "r") as f:
+        baseline = {(entry["benchmark"], entry["param"]): entry for entry in json.load(f)["results"]}
+    
+    print(f"\nChange against {baseline_file}:")
+    for entry in results:
+        previous = baseline.get((entry["benchmark"], entry["param"]))
+        if previous is None:
+            continue
+        label = f"{entry['benchmark']}[{entry['param']}]" if entry["param"] is not None else entry["benchmark"]
+        ratio = entry["median"] / previous["median"] if previous["median"] else float("nan")
+        if entry.get("unit") == "bytes":
+            print(f"  {label:<55} {previous['median'] / 1024 ** 2:.1f} MB -> "
+                  f"{entry['median'] / 1024 ** 2:.1f} MB  x{ratio:.2f}")
+        else:
+            print(f"  {label:<55} {previous['median']:.4f}s -> {entry['median']:.4f}s  x{ratio:.2f}")
+
+
+def main():
+    """Run the benchmark suite and record the results as JSON."""
+    parser = argparse.ArgumentParser(description="Stock Selector benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Use small fixtures for a fast smoke run")
+    parser.add_argument("--bench", default=None, help="Only run benchmarks matching this regular expression")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per benchmark")
+    parser.add_argument("--fixtures-dir", default="benchmarks/.fixtures", help="Where generated fixtures are kept")
+    parser.add_argument("--output", default=None, help="Results JSON file (benchmarks/results/<time>.json by default)")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON file to compare against")
+    args = parser.parse_args()
+    
+    mode = "quick" if args.quick else "full"
+    output_file = os.path.abspath(
+        args.output or os.path.join("benchmarks", "results", f"{time.strftime('%Y%m%d-%H%M%S')}-{mode}.json"))
+    fixtures_dir = os.path.abspath(os.path.join(args.fixtures_dir, mode))
+    os.makedirs(fixtures_dir, exist_ok=True)
+    commit = _git_commit()
+    
+    # Keep checkpoints, caches and outputs of the benchmarked code out of the project data
+    logging.disable(logging.INFO)
+    project_dir = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="stock_selector_bench_")
+    os.chdir(work_dir)
+    try:
+        results = run_benchmarks(SIZES[mode], fixtures_dir, work_dir, args.repeat, args.bench)
+    finally:
+        os.chdir(project_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "mode": mode,
+        "sizes": SIZES[mode],
+        "repeat": args.repeat,
+        "machine": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count()
+        },
+        "results": results
+    }
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output_file}")
+    
+    if args.compare:
+        compare_results(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Local stub HTTP server for the Stock Selector benchmarks.
+"""
+import os
+import threading
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """
+    Serves files without logging every request to stderr.
+    
+    Files carry an ETag derived from their size and modification time, and
+    requests with a matching If-None-Match get a 304 response, as do those
+    with an If-Modified-Since no older than the file.
+    """
+    
+    _etag = None
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def send_head(self):
+        path = self.translate_path(self.path)
+        self._etag = None
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            self._etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if self._etag in self.headers.get("If-None-Match", ""):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.end_headers()
+                return None
+        return super().send_head()
+    
+    def end_headers(self):
+        if self._etag is not None:
+            self.send_header("ETag", self._etag)
+        super().end_headers()
+
+
+class StubServer:
+    """
+    Serves a directory over HTTP on localhost, standing in for SEC EDGAR.
+    
+    Use it as a context manager; the server runs in a daemon thread on a free
+    port and url is the base URL to give the downloader.
+    """
+    
+    def __init__(self, root: str):
+        """
+        Initialize the server.
+        
+        Args:
+            root (str): Directory served as the archive root
+        """
+        self.root = root
+        self._server = None
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        """
+        Get the base URL of the served directory.
+        
+        Returns:
+            str: URL ending with a slash
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+    
+    def start(self) -> "StubServer":
+        """
+        Start serving on a free port.
+        
+        Returns:
+            StubServer: This server
+        """
+        handler = partial(_QuietHandler, directory=self.root)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop the server and wait for its thread."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+    
+    def __enter__(self) -> "StubServer":
+        return self.start()
+    
+    def __exit__(self, *exc) -> None:
+        self.stop()
\ No newline at end of file
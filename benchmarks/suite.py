@@ -0,0 +1,394 @@
+"""
+Benchmark cases for the Stock Selector project.
+"""
+import os
+import subprocess
+import sys
+import threading
+import urllib.request
+import pandas as pd
+from typing import Dict, List, Optional
+from benchmarks.fixtures import (
+    fact_table,
+    fundamentals_table,
+    write_filings,
+    write_master_indexes,
+    write_price_store,
+    write_ticker_sources
+)
+from benchmarks.stub_server import StubServer
+from src.analysis.backtest import Backtester
+from src.analysis.performance import performance_from_index
+from src.analysis.screening import derive_metrics, screen_stocks
+from src.data_acquisition.compact_tables import compact_filings_list, load_filings_list, save_table
+from src.data_acquisition.price_store import RETURN_INDEX_DIR, PriceStore, ReturnIndex
+from src.data_acquisition.sec_downloader import SECFilingDownloader
+from src.data_acquisition.stock_utils import generate_cik_ticker_mapping
+from src.llm_processing.financial_extractor import FinancialDataExtractor
+from src.llm_processing.tag_normalization import TagNormalizer
+from src.service.query_service import QueryService, ServingData, create_server
+from src.utils.config import config
+
+# Fixture sizes per run mode
+SIZES = {
+    "full": {
+        "index_lines": 250000,
+        "index_companies": 20000,
+        "filings": 200,
+        "filing_facts": 500,
+        "xbrl_facts": [100, 1000, 10000],
+        "inline_filing_mb": [5, 50],
+        "normalization_facts": [1000000, 5000000],
+        "mapping_companies": 10000,
+        "price_tickers": 2000,
+        "price_days": 3780,
+        "fundamentals_companies": 2000,
+        "cli_commands": ["--help", "cleanup-data", "backtest --help", "run --help"]
+    },
+    "quick": {
+        "index_lines": 20000,
+        "index_companies": 5000,
+        "filings": 20,
+        "filing_facts": 200,
+        "xbrl_facts": [100, 1000],
+        "inline_filing_mb": [2],
+        "normalization_facts": [200000],
+        "mapping_companies": 1000,
+        "price_tickers": 200,
+        "price_days": 1260,
+        "fundamentals_companies": 200,
+        "cli_commands": ["--help", "cleanup-data"]
+    }
+}
+
+# Quarters covered by the synthetic master.idx files, as downloaded for 2024 to 2025
+INDEX_QUARTERS = [(2024, "QTR1"), (2024, "QTR2"), (2024, "QTR3"), (2024, "QTR4"), (2025, "QTR1")]
+
+BENCHMARK_TICKER = "^GSPC"
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+AS_OF = pd.Timestamp("2025-06-30")
+
+
+class Benchmark:
+    """
+    Base class of a group of benchmarks sharing one fixture.
+    
+    Methods named time_* are timed by the runner after setup, and methods
+    named peakmem_* are measured for peak traced memory. A class with
+    param_key set runs once per value of that entry of the sizes, and setup
+    receives the value. Setup may set work_bytes to the size of the input,
+    to have throughput reported.
+    """
+    
+    param_key: Optional[str] = None
+    work_bytes: Optional[int] = None
+    
+    def __init__(self, fixtures_dir: str, work_dir: str, sizes: Dict):
+        """
+        Initialize the benchmark group.
+        
+        Args:
+            fixtures_dir (str): Directory where generated fixtures are kept between runs
+            work_dir (str): Scratch directory for outputs
+            sizes (Dict): Fixture sizes, one of SIZES
+        """
+        self.fixtures_dir = fixtures_dir
+        self.work_dir = work_dir
+        self.sizes = sizes
+        self._outputs = 0
+    
+    def params(self) -> List:
+        """
+        Get the parameter values to run the group with.
+        
+        Returns:
+            List: Values passed to setup, or [None] for an unparameterized group
+        """
+        return self.sizes[self.param_key] if self.param_key else [None]
+    
+    def setup(self, param=None) -> None:
+        """Generate or load the fixture."""
+    
+    def teardown(self) -> None:
+        """Release resources held by the fixture."""
+    
+    def fresh_path(self, name: str) -> str:
+        """
+        Get an output path not used by any earlier call, so runs never see each other's output.
+        
+        Args:
+            name (str): Base name of the file or directory
+        
+        Returns:
+            str: Path under the work directory
+        """
+        self._outputs += 1
+        return os.path.join(self.work_dir, type(self).__name__, f"{self._outputs}_{name}")
+
+
+class FilingsList(Benchmark):
+    """Parse five quarters of master.idx files into the filings list, and load it back."""
+    
+    def setup(self, param=None):
+        self.idx_dir = os.path.join(self.fixtures_dir, f"master_idx_{self.sizes['index_lines']}")
+        write_master_indexes(
+            self.idx_dir, INDEX_QUARTERS, self.sizes["index_lines"], self.sizes["index_companies"])
+        self.downloader = SECFilingDownloader()
+        self.list_file = self.fresh_path("filings_list")
+        self.downloader.generate_filings_list(self.idx_dir, self.list_file)
+    
+    def time_generate_filings_list(self):
+        self.downloader.generate_filings_list(self.idx_dir, self.fresh_path("filings_list"))
+    
+    def time_load_filings_list(self):
+        load_filings_list(self.list_file)
+    
+    def peakmem_load_filings_list(self):
+        load_filings_list(self.list_file)
+
+
+class EdgarDownload(Benchmark):
+    """Download index files and filings from a local stub of the EDGAR archive."""
+    
+    def setup(self, param=None):
+        archive = os.path.join(
+            self.fixtures_dir, f"archive_{self.sizes['index_lines']}_{self.sizes['filings']}")
+        write_master_indexes(
+            os.path.join(archive, "edgar", "full-index"),
+            INDEX_QUARTERS,
+            self.sizes["index_lines"],
+            self.sizes["index_companies"]
+        )
+        filings = write_filings(archive, self.sizes["filings"], self.sizes["filing_facts"])
+        
+        self.server = StubServer(archive).start()
+        self.filings_list = save_table(
+            compact_filings_list(filings.assign(URL=filings["Path"])), os.path.join(self.work_dir, "edgar_filings_list"))
+        
+        # Local index files to revalidate, every quarter treated as still open
+        self.refresh_downloader = self._downloader()
+        self.refresh_downloader.index_final_after_days = 36500
+        self.refresh_downloader.download_master_files(INDEX_QUARTERS[0][0], INDEX_QUARTERS[-1][0])
+    
+    def teardown(self):
+        self.server.stop()
+    
+    def _downloader(self) -> SECFilingDownloader:
+        downloader = SECFilingDownloader()
+        downloader.base_url = self.server.url
+        downloader.rate_limit_delay = 0
+        downloader.project_folder = self.fresh_path("edgar")
+        return downloader
+    
+    def time_download_master_files(self):
+        self._downloader().download_master_files(INDEX_QUARTERS[0][0], INDEX_QUARTERS[-1][0])
+    
+    def time_refresh_master_files(self):
+        self.refresh_downloader.download_master_files(INDEX_QUARTERS[0][0], INDEX_QUARTERS[-1][0])
+    
+    def time_download_filings(self):
+        self._downloader().download_filings(self.filings_list, self.fresh_path("filings"), resume=False)
+
+
+class XbrlExtraction(Benchmark):
+    """Extract metrics from one filing's XBRL instance, by number of facts."""
+    
+    param_key = "xbrl_facts"
+    
+    def setup(self, facts=None):
+        directory = os.path.join(self.fixtures_dir, f"xbrl_{facts}")
+        write_filings(directory, 1, facts, narrative_kb=500)
+        self.filing_path = os.path.join(directory, "edgar", "data", "1000")
+        self.filing_path = os.path.join(self.filing_path, os.listdir(self.filing_path)[0])
+        self.extractor = FinancialDataExtractor()
+        if not self.extractor.extract_from_xbrl("1000", "2023", self.filing_path):
+            raise RuntimeError(f"No XBRL facts extracted from {self.filing_path}")
+    
+    def time_extract_from_xbrl(self):
+        self.extractor.extract_from_xbrl("1000", "2023", self.filing_path)
+    
+    def peakmem_extract_from_xbrl(self):
+        self.extractor.extract_from_xbrl("1000", "2023", self.filing_path)
+
+
+class InlineXbrlExtraction(Benchmark):
+    """Extract metrics from a large 10-K document with inline XBRL facts, by file size in megabytes."""
+    
+    param_key = "inline_filing_mb"
+    
+    def setup(self, megabytes=None):
+        directory = os.path.join(self.fixtures_dir, f"inline_xbrl_{megabytes}mb")
+        write_filings(directory, 1, 2000, narrative_kb=megabytes * 1024, inline=True)
+        self.filing_path = os.path.join(directory, "edgar", "data", "1000")
+        self.filing_path = os.path.join(self.filing_path, os.listdir(self.filing_path)[0])
+        self.work_bytes = os.path.getsize(self.filing_path)
+        self.extractor = FinancialDataExtractor()
+        if not self.extractor.extract_from_xbrl("1000", "2023", self.filing_path):
+            raise RuntimeError(f"No inline XBRL facts extracted from {self.filing_path}")
+    
+    def time_extract_from_xbrl(self):
+        self.extractor.extract_from_xbrl("1000", "2023", self.filing_path)
+    
+    def peakmem_extract_from_xbrl(self):
+        self.extractor.extract_from_xbrl("1000", "2023", self.filing_path)
+
+
+class TagNormalization(Benchmark):
+    """Resolve a long table of XBRL facts to canonical metrics, by number of facts."""
+    
+    param_key = "normalization_facts"
+    
+    def setup(self, facts=None):
+        self.facts = fact_table(facts)
+        self.normalizer = TagNormalizer()
+    
+    def time_compile_taxonomy(self):
+        TagNormalizer()
+    
+    def time_normalize_table(self):
+        self.normalizer.normalize_table(self.facts, ["cik", "fiscal_year"])
+    
+    def peakmem_normalize_table(self):
+        self.normalizer.normalize_table(self.facts, ["cik", "fiscal_year"])
+
+
+class CikTickerMapping(Benchmark):
+    """Build the security list from CIK folders and the SEC ticker files."""
+    
+    def setup(self, param=None):
+        self.sources = write_ticker_sources(
+            os.path.join(self.fixtures_dir, f"tickers_{self.sizes['mapping_companies']}"),
+            self.sizes["mapping_companies"]
+        )
+    
+    def time_generate_cik_ticker_mapping(self):
+        output_dir = self.fresh_path("mapping")
+        os.makedirs(output_dir, exist_ok=True)
+        generate_cik_ticker_mapping(
+            self.sources["filings_dir"],
+            self.sources["json_file"],
+            self.sources["txt_file"],
+            output_file=os.path.join(output_dir, "consolidated_stock_list.csv"),
+            db_file=os.path.join(output_dir, "securities.db")
+        )
+
+
+class PriceLoading(Benchmark):
+    """Load stored price histories and build the cumulative return arrays."""
+    
+    def setup(self, param=None):
+        self.prices_dir = os.path.join(
+            self.fixtures_dir, f"prices_{self.sizes['price_tickers']}x{self.sizes['price_days']}")
+        write_price_store(
+            self.prices_dir, self.sizes["price_tickers"], self.sizes["price_days"], BENCHMARK_TICKER)
+        store = PriceStore(self.prices_dir)
+        self.matrix = store.price_matrix()
+        self.return_index = store.return_index(BENCHMARK_TICKER)
+    
+    def time_load_ticker(self):
+        PriceStore(self.prices_dir).load("T1000")
+    
+    def time_price_matrix(self):
+        PriceStore(self.prices_dir).price_matrix()
+    
+    def time_build_return_index(self):
+        ReturnIndex.from_prices(self.matrix, BENCHMARK_TICKER)
+    
+    def time_load_return_index(self):
+        ReturnIndex.load(os.path.join(self.prices_dir, RETURN_INDEX_DIR))
+    
+    def time_performance_from_index(self):
+        performance_from_index(self.return_index, config.get("performance.time_frames", [1, 3, 5, 10]))
+
+
+class Screening(Benchmark):
+    """Derive screening metrics, screen the latest filings and evaluate the backtest."""
+    
+    def setup(self, param=None):
+        companies = self.sizes["fundamentals_companies"]
+        self.fundamentals, self.securities = fundamentals_table(companies)
+        self.metrics = derive_metrics(self.fundamentals)
+        self.criteria = config.get("screening.stocks", {})
+        
+        prices_dir = os.path.join(
+            self.fixtures_dir, f"prices_{self.sizes['price_tickers']}x{self.sizes['price_days']}")
+        write_price_store(prices_dir, self.sizes["price_tickers"], self.sizes["price_days"], BENCHMARK_TICKER)
+        self.return_index = PriceStore(prices_dir).return_index(BENCHMARK_TICKER)
+        self.performance = performance_from_index(self.return_index, [5])
+        self.backtester = self._backtester()
+    
+    def _backtester(self) -> Backtester:
+        start = self.return_index.dates[0] + pd.DateOffset(years=1)
+        return Backtester(self.metrics, self.securities, self.return_index, start)
+    
+    def time_derive_metrics(self):
+        derive_metrics(self.fundamentals)
+    
+    def time_screen_stocks(self):
+        screen_stocks(self.fundamentals, self.securities, self.performance, self.criteria, AS_OF)
+    
+    def time_backtester_setup(self):
+        self._backtester()
+    
+    def time_backtest_evaluate(self):
+        self.backtester.evaluate(self.criteria)
+
+
+class QueryServing(Benchmark):
+    """Answer screening, ranking and return queries over HTTP from the query service."""
+    
+    def setup(self, param=None):
+        fundamentals, securities = fundamentals_table(self.sizes["fundamentals_companies"])
+        prices_dir = os.path.join(
+            self.fixtures_dir, f"prices_{self.sizes['price_tickers']}x{self.sizes['price_days']}")
+        write_price_store(prices_dir, self.sizes["price_tickers"], self.sizes["price_days"], BENCHMARK_TICKER)
+        return_index = PriceStore(prices_dir).return_index(BENCHMARK_TICKER)
+        
+        service = QueryService(lambda version: ServingData(fundamentals, securities, return_index), lambda: "")
+        self.server = create_server(service, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tickers = ",".join(return_index.tickers[:50])
+    
+    def teardown(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def _get(self, path: str) -> bytes:
+        with urllib.request.urlopen(self.url + path) as response:
+            return response.read()
+    
+    def time_screen_query(self):
+        self._get(f"/screen?as_of={AS_OF.date()}&min_roe=0.12")
+    
+    def time_rank_query(self):
+        self._get("/rank?metric=sharpe_ratio&horizon=5&top=50")
+    
+    def time_returns_query(self):
+        self._get(f"/returns?tickers={self.tickers}&start=2020-01-01")
+
+
+class CliStartup(Benchmark):
+    """Start the CLI in a new interpreter, as cron and orchestration wrappers do."""
+    
+    param_key = "cli_commands"
+    
+    def setup(self, command=None):
+        self.argv = [sys.executable, MAIN_SCRIPT] + command.split()
+    
+    def time_cli_startup(self):
+        subprocess.run(self.argv, cwd=self.work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+BENCHMARKS = [
+    CliStartup,
+    FilingsList,
+    EdgarDownload,
+    XbrlExtraction,
+    InlineXbrlExtraction,
+    TagNormalization,
+    CikTickerMapping,
+    PriceLoading,
+    Screening,
+    QueryServing
+]
\ No newline at end of file
@@ -2,20 +2,20 @@
 Main entry point for the Stock Selector application.
 """
 import argparse
-from src.data_acquisition.sec_downloader import SECFilingDownloader
-from src.data_acquisition.stock_utils import (
-    generate_cik_ticker_mapping,
-    update_ipo_dates,
-    download_daily_stock_prices
-)
-from src.llm_processing.financial_extractor import FinancialDataExtractor
+import os
 from src.utils.config import config
+from src.utils.metrics import metrics
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__, "logs/main.log")
 
+# Each command imports its stage modules itself, so that a command only pays
+# for the pandas, yfinance, bs4 and openai imports it actually uses.
+
 def download_data(args):
     """Download SEC filings and master index files."""
+    from src.data_acquisition.sec_downloader import SECFilingDownloader
+    
     logger.info("Starting data download")
     downloader = SECFilingDownloader()
     
@@ -30,34 +30,136 @@ def download_data(args):
     downloader.generate_filings_list()
     
     # Download filings
-    downloader.download_filings()
+    downloader.download_filings(resume=not args.restart)
 
 def process_data(args):
     """Process downloaded filings and extract financial data."""
+    from src.data_acquisition.stock_utils import (
+        generate_cik_ticker_mapping,
+        update_ipo_dates,
+        download_daily_stock_prices
+    )
+    from src.llm_processing.fundamentals import extract_fundamentals
+    
     logger.info("Starting data processing")
     
     # Generate CIK-ticker mapping
     generate_cik_ticker_mapping()
     
-    # Update IPO dates
-    update_ipo_dates()
-    
     # Download daily stock prices
-    download_daily_stock_prices()
+    download_daily_stock_prices(resume=not args.restart)
     
-    # Initialize financial extractor
-    extractor = FinancialDataExtractor()
+    # Update IPO dates from the first trading dates in the price store
+    update_ipo_dates()
+    
+    # Extract fundamentals from the downloaded filings
+    extract_fundamentals(resume=not args.restart)
     
-    # TODO: Add filing processing logic here
     logger.info("Data processing complete")
 
 def analyze_stocks(args):
     """Analyze stocks based on screening criteria."""
+    from src.llm_processing.fundamentals import load_fundamentals
+    from src.data_acquisition.security_master import load_security_master
+    from src.analysis.performance import analyze_performance
+    from src.analysis.screening import screen_stocks
+    
     logger.info("Starting stock analysis")
     
-    # TODO: Implement stock analysis logic
+    # Compute multi-horizon return and risk metrics
+    performance = analyze_performance()
+    output_dir = config.get("storage.processed_data_dir", "data/processed")
+    os.makedirs(output_dir, exist_ok=True)
+    performance.to_csv(os.path.join(output_dir, "performance_metrics.csv"))
+    
+    # Screen companies on their latest filings
+    selected = screen_stocks(
+        load_fundamentals(),
+        load_security_master(),
+        performance
+    )
+    
+    # Add company name, sector and market ratios of the selected stocks
+    if args.snapshot:
+        from src.data_acquisition.fundamentals_snapshot import fetch_snapshots
+        snapshots = fetch_snapshots(selected["ticker"])
+        selected = selected.merge(snapshots, on="ticker", how="left")
+    selected.to_csv(os.path.join(output_dir, "screened_stocks.csv"), index=False)
     logger.info("Stock analysis complete")
 
+def backtest(args):
+    """Backtest the screening criteria with point-in-time data."""
+    from src.analysis.backtest import run_backtest
+    
+    logger.info(f"Backtesting screening criteria from {args.start}")
+    
+    summary = run_backtest(args.start, args.end)
+    for key, value in summary.items():
+        print(f"{key:<18}: {value:.4f}")
+    
+    logger.info("Backtest complete")
+
+def sweep(args):
+    """Search screening thresholds by backtesting many combinations."""
+    from src.analysis.optimizer import optimize_thresholds
+    
+    logger.info("Starting screening threshold sweep")
+    
+    results = optimize_thresholds(
+        start_date=args.start,
+        end_date=args.end,
+        search=args.search,
+        samples=args.samples,
+        max_workers=args.workers
+    )
+    print(results.head(args.top).to_string())
+    
+    logger.info("Threshold sweep complete")
+
+def run_pipeline(args):
+    """Run the data refresh pipeline, skipping up-to-date stages."""
+    from src.pipeline.stages import build_pipeline
+    
+    logger.info("Running data refresh pipeline")
+    
+    results = build_pipeline().run(until=args.until, force=args.force, max_workers=args.workers)
+    for stage, outcome in results.items():
+        print(f"{stage:<20}: {outcome}")
+    
+    logger.info("Pipeline run complete")
+
+def serve(args):
+    """Serve screening, return and ranking queries from data kept in memory."""
+    from src.service.query_service import serve as serve_queries
+    
+    logger.info("Starting query service")
+    
+    serve_queries(args.host, args.port, args.socket, args.reload_interval)
+    
+    logger.info("Query service stopped")
+
+def run_worker(args):
+    """Work on the shared queue of a download or extraction job alongside other workers."""
+    from src.utils.work_queue import configured_queue
+    
+    job = args.job.replace("-", "_")
+    queue = configured_queue(job, args.queue_db, args.worker_id)
+    if args.reset:
+        queue.reset()
+    if args.status:
+        print(f"{job}: " + ", ".join(f"{status} {count}" for status, count in queue.counts().items()))
+        return
+    
+    logger.info(f"Starting {queue.worker_id} on {job}")
+    if job == "download_filings":
+        from src.data_acquisition.sec_downloader import SECFilingDownloader
+        SECFilingDownloader().download_filings(queue=queue)
+    else:
+        from src.llm_processing.fundamentals import extract_fundamentals
+        extract_fundamentals(queue=queue)
+    
+    logger.info(f"{queue.worker_id} finished {job}: {queue.counts()}")
+
 def generate_report(args):
     """Generate reports and visualizations."""
     logger.info("Generating reports")
@@ -78,6 +180,13 @@ def main():
         description="Stock Selector - Identify high-quality stocks based on SEC filings"
     )
     
+    parser.add_argument("--metrics", action="store_true", help="Print a timing and counter summary at the end")
+    parser.add_argument("--metrics-file", default=None, help="Write metrics to a .prom (Prometheus text) or .json file")
+    parser.add_argument("--profile", action="store_true", help="Profile CPU and memory and write reports to logs/")
+    parser.add_argument("--profile-scope", default=None,
+                        help="Only profile inside this function or stage, e.g. extract_from_xbrl")
+    parser.add_argument("--profile-top", type=int, default=25, help="Rows per profile report table")
+    
     subparsers = parser.add_subparsers(dest="command", required=True)
     
     # Download data command
@@ -85,6 +194,7 @@ def main():
         "download-data",
         help="Download SEC filings and master index files"
     )
+    download_parser.add_argument("--restart", action="store_true", help="Discard saved checkpoints before running")
     download_parser.set_defaults(func=download_data)
     
     # Process data command
@@ -92,6 +202,7 @@ def main():
         "process-data",
         help="Process downloaded filings and extract financial data"
     )
+    process_parser.add_argument("--restart", action="store_true", help="Discard saved checkpoints before running")
     process_parser.set_defaults(func=process_data)
     
     # Analyze stocks command
@@ -99,8 +210,70 @@ def main():
         "screen-stocks",
         help="Analyze stocks based on screening criteria"
     )
+    analyze_parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Add name, sector, market cap, P/E and dividend yield of the selected stocks"
+    )
     analyze_parser.set_defaults(func=analyze_stocks)
     
+    # Backtest command
+    backtest_parser = subparsers.add_parser(
+        "backtest",
+        help="Backtest the screening criteria with point-in-time data"
+    )
+    backtest_parser.add_argument("--start", default="2011-01-01", help="First rebalance date")
+    backtest_parser.add_argument("--end", default=None, help="End of the last holding period")
+    backtest_parser.set_defaults(func=backtest)
+    
+    # Threshold sweep command
+    sweep_parser = subparsers.add_parser(
+        "sweep",
+        help="Search screening thresholds by backtesting many combinations"
+    )
+    sweep_parser.add_argument("--start", default=None, help="First rebalance date")
+    sweep_parser.add_argument("--end", default=None, help="End of the last holding period")
+    sweep_parser.add_argument("--search", choices=["grid", "random"], default=None, help="Search method")
+    sweep_parser.add_argument("--samples", type=int, default=None, help="Threshold sets drawn by a random search")
+    sweep_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    sweep_parser.add_argument("--top", type=int, default=10, help="Number of results to print")
+    sweep_parser.set_defaults(func=sweep)
+    
+    # Pipeline command
+    run_parser = subparsers.add_parser(
+        "run",
+        help="Run the data refresh pipeline, skipping up-to-date stages"
+    )
+    run_parser.add_argument("--until", default=None, help="Last stage to run (all stages by default)")
+    run_parser.add_argument("--force", action="store_true", help="Run stages even when up to date")
+    run_parser.add_argument("--workers", type=int, default=4, help="Maximum number of stages running at once")
+    run_parser.set_defaults(func=run_pipeline)
+    
+    # Query service command
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Serve screening, return and ranking queries from data kept in memory"
+    )
+    serve_parser.add_argument("--host", default=None, help="Address to listen on")
+    serve_parser.add_argument("--port", type=int, default=None, help="TCP port to listen on")
+    serve_parser.add_argument("--socket", default=None, help="Unix socket to listen on instead of TCP")
+    serve_parser.add_argument("--reload-interval", type=float, default=None,
+                              help="Seconds between checks for data published by the pipeline (0 to disable)")
+    serve_parser.set_defaults(func=serve)
+    
+    # Distributed worker command
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Claim units of a download or extraction job shared with other worker processes or hosts"
+    )
+    worker_parser.add_argument("job", choices=["download-filings", "extract-fundamentals"], help="Job to work on")
+    worker_parser.add_argument("--queue-db", default=None, help="Shared work queue database")
+    worker_parser.add_argument("--worker-id", default=None, help="Worker name (host and process ID by default)")
+    worker_parser.add_argument("--status", action="store_true", help="Print the job's units by status and exit")
+    worker_parser.add_argument("--reset", action="store_true",
+                               help="Discard the job's units and results before working on it")
+    worker_parser.set_defaults(func=run_worker)
+    
     # Generate report command
     report_parser = subparsers.add_parser(
         "generate-report",
@@ -117,7 +290,25 @@ def main():
     
     # Parse arguments and execute command
     args = parser.parse_args()
-    args.func(args)
+    profiler = None
+    if args.profile or args.profile_scope:
+        # Imported here so that runs without profiling load nothing extra
+        from src.utils.profiling import Profiler
+        profiler = Profiler(scope=args.profile_scope).start()
+    try:
+        with metrics.stage(args.command):
+            args.func(args)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            name = args.command + (f"-{args.profile_scope}" if args.profile_scope else "")
+            folded_file, report_file = profiler.write("logs", name, args.profile_top)
+            print(f"Profile written to {report_file} and {folded_file}")
+        if args.metrics:
+            print(metrics.summary())
+        if args.metrics_file:
+            metrics.dump(args.metrics_file)
+            logger.info(f"Metrics written to {args.metrics_file}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
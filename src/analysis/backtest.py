@@ -0,0 +1,433 @@
+"""
+Walk-forward backtesting of the screening strategy for the Stock Selector project.
+"""
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple, Union
+from src.data_acquisition.filing_headers import is_reit
+from src.analysis.screening import (
+    CRITERIA_METRICS,
+    FUNDAMENTAL_METRICS,
+    SHARPE_WINDOW_YEARS,
+    derive_metrics
+)
+from src.data_acquisition.price_store import PriceStore, ReturnIndex
+from src.data_acquisition.security_master import SecurityMaster, bound_reused_tickers, load_security_master
+from src.llm_processing.fundamentals import load_fundamentals
+from src.utils.config import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/backtest.log")
+
+FEATURES = FUNDAMENTAL_METRICS + ["years_since_ipo", "sharpe_ratio"]
+
+
+def summarize_returns(
+    returns: np.ndarray,
+    periods_per_year: float,
+    risk_free_rate: float = 0.0
+) -> Dict[str, float]:
+    """
+    Summarize a series of period returns.
+    
+    Periods without a return (NaN, e.g. no benchmark price yet) are dropped
+    rather than compounded as flat, and CAGR is annualized over the rest.
+    
+    Args:
+        returns (np.ndarray): Return of each holding period
+        periods_per_year (float): Number of holding periods per year
+        risk_free_rate (float): Annual risk-free rate for the Sharpe ratio
+    
+    Returns:
+        Dict[str, float]: total_return, cagr, volatility, sharpe_ratio and max_drawdown
+    """
+    returns = np.asarray(returns, dtype="float64")
+    returns = returns[~np.isnan(returns)]
+    if len(returns) == 0:
+        return {"total_return": np.nan, "cagr": np.nan, "volatility": np.nan,
+                "sharpe_ratio": np.nan, "max_drawdown": np.nan}
+    
+    equity = np.cumprod(1.0 + returns)
+    peaks = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    years = len(returns) / periods_per_year
+    volatility = returns.std(ddof=1) * np.sqrt(periods_per_year) if len(returns) > 1 else np.nan
+    excess_return = returns.mean() * periods_per_year - risk_free_rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        summary = {
+            "total_return": equity[-1] - 1.0,
+            "cagr": equity[-1] ** (1.0 / years) - 1.0,
+            "volatility": volatility,
+            "sharpe_ratio": excess_return / volatility,
+            "max_drawdown": (equity / peaks).min() - 1.0
+        }
+    return {key: float(value) for key, value in summary.items()}
+
+
+class Backtester:
+    """
+    Walk-forward, point-in-time backtest of the screening strategy.
+    
+    At every rebalance date each company is judged only on filings dated
+    before that date and on prices up to that date; the companies that pass
+    are held in equal weight until the next rebalance. As in screen_metrics,
+    REITs (by the SIC code of their latest filing) are screened on thresholds
+    of their own. Companies that changed ticker get one column per listing,
+    each only selectable while it was the company's primary listing. All screening inputs
+    and holding-period returns are laid out as arrays once, so evaluating a
+    set of criteria is a handful of vectorized comparisons.
+    """
+    
+    def __init__(
+        self,
+        metrics: pd.DataFrame,
+        securities: Union[pd.DataFrame, SecurityMaster],
+        return_index: ReturnIndex,
+        start_date: str,
+        end_date: Optional[str] = None,
+        frequency: str = "BMS",
+        risk_free_rate: float = 0.0
+    ):
+        """
+        Initialize the backtester and precompute its arrays.
+        
+        Args:
+            metrics (pd.DataFrame): Output of derive_metrics
+            securities (Union[pd.DataFrame, SecurityMaster]): Security master, or a stock list
+                with cik, ticker and ipo_date
+            return_index (ReturnIndex): Cumulative return arrays from the price store
+            start_date (str): First rebalance date
+            end_date (Optional[str]): End of the last holding period (last price date if None)
+            frequency (str): pandas frequency of rebalance dates (business month start by default)
+            risk_free_rate (float): Annual risk-free rate for Sharpe ratios
+        """
+        self.return_index = return_index
+        self.risk_free_rate = risk_free_rate
+        self.end_date = pd.Timestamp(end_date) if end_date is not None else return_index.dates[-1]
+        self.rebalance_dates = pd.date_range(start_date, self.end_date, freq=frequency)
+        if len(self.rebalance_dates) == 0:
+            raise ValueError(f"No rebalance dates between {start_date} and {self.end_date}")
+        self.periods_per_year = len(self.rebalance_dates) / max(
+            (self.end_date - self.rebalance_dates[0]).days / 365.25, 1e-9)
+        
+        # Step 1: Universe of listings with a price history
+        if isinstance(securities, SecurityMaster):
+            securities = securities.primary_listings()
+        else:
+            securities = securities.drop_duplicates(subset=["cik"])
+        universe = securities[securities["ticker"].isin(return_index.columns)]
+        self.universe = universe.reset_index(drop=True)
+        self.tickers: List[str] = self.universe["ticker"].tolist()
+        self.columns = return_index.column_positions(self.tickers)
+        self.listed = self._listing_mask()
+        
+        # Step 2: Point-in-time screening inputs, shape (features, dates, companies), and REIT flags
+        self.features, self.reits = self._build_features(metrics)
+        
+        # Step 3: Holding-period returns, shape (dates, companies); a company that stops
+        # trading during a period is sold at its last price, so delistings count as realized
+        boundaries = return_index.positions(self.rebalance_dates.append(pd.DatetimeIndex([self.end_date])))
+        last_pos = np.where(self.columns >= 0, return_index.last_pos[self.columns], -1)
+        self.period_returns = return_index.window_stats(
+            boundaries[:-1, None],
+            np.minimum(boundaries[1:, None], last_pos[None, :]),
+            self.columns[None, :]
+        )["total_return"]
+        if return_index.benchmark is not None:
+            benchmark_col = return_index.columns[return_index.benchmark]
+            self.benchmark_returns = return_index.window_stats(
+                boundaries[:-1], boundaries[1:], benchmark_col)["total_return"]
+        else:
+            self.benchmark_returns = np.full(len(self.rebalance_dates), np.nan)
+        
+        logger.info(
+            f"Prepared backtest with {len(self.rebalance_dates)} rebalances "
+            f"over {len(self.tickers)} companies"
+        )
+    
+    def save_arrays(self, directory: str) -> None:
+        """
+        Save the precomputed arrays as .npy files that can be memory-mapped.
+        
+        Args:
+            directory (str): Directory to write to
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "features.npy"), self.features)
+        np.save(os.path.join(directory, "listed.npy"), self.listed)
+        np.save(os.path.join(directory, "reits.npy"), self.reits)
+        np.save(os.path.join(directory, "period_returns.npy"), self.period_returns)
+        np.save(os.path.join(directory, "benchmark_returns.npy"), self.benchmark_returns)
+        np.save(
+            os.path.join(directory, "settings.npy"),
+            np.array([self.periods_per_year, self.risk_free_rate])
+        )
+    
+    @classmethod
+    def from_arrays(cls, directory: str, mmap_mode: Optional[str] = "r") -> "Backtester":
+        """
+        Load a backtester that can evaluate criteria from arrays saved by save_arrays.
+        
+        The arrays are memory-mapped by default, so many processes can share
+        one copy through the page cache.
+        
+        Args:
+            directory (str): Directory written by save_arrays
+            mmap_mode (Optional[str]): numpy memory-map mode, or None to read into memory
+        
+        Returns:
+            Backtester: Backtester without the price index or rebalance calendar
+        """
+        backtester = cls.__new__(cls)
+        backtester.features = np.load(os.path.join(directory, "features.npy"), mmap_mode=mmap_mode)
+        backtester.listed = np.load(os.path.join(directory, "listed.npy"), mmap_mode=mmap_mode)
+        backtester.reits = np.load(os.path.join(directory, "reits.npy"), mmap_mode=mmap_mode)
+        backtester.period_returns = np.load(os.path.join(directory, "period_returns.npy"), mmap_mode=mmap_mode)
+        backtester.benchmark_returns = np.load(os.path.join(directory, "benchmark_returns.npy"))
+        backtester.periods_per_year, backtester.risk_free_rate = np.load(
+            os.path.join(directory, "settings.npy")).tolist()
+        return backtester
+    
+    def _listing_mask(self) -> np.ndarray:
+        """
+        Mark the listings that were valid at each rebalance date.
+        
+        Returns:
+            np.ndarray: Boolean array of shape (dates, companies)
+        """
+        dates = self.rebalance_dates.values[:, None]
+        if "start_date" not in self.universe.columns:
+            return np.ones((len(self.rebalance_dates), len(self.universe)), dtype=bool)
+        starts = bound_reused_tickers(self.universe)["start_date"].fillna(pd.Timestamp.min).values[None, :]
+        ends = pd.to_datetime(self.universe["end_date"]).fillna(pd.Timestamp.max).values[None, :]
+        return (dates >= starts) & (dates <= ends)
+    
+    def _build_features(self, metrics: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lay out the screening inputs known at each rebalance date.
+        
+        Args:
+            metrics (pd.DataFrame): Output of derive_metrics
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Features of shape (FEATURES, dates, companies) and
+                REIT flags of shape (dates, companies)
+        """
+        n_dates, n_companies = len(self.rebalance_dates), len(self.universe)
+        grid = pd.DataFrame({
+            "date": np.repeat(self.rebalance_dates.values, n_companies),
+            "cik": np.tile(self.universe["cik"].to_numpy(), n_dates)
+        })
+        filed = metrics.dropna(subset=["filing_date"]).sort_values("filing_date")
+        filed = filed[filed["cik"].isin(self.universe["cik"])]
+        
+        # Latest filing strictly before each rebalance date
+        sic = ["sic"] if "sic" in filed.columns else []
+        point_in_time = pd.merge_asof(
+            grid,
+            filed[["cik", "filing_date"] + sic + FUNDAMENTAL_METRICS],
+            left_on="date",
+            right_on="filing_date",
+            by="cik",
+            allow_exact_matches=False
+        )
+        fundamentals = point_in_time[FUNDAMENTAL_METRICS].to_numpy(dtype="float64").T
+        fundamentals = fundamentals.reshape(len(FUNDAMENTAL_METRICS), n_dates, n_companies)
+        reits = np.zeros((n_dates, n_companies), dtype=bool)
+        if sic:
+            reits = is_reit(point_in_time["sic"]).to_numpy().reshape(n_dates, n_companies)
+        
+        ipo_dates = pd.to_datetime(self.universe["ipo_date"], errors="coerce").values
+        years_since_ipo = (self.rebalance_dates.values[:, None] - ipo_dates[None, :]) / np.timedelta64(1, "D") / 365.25
+        
+        rows = self.return_index.positions(self.rebalance_dates)
+        sharpe_starts = self.return_index.positions(self.rebalance_dates - pd.DateOffset(years=SHARPE_WINDOW_YEARS))
+        sharpe_ratio = self.return_index.window_stats(
+            sharpe_starts[:, None], rows[:, None], self.columns[None, :], self.risk_free_rate)["sharpe_ratio"]
+        
+        # One contiguous (dates, companies) block per feature keeps criteria checks fast
+        features = np.ascontiguousarray(np.concatenate(
+            [fundamentals, years_since_ipo[None], sharpe_ratio[None]], axis=0))
+        return features, reits
+    
+    def _criteria_mask(self, criteria: Dict[str, float]) -> np.ndarray:
+        """
+        Evaluate one set of screening criteria on the listed companies.
+        
+        Args:
+            criteria (Dict[str, float]): Screening thresholds
+        
+        Returns:
+            np.ndarray: Boolean array of shape (dates, companies)
+        """
+        mask = np.array(self.listed, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for key, threshold in criteria.items():
+                metric = CRITERIA_METRICS.get(key)
+                if metric is None:
+                    logger.warning(f"Ignoring unknown screening criterion {key}")
+                    continue
+                values = self.features[FEATURES.index(metric)]
+                if key.startswith("max_"):
+                    mask &= values <= threshold
+                else:
+                    mask &= values >= threshold
+        return mask
+    
+    def selection_mask(
+        self,
+        criteria: Dict[str, float],
+        reit_criteria: Optional[Dict[str, float]] = None
+    ) -> np.ndarray:
+        """
+        Evaluate screening criteria at every rebalance date.
+        
+        Args:
+            criteria (Dict[str, float]): Screening thresholds, e.g. screening.stocks
+            reit_criteria (Optional[Dict[str, float]]): Thresholds for REITs (criteria if None)
+        
+        Returns:
+            np.ndarray: Boolean array of shape (dates, companies)
+        """
+        mask = self._criteria_mask(criteria)
+        if reit_criteria and self.reits.any():
+            mask = np.where(self.reits, self._criteria_mask(reit_criteria), mask)
+        return mask
+    
+    def portfolio_returns(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Equal-weight returns of the selected companies in each holding period.
+        
+        A company that stops trading during a period counts with its return
+        up to its last price, so delisted and bankrupt companies are not left
+        out. Only companies without a price at the start of a period are
+        left out of its average; periods with no holdings stay in cash.
+        
+        Args:
+            mask (np.ndarray): Boolean selection of shape (dates, companies)
+        
+        Returns:
+            np.ndarray: Portfolio return per holding period
+        """
+        held = mask & ~np.isnan(self.period_returns)
+        count = held.sum(axis=1)
+        total = np.where(held, self.period_returns, 0.0).sum(axis=1)
+        return np.divide(total, count, out=np.zeros(len(count)), where=count > 0)
+    
+    def evaluate(
+        self,
+        criteria: Dict[str, float],
+        reit_criteria: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
+        """
+        Summarize the strategy for one set of criteria.
+        
+        Args:
+            criteria (Dict[str, float]): Screening thresholds
+            reit_criteria (Optional[Dict[str, float]]): Thresholds for REITs (criteria if None)
+        
+        Returns:
+            Dict[str, float]: Portfolio summary plus benchmark CAGR and average holdings
+        """
+        mask = self.selection_mask(criteria, reit_criteria)
+        summary = summarize_returns(self.portfolio_returns(mask), self.periods_per_year, self.risk_free_rate)
+        summary["benchmark_cagr"] = summarize_returns(
+            self.benchmark_returns, self.periods_per_year)["cagr"]
+        summary["average_holdings"] = float(mask.sum(axis=1).mean())
+        return summary
+    
+    def run(
+        self,
+        criteria: Dict[str, float],
+        reit_criteria: Optional[Dict[str, float]] = None
+    ) -> pd.DataFrame:
+        """
+        Run the backtest and report every holding period.
+        
+        Args:
+            criteria (Dict[str, float]): Screening thresholds
+            reit_criteria (Optional[Dict[str, float]]): Thresholds for REITs (criteria if None)
+        
+        Returns:
+            pd.DataFrame: portfolio_return, benchmark_return and holdings per rebalance date
+        """
+        mask = self.selection_mask(criteria, reit_criteria)
+        return pd.DataFrame({
+            "portfolio_return": self.portfolio_returns(mask),
+            "benchmark_return": self.benchmark_returns,
+            "holdings": mask.sum(axis=1)
+        }, index=pd.Index(self.rebalance_dates, name="rebalance_date"))
+
+
+def load_backtester(
+    start_date: str,
+    end_date: Optional[str] = None,
+    fundamentals_file: str = None,
+    db_file: str = "data/securities.db",
+    history_file: str = "data/ticker_history.csv",
+    prices_dir: str = "data/daily_stock_prices"
+) -> Backtester:
+    """
+    Build a backtester from the processed data on disk.
+    
+    Args:
+        start_date (str): First rebalance date
+        end_date (Optional[str]): End of the last holding period
+        fundamentals_file (str): Path to the fundamentals CSV
+        db_file (str): Path to the security store database
+        history_file (str): Path to the ticker history CSV (optional)
+        prices_dir (str): Directory of the daily price store
+    
+    Returns:
+        Backtester: Prepared backtester
+    """
+    benchmark = config.get("performance.benchmark_ticker", "^GSPC")
+    store = PriceStore(prices_dir)
+    return_index = store.return_index(benchmark if benchmark in store.index else None)
+    return Backtester(
+        derive_metrics(load_fundamentals(fundamentals_file)),
+        load_security_master(db_file, history_file=history_file),
+        return_index,
+        start_date,
+        end_date,
+        risk_free_rate=config.get("performance.risk_free_rate", 0.0)
+    )
+
+
+def run_backtest(
+    start_date: str,
+    end_date: Optional[str] = None,
+    criteria: Optional[Dict[str, float]] = None,
+    output_file: str = None,
+    reit_criteria: Optional[Dict[str, float]] = None
+) -> Dict[str, float]:
+    """
+    Backtest the configured screening criteria and save the period returns.
+    
+    Args:
+        start_date (str): First rebalance date
+        end_date (Optional[str]): End of the last holding period
+        criteria (Optional[Dict[str, float]]): Thresholds (screening.stocks if None)
+        output_file (str): Path to save the per-period results CSV
+        reit_criteria (Optional[Dict[str, float]]): Thresholds for REITs (screening.reits if
+            criteria is None too, otherwise criteria)
+    
+    Returns:
+        Dict[str, float]: Strategy summary
+    """
+    if criteria is None:
+        criteria = config.get("screening.stocks", {})
+        if reit_criteria is None:
+            reit_criteria = config.get("screening.reits", None)
+    if output_file is None:
+        output_file = os.path.join(
+            config.get("storage.processed_data_dir", "data/processed"), "backtest_periods.csv")
+    
+    backtester = load_backtester(start_date, end_date)
+    periods = backtester.run(criteria, reit_criteria)
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    periods.to_csv(output_file)
+    
+    summary = backtester.evaluate(criteria, reit_criteria)
+    logger.info(f"Backtest summary: {summary}")
+    return summary
\ No newline at end of file
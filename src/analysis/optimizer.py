@@ -0,0 +1,186 @@
+"""
+Screening threshold optimization for the Stock Selector project.
+"""
+import itertools
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from src.analysis.backtest import Backtester, load_backtester
+from src.utils.config import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/optimizer.log")
+
+# Backtester and REIT thresholds shared by the configurations evaluated in a worker process
+_worker_backtester: Optional[Backtester] = None
+_worker_reit_criteria: Optional[Dict[str, float]] = None
+
+
+def parameter_grid(ranges: Dict[str, List[float]]) -> List[Dict[str, float]]:
+    """
+    Build every combination of evenly spaced threshold values.
+    
+    Args:
+        ranges (Dict[str, List[float]]): [low, high, steps] per screening criterion
+    
+    Returns:
+        List[Dict[str, float]]: One threshold set per combination
+    """
+    keys = list(ranges)
+    values = [np.linspace(low, high, int(steps)).tolist() for low, high, steps in ranges.values()]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def parameter_samples(
+    ranges: Dict[str, List[float]],
+    samples: int,
+    seed: Optional[int] = None
+) -> List[Dict[str, float]]:
+    """
+    Draw threshold sets uniformly at random within the ranges.
+    
+    Args:
+        ranges (Dict[str, List[float]]): [low, high, steps] per screening criterion (steps is ignored)
+        samples (int): Number of threshold sets to draw
+        seed (Optional[int]): Random seed
+    
+    Returns:
+        List[Dict[str, float]]: Sampled threshold sets
+    """
+    rng = np.random.default_rng(seed)
+    draws = {key: rng.uniform(low, high, samples) for key, (low, high, _) in ranges.items()}
+    return [{key: float(values[i]) for key, values in draws.items()} for i in range(samples)]
+
+
+def _init_worker(arrays_dir: str, reit_criteria: Optional[Dict[str, float]] = None) -> None:
+    """
+    Memory-map the shared backtest arrays once per worker process.
+    
+    Args:
+        arrays_dir (str): Directory written by Backtester.save_arrays
+        reit_criteria (Optional[Dict[str, float]]): Thresholds for REITs (the swept criteria if None)
+    """
+    global _worker_backtester, _worker_reit_criteria
+    _worker_backtester = Backtester.from_arrays(arrays_dir)
+    _worker_reit_criteria = reit_criteria
+
+
+def _evaluate_batch(batch: List[Dict[str, float]]) -> List[Dict[str, float]]:
+    """
+    Evaluate a batch of threshold sets in a worker process.
+    
+    Args:
+        batch (List[Dict[str, float]]): Complete screening criteria
+    
+    Returns:
+        List[Dict[str, float]]: Strategy summary per threshold set
+    """
+    return [_worker_backtester.evaluate(criteria, _worker_reit_criteria) for criteria in batch]
+
+
+def sweep_thresholds(
+    backtester: Backtester,
+    configurations: List[Dict[str, float]],
+    base_criteria: Optional[Dict[str, float]] = None,
+    objective: str = "sharpe_ratio",
+    max_workers: Optional[int] = None,
+    batch_size: int = 10,
+    reit_criteria: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Backtest many threshold sets in parallel and rank them.
+    
+    The backtester's arrays are written once to a temporary directory and
+    memory-mapped by every worker, so the processes share one copy of the
+    screening inputs and period returns instead of pickling them. REITs keep
+    their own thresholds while the others are swept, as in screen_metrics.
+    
+    Args:
+        backtester (Backtester): Prepared backtester
+        configurations (List[Dict[str, float]]): Thresholds to override in the base criteria
+        base_criteria (Optional[Dict[str, float]]): Criteria left unchanged (screening.stocks if None)
+        objective (str): Summary column to rank by, higher is better
+        max_workers (Optional[int]): Number of worker processes (CPU count if None)
+        batch_size (int): Threshold sets sent to a worker at a time
+        reit_criteria (Optional[Dict[str, float]]): Thresholds for REITs (screening.reits if
+            base_criteria is None too, otherwise the swept criteria)
+    
+    Returns:
+        pd.DataFrame: Thresholds and strategy summary per configuration, best first
+    """
+    if base_criteria is None:
+        base_criteria = config.get("screening.stocks", {})
+        if reit_criteria is None:
+            reit_criteria = config.get("screening.reits", None)
+    candidates = [{**base_criteria, **overrides} for overrides in configurations]
+    batches = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+    logger.info(f"Evaluating {len(candidates)} threshold sets in {len(batches)} batches")
+    
+    with tempfile.TemporaryDirectory(prefix="sweep_") as arrays_dir:
+        backtester.save_arrays(arrays_dir)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(arrays_dir, reit_criteria)
+        ) as executor:
+            summaries = [summary for batch in executor.map(_evaluate_batch, batches) for summary in batch]
+    
+    results = pd.concat([pd.DataFrame(candidates), pd.DataFrame(summaries)], axis=1)
+    results = results.sort_values(objective, ascending=False, na_position="last").reset_index(drop=True)
+    results.index = pd.RangeIndex(1, len(results) + 1, name="rank")
+    return results
+
+
+def optimize_thresholds(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    search: Optional[str] = None,
+    samples: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    output_file: str = None
+) -> pd.DataFrame:
+    """
+    Sweep the configured threshold ranges and save the ranked results.
+    
+    Args:
+        start_date (Optional[str]): First rebalance date (optimization.start_date if None)
+        end_date (Optional[str]): End of the last holding period
+        search (Optional[str]): "grid" or "random" (optimization.search if None)
+        samples (Optional[int]): Threshold sets drawn by a random search
+        max_workers (Optional[int]): Number of worker processes
+        output_file (str): Path to save the ranked results CSV
+    
+    Returns:
+        pd.DataFrame: Ranked results
+    """
+    settings: Dict = config.get("optimization", {})
+    start_date = start_date or str(settings.get("start_date", "2011-01-01"))
+    search = search or settings.get("search", "grid")
+    samples = samples or settings.get("samples", 1000)
+    ranges = settings.get("ranges", {})
+    if output_file is None:
+        output_file = os.path.join(
+            config.get("storage.processed_data_dir", "data/processed"), "threshold_sweep.csv")
+    
+    if search == "grid":
+        configurations = parameter_grid(ranges)
+    elif search == "random":
+        configurations = parameter_samples(ranges, samples, settings.get("seed"))
+    else:
+        raise ValueError(f"Unknown search method: {search}")
+    
+    backtester = load_backtester(start_date, end_date)
+    results = sweep_thresholds(
+        backtester,
+        configurations,
+        objective=settings.get("objective", "sharpe_ratio"),
+        max_workers=max_workers
+    )
+    
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    results.to_csv(output_file)
+    logger.info(f"Saved {len(results)} ranked threshold sets to {output_file}")
+    return results
\ No newline at end of file
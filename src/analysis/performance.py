@@ -0,0 +1,193 @@
+"""
+Return and risk analytics for the Stock Selector project.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from src.data_acquisition.price_store import PriceStore, ReturnIndex
+from src.utils.config import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/performance.log")
+
+METRICS = [
+    "total_return",
+    "cagr",
+    "volatility",
+    "sharpe_ratio",
+    "sortino_ratio",
+    "max_drawdown",
+    "beta"
+]
+
+
+def _window_start(dates: pd.DatetimeIndex, end_date: pd.Timestamp, years: int) -> int:
+    """
+    Find the last trading day on or before the start of a trailing window.
+    
+    Args:
+        dates (pd.DatetimeIndex): Sorted trading dates
+        end_date (pd.Timestamp): Last date of the window
+        years (int): Window length in years
+    
+    Returns:
+        int: Position of the window start, or -1 if the history is too short
+    """
+    start_date = end_date - pd.DateOffset(years=years)
+    return int(dates.searchsorted(start_date, side="right")) - 1
+
+
+def _segment_drawdown(seg_log_prices: np.ndarray) -> np.ndarray:
+    """
+    Compute the maximum drawdown of every column within a block of log prices.
+    
+    Args:
+        seg_log_prices (np.ndarray): Log prices, one row per date and one column per ticker
+    
+    Returns:
+        np.ndarray: Maximum drawdown per column in log terms (zero or negative)
+    """
+    peak = seg_log_prices[0].copy()
+    worst = np.zeros_like(peak)
+    gap = np.empty_like(peak)
+    for row in seg_log_prices[1:]:
+        np.maximum(peak, row, out=peak)
+        np.subtract(row, peak, out=gap)
+        np.minimum(worst, gap, out=worst)
+    return worst
+
+
+def _trailing_drawdowns(log_prices: np.ndarray, starts: List[int], end: int) -> Dict[int, np.ndarray]:
+    """
+    Compute the maximum drawdown of nested trailing windows in one pass.
+    
+    The history is split at the window starts and each segment is scanned
+    once; a longer window combines the drawdown of its newest part, of the
+    added segment, and of a fall from the segment's peak to the newer low.
+    
+    Args:
+        log_prices (np.ndarray): Forward-filled log prices
+        starts (List[int]): Window start rows
+        end (int): Common window end row
+    
+    Returns:
+        Dict[int, np.ndarray]: Maximum drawdown per column, keyed by start row
+    """
+    drawdowns = {}
+    worst = low = None
+    seg_end = end
+    for start in sorted(set(starts), reverse=True):
+        segment = log_prices[start:seg_end + 1]
+        seg_worst = _segment_drawdown(segment)
+        seg_low = segment.min(axis=0)
+        if worst is None:
+            worst, low = seg_worst, seg_low
+        else:
+            worst = np.minimum(np.minimum(worst, seg_worst), low - segment.max(axis=0))
+            low = np.minimum(low, seg_low)
+        drawdowns[start] = np.expm1(worst)
+        seg_end = start
+    return drawdowns
+
+
+def performance_from_index(
+    return_index: ReturnIndex,
+    horizons: List[int],
+    risk_free_rate: float = 0.0,
+    as_of: Optional[pd.Timestamp] = None
+) -> pd.DataFrame:
+    """
+    Compute trailing return and risk metrics for every ticker and horizon.
+    
+    Returns, volatility, Sharpe and Sortino ratios and beta are differences of
+    the precomputed cumulative arrays; only the drawdown scans prices. A
+    ticker gets NaN for a horizon when it has no price at the start of that
+    window or no longer trades on the last date.
+    
+    Args:
+        return_index (ReturnIndex): Cumulative return arrays
+        horizons (List[int]): Trailing window lengths in years
+        risk_free_rate (float): Annual risk-free rate for Sharpe and Sortino ratios
+        as_of (Optional[pd.Timestamp]): Window end date (last trading day if None)
+    
+    Returns:
+        pd.DataFrame: Metrics indexed by ticker with (horizon, metric) columns
+    """
+    dates = return_index.dates
+    tickers = pd.Index(return_index.tickers, name="ticker")
+    end = len(dates) - 1 if as_of is None else int(return_index.positions(as_of)[0])
+    
+    starts = {}
+    for years in horizons:
+        starts[years] = _window_start(dates, dates[end], years) if end > 0 else -1
+    valid_starts = [start for start in starts.values() if start >= 0]
+    drawdowns = _trailing_drawdowns(return_index.log_prices, valid_starts, end)
+    
+    results = {}
+    for years, start in starts.items():
+        if start < 0:
+            results[f"{years}Y"] = pd.DataFrame(np.nan, index=tickers, columns=METRICS)
+            continue
+        
+        stats = return_index.window_stats(start, end, risk_free_rate=risk_free_rate)
+        stats["max_drawdown"] = np.where(np.isnan(stats["total_return"]), np.nan, drawdowns[start])
+        results[f"{years}Y"] = pd.DataFrame(stats, index=tickers)[METRICS]
+    
+    return pd.concat(results, axis=1)
+
+
+def compute_performance_metrics(
+    prices: pd.DataFrame,
+    horizons: List[int],
+    benchmark: Optional[str] = None,
+    risk_free_rate: float = 0.0
+) -> pd.DataFrame:
+    """
+    Compute trailing return and risk metrics from a price matrix.
+    
+    Prices are forward-filled, so window starts use the last close on or
+    before the date.
+    
+    Args:
+        prices (pd.DataFrame): Prices indexed by date with one column per ticker
+        horizons (List[int]): Trailing window lengths in years
+        benchmark (Optional[str]): Column used as the market for beta
+        risk_free_rate (float): Annual risk-free rate for Sharpe and Sortino ratios
+    
+    Returns:
+        pd.DataFrame: Metrics indexed by ticker with (horizon, metric) columns
+    """
+    return_index = ReturnIndex.from_prices(prices, benchmark)
+    return performance_from_index(return_index, horizons, risk_free_rate)
+
+
+def analyze_performance(
+    prices_dir: str = "data/daily_stock_prices",
+    tickers: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Compute performance metrics from the price store using the configured settings.
+    
+    Args:
+        prices_dir (str): Directory of the daily price store
+        tickers (Optional[List[str]]): Tickers to analyze (all stored tickers if None)
+    
+    Returns:
+        pd.DataFrame: Metrics indexed by ticker with (horizon, metric) columns
+    """
+    performance_config: Dict = config.get_performance_config()
+    benchmark = performance_config.get("benchmark_ticker", "^GSPC")
+    horizons = performance_config.get("time_frames", [1, 3, 5, 10, 15, 20])
+    risk_free_rate = performance_config.get("risk_free_rate", 0.0)
+    
+    store = PriceStore(prices_dir)
+    if benchmark not in store.index:
+        logger.warning(f"Benchmark {benchmark} not found in price store; beta will be NaN")
+        benchmark = None
+    return_index = store.return_index(benchmark)
+    
+    logger.info(f"Computing performance metrics for {len(return_index.tickers)} tickers over {horizons} years")
+    performance = performance_from_index(return_index, horizons, risk_free_rate)
+    if tickers is not None:
+        performance = performance.reindex(list(tickers))
+    return performance
\ No newline at end of file
@@ -0,0 +1,278 @@
+"""
+Fundamental stock screening for the Stock Selector project.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Union
+from src.data_acquisition.filing_headers import is_reit
+from src.data_acquisition.security_master import SecurityMaster
+from src.utils.config import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/screening.log")
+
+# Screening criteria keys and the derived metric each one thresholds
+CRITERIA_METRICS = {
+    "min_years_profitable": "years_profitable",
+    "min_eps_cagr_5y": "eps_cagr_5y",
+    "max_debt_ebitda_ratio": "debt_ebitda_ratio",
+    "min_roe": "roe",
+    "min_roic": "roic",
+    "min_net_margin": "net_margin",
+    "min_ebit_margin": "ebit_margin",
+    "min_years_since_ipo": "years_since_ipo",
+    "min_sharpe_ratio": "sharpe_ratio"
+}
+
+# Derived metrics that only depend on the filings themselves
+FUNDAMENTAL_METRICS = [
+    "years_profitable",
+    "eps_cagr_5y",
+    "debt_ebitda_ratio",
+    "roe",
+    "roic",
+    "net_margin",
+    "ebit_margin"
+]
+
+SHARPE_WINDOW_YEARS = 5
+
+
+def _as_filed(rows: pd.DataFrame, earlier: pd.DataFrame, column: str, years_back: int) -> np.ndarray:
+    """
+    Look up a value of an earlier fiscal year as filed by each row's date.
+    
+    Args:
+        rows (pd.DataFrame): cik, fiscal_year and date of each row
+        earlier (pd.DataFrame): cik, fiscal_year, date and the column, one row per filing
+        column (str): Column of earlier to look up
+        years_back (int): Fiscal years between each row and the year looked up
+    
+    Returns:
+        np.ndarray: Value of the latest filing of that year dated on or before each row, NaN if none
+    """
+    keys = rows[["cik", "fiscal_year", "date"]].assign(
+        fiscal_year=rows["fiscal_year"] - years_back, order=np.arange(len(rows)))
+    matched = pd.merge_asof(
+        keys.sort_values("date", kind="stable"),
+        earlier[["cik", "fiscal_year", "date", column]].sort_values("date", kind="stable"),
+        on="date",
+        by=["cik", "fiscal_year"]
+    )
+    return matched.sort_values("order")[column].to_numpy(dtype="float64")
+
+
+def derive_metrics(fundamentals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive screening metrics for every filing in the fundamentals table.
+    
+    Each row only uses its own filing and earlier fiscal years of the same
+    company as filed by its filing date, so it is valid from then onwards. A
+    fiscal year with an amendment has a row per filing, and a later year only
+    sees the amendment from its filing date.
+    
+    Args:
+        fundamentals (pd.DataFrame): Table produced by extract_fundamentals
+    
+    Returns:
+        pd.DataFrame: cik, fiscal_year, filing_date, sic (if known) and FUNDAMENTAL_METRICS
+    """
+    df = fundamentals.sort_values(["cik", "fiscal_year", "filing_date"], kind="stable").reset_index(drop=True)
+    
+    def col(name):
+        return df[name] if name in df.columns else pd.Series(np.nan, index=df.index)
+    
+    net_income = col("NetIncomeLoss")
+    revenue = col("Revenues")
+    operating_income = col("OperatingIncomeLoss")
+    equity = col("StockholdersEquity")
+    debt = col("DebtCurrent").fillna(0) + col("LongTermDebt").fillna(0)
+    net_debt = debt - col("CashAndCashEquivalentsAtCarryingValue").fillna(0)
+    ebitda = col("EarningsBeforeInterestTaxesDepreciationAmortizationEBITDA").fillna(
+        operating_income + col("DepreciationDepletionAndAmortization"))
+    pretax_income = col(
+        "IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest")
+    tax_rate = (col("IncomeTaxExpenseBenefit") / pretax_income).clip(0, 1).fillna(0)
+    
+    metrics = df[["cik", "fiscal_year", "filing_date"] + (["sic"] if "sic" in df.columns else [])].copy()
+    
+    # Earlier fiscal years are looked up as filed by each row's date; undated rows see every filing
+    filed = df[["cik", "fiscal_year"]].assign(
+        date=pd.to_datetime(df["filing_date"], errors="coerce").fillna(pd.Timestamp.max))
+    
+    # Consecutive profitable years up to and including this one, over the last filing of each year
+    profitable = net_income > 0
+    latest = ~df.duplicated(subset=["cik", "fiscal_year"], keep="last")
+    years = df.loc[latest, ["cik", "fiscal_year"]].assign(profitable=profitable[latest])
+    breaks = ~years["profitable"] | years["cik"].ne(years["cik"].shift()) | years["fiscal_year"].diff().ne(1)
+    streaks = years.assign(
+        fiscal_year=years["fiscal_year"] + 1,
+        streak=years["profitable"].astype(int).groupby(breaks.cumsum()).cumsum()
+    )[["cik", "fiscal_year", "streak"]]
+    previous = df[["cik", "fiscal_year"]].merge(streaks, on=["cik", "fiscal_year"], how="left")["streak"]
+    streak = (profitable * (previous.fillna(0).to_numpy() + 1)).astype(int).to_numpy()
+    
+    # Rows filed before an earlier year was last amended walk back a year at a time instead
+    last_filed = filed.groupby(["cik", "fiscal_year"], sort=False)["date"].max().reset_index()
+    last_filed["before"] = last_filed.groupby("cik")["date"].cummax()
+    last_filed["fiscal_year"] += 1
+    earlier_filed = filed.merge(last_filed[["cik", "fiscal_year", "before"]], on=["cik", "fiscal_year"], how="left")
+    running = (profitable & (earlier_filed["before"] > filed["date"])).to_numpy()
+    if running.any():
+        profits = filed.assign(profitable=profitable.astype("float64"))
+        streak[running] = 1
+        years_back = 1
+        while running.any():
+            running[running] = _as_filed(filed[running], profits, "profitable", years_back) == 1
+            streak += running
+            years_back += 1
+    metrics["years_profitable"] = streak
+    
+    # EPS growth against the same company five fiscal years earlier
+    eps = col("EarningsPerShareBasic").to_numpy(dtype="float64")
+    eps_5y = _as_filed(filed, filed.assign(eps=eps), "eps", 5)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eps_cagr = (eps / eps_5y) ** (1 / 5) - 1
+    metrics["eps_cagr_5y"] = np.where((eps > 0) & (eps_5y > 0), eps_cagr, np.nan)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["debt_ebitda_ratio"] = (net_debt / ebitda).where(ebitda > 0, np.inf)
+        metrics["roe"] = (net_income / equity).where(equity > 0)
+        metrics["roic"] = (operating_income * (1 - tax_rate) / (debt + equity)).where(debt + equity > 0)
+        metrics["net_margin"] = (net_income / revenue).where(revenue > 0)
+        metrics["ebit_margin"] = (operating_income / revenue).where(revenue > 0)
+    
+    return metrics
+
+
+def apply_criteria(metrics: pd.DataFrame, criteria: Dict[str, float]) -> pd.Series:
+    """
+    Check every row against screening thresholds.
+    
+    Keys starting with "min_" are lower bounds and "max_" upper bounds on the
+    metric named in CRITERIA_METRICS. Missing metrics fail the criterion.
+    
+    Args:
+        metrics (pd.DataFrame): Rows of derived metrics
+        criteria (Dict[str, float]): Screening thresholds, e.g. screening.stocks
+    
+    Returns:
+        pd.Series: True for rows meeting all criteria
+    """
+    passed = pd.Series(True, index=metrics.index)
+    for key, threshold in criteria.items():
+        metric = CRITERIA_METRICS.get(key)
+        if metric is None:
+            logger.warning(f"Ignoring unknown screening criterion {key}")
+            continue
+        if metric not in metrics.columns:
+            passed &= False
+            continue
+        if key.startswith("max_"):
+            passed &= metrics[metric] <= threshold
+        else:
+            passed &= metrics[metric] >= threshold
+    return passed
+
+
+def latest_metrics(metrics: pd.DataFrame, as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Get each company's most recent derived metrics filed before a date.
+    
+    Args:
+        metrics (pd.DataFrame): Output of derive_metrics
+        as_of (Optional[pd.Timestamp]): Cut-off date (all filings if None)
+    
+    Returns:
+        pd.DataFrame: One row per cik
+    """
+    if as_of is not None:
+        metrics = metrics[metrics["filing_date"] < pd.Timestamp(as_of)]
+    latest = metrics.sort_values(["cik", "filing_date", "fiscal_year"])
+    return latest.drop_duplicates(subset=["cik"], keep="last").reset_index(drop=True)
+
+
+def screen_stocks(
+    fundamentals: pd.DataFrame,
+    securities: Union[pd.DataFrame, SecurityMaster],
+    performance: Optional[pd.DataFrame] = None,
+    criteria: Optional[Dict[str, float]] = None,
+    as_of: Optional[pd.Timestamp] = None,
+    reit_criteria: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Screen companies on their latest filings and price history.
+    
+    REITs, by the SIC code in their filing headers, are screened on their own
+    thresholds, since their payout rules depress earnings-based metrics.
+    
+    Args:
+        fundamentals (pd.DataFrame): Table produced by extract_fundamentals
+        securities (Union[pd.DataFrame, SecurityMaster]): Security master, or a stock list
+            with cik, ticker and ipo_date
+        performance (Optional[pd.DataFrame]): Output of analyze_performance, for Sharpe ratios
+        criteria (Optional[Dict[str, float]]): Thresholds (screening.stocks if None)
+        as_of (Optional[pd.Timestamp]): Screening date (today if None)
+        reit_criteria (Optional[Dict[str, float]]): Thresholds for REITs (screening.reits if
+            criteria is None too, otherwise criteria)
+    
+    Returns:
+        pd.DataFrame: Metrics of the companies that pass, one row per ticker
+    """
+    return screen_metrics(derive_metrics(fundamentals), securities, performance, criteria, as_of, reit_criteria)
+
+
+def screen_metrics(
+    metrics: pd.DataFrame,
+    securities: Union[pd.DataFrame, SecurityMaster],
+    performance: Optional[pd.DataFrame] = None,
+    criteria: Optional[Dict[str, float]] = None,
+    as_of: Optional[pd.Timestamp] = None,
+    reit_criteria: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Screen companies on metrics already derived from their filings.
+    
+    Callers that screen the same fundamentals repeatedly, with other criteria
+    or dates, derive the metrics once and call this instead of screen_stocks.
+    
+    Args:
+        metrics (pd.DataFrame): Output of derive_metrics
+        securities (Union[pd.DataFrame, SecurityMaster]): Security master, or a stock list
+            with cik, ticker and ipo_date
+        performance (Optional[pd.DataFrame]): Output of analyze_performance, for Sharpe ratios
+        criteria (Optional[Dict[str, float]]): Thresholds (screening.stocks if None)
+        as_of (Optional[pd.Timestamp]): Screening date (today if None)
+        reit_criteria (Optional[Dict[str, float]]): Thresholds for REITs (screening.reits if
+            criteria is None too, otherwise criteria)
+    
+    Returns:
+        pd.DataFrame: Metrics of the companies that pass, one row per ticker
+    """
+    if criteria is None:
+        criteria = config.get("screening.stocks", {})
+        if reit_criteria is None:
+            reit_criteria = config.get("screening.reits", None)
+    as_of = pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of)
+    
+    if isinstance(securities, SecurityMaster):
+        securities = securities.listings(as_of)
+    
+    latest = latest_metrics(metrics, as_of)
+    candidates = latest.merge(securities[["cik", "ticker", "ipo_date"]], on="cik", how="inner")
+    candidates = candidates[candidates["ticker"] != "Not Found"]
+    ipo_dates = pd.to_datetime(candidates["ipo_date"], errors="coerce")
+    candidates["years_since_ipo"] = (as_of - ipo_dates).dt.days / 365.25
+    
+    sharpe_column = (f"{SHARPE_WINDOW_YEARS}Y", "sharpe_ratio")
+    if performance is not None and sharpe_column in performance.columns:
+        candidates["sharpe_ratio"] = candidates["ticker"].map(performance[sharpe_column])
+    
+    passed = apply_criteria(candidates, criteria)
+    if reit_criteria and "sic" in candidates.columns:
+        reits = is_reit(candidates["sic"])
+        passed = passed.where(~reits, apply_criteria(candidates, reit_criteria))
+        logger.info(f"Screening {int(reits.sum())} REITs on the REIT criteria")
+    selected = candidates[passed]
+    logger.info(f"{len(selected)} of {len(candidates)} companies meet the screening criteria")
+    return selected.reset_index(drop=True)
\ No newline at end of file
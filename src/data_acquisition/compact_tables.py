@@ -0,0 +1,200 @@
+"""
+Compact typed tables for the Stock Selector project.
+"""
+import importlib.util
+import os
+import numpy as np
+import pandas as pd
+from typing import Optional
+from src.data_acquisition.filing_index import accession_ids, filing_accessions
+from src.utils.config import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/compact_tables.log")
+
+# pyarrow is optional: without it, tables are saved as .npz archives of typed columns
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+FILINGS_LIST_COLUMNS = ["CIK", "Company", "Form", "Date", "Accession"]
+
+
+def table_path(path: str) -> str:
+    """
+    Get the file a table is saved to, Parquet if pyarrow is installed and .npz otherwise.
+    
+    Args:
+        path (str): Path with or without extension
+    
+    Returns:
+        str: Path with the extension of the available format
+    """
+    return os.path.splitext(path)[0] + (".parquet" if HAS_PYARROW else ".npz")
+
+
+def save_table(table: pd.DataFrame, path: str) -> str:
+    """
+    Save a table with its column types.
+    
+    Categorical columns keep their codes and categories, and datetime
+    columns their datetime64 values, so loading needs no parsing.
+    
+    Args:
+        table (pd.DataFrame): Table with a default index
+        path (str): Path with or without extension
+    
+    Returns:
+        str: Path written, as given by table_path
+    """
+    path = table_path(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    
+    if HAS_PYARROW:
+        table.to_parquet(tmp_path, index=False)
+    else:
+        arrays = {"__columns__": np.array(table.columns, dtype=str)}
+        for column in table.columns:
+            values = table[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                arrays[f"{column}.codes"] = values.cat.codes.to_numpy()
+                arrays[f"{column}.categories"] = values.cat.categories.to_numpy(dtype=str)
+            elif values.dtype == object:
+                arrays[column] = values.to_numpy(dtype=str)
+            else:
+                arrays[column] = values.to_numpy()
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+    
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_table(path: str) -> pd.DataFrame:
+    """
+    Load a table saved by save_table.
+    
+    An .npz archive is read when no Parquet file is available, so tables saved
+    before pyarrow was installed still load.
+    
+    Args:
+        path (str): Path with or without extension
+    
+    Returns:
+        pd.DataFrame: Table with its saved column types
+    
+    Raises:
+        FileNotFoundError: If the table was never saved
+    """
+    path = table_path(path)
+    if path.endswith(".parquet") and os.path.exists(path):
+        return pd.read_parquet(path)
+    path = os.path.splitext(path)[0] + ".npz"
+    
+    with np.load(path, allow_pickle=False) as arrays:
+        columns = {}
+        for column in arrays["__columns__"]:
+            if f"{column}.codes" in arrays:
+                columns[column] = pd.Categorical.from_codes(
+                    arrays[f"{column}.codes"], arrays[f"{column}.categories"])
+            else:
+                columns[column] = arrays[column]
+    table = pd.DataFrame(columns)
+    for column in table.columns:
+        if table[column].dtype.kind == "U":
+            table[column] = table[column].astype(object)
+    return table
+
+
+def filings_list_path(path: Optional[str] = None) -> str:
+    """
+    Get the file the filings list is saved to.
+    
+    Args:
+        path (Optional[str]): Path with or without extension (storage.filings_list if None)
+    
+    Returns:
+        str: Path of the saved list; CSV paths are kept as they are
+    """
+    if path is None:
+        path = config.get("storage.filings_list", "data/filings_list.parquet")
+    return path if path.endswith(".csv") else table_path(path)
+
+
+def compact_filings_list(filings: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a filings list to the compact schema.
+    
+    The CIK is an int32, the company and form are categorical, the filing date
+    is a datetime64 and the accession number an int64. The archive path and
+    URL are not stored: both follow from the CIK and accession number and are
+    rebuilt by filing_urls.
+    
+    Args:
+        filings (pd.DataFrame): Filings list with CIK, Form, Date and Accession or URL (and Company)
+    
+    Returns:
+        pd.DataFrame: FILINGS_LIST_COLUMNS
+    """
+    company = filings["Company"] if "Company" in filings.columns else pd.Series("", index=filings.index)
+    return pd.DataFrame({
+        "CIK": pd.to_numeric(filings["CIK"]).astype("int32").to_numpy(),
+        "Company": pd.Categorical(company),
+        "Form": pd.Categorical(filings["Form"]),
+        "Date": pd.to_datetime(filings["Date"]).to_numpy(dtype="datetime64[ns]"),
+        "Accession": accession_ids(filing_accessions(filings)).to_numpy()
+    })
+
+
+def load_filings_list(path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load the filings list in the compact schema.
+    
+    CSV lists, as generated before the compact schema, are converted on load.
+    When no table has been saved yet, the CSV list of the same name, e.g. the
+    legacy data/filings_list.csv, is loaded instead.
+    
+    Args:
+        path (Optional[str]): Path of the list (storage.filings_list if None)
+    
+    Returns:
+        pd.DataFrame: FILINGS_LIST_COLUMNS
+    """
+    path = filings_list_path(path)
+    stem = os.path.splitext(path)[0]
+    legacy_path = f"{stem}.csv"
+    saved = path.endswith(".csv") or os.path.exists(path) or os.path.exists(f"{stem}.npz")
+    if not saved and os.path.exists(legacy_path):
+        logger.info(f"No filings table at {path}; loading the legacy list {legacy_path}")
+        path = legacy_path
+    if path.endswith(".csv"):
+        return compact_filings_list(pd.read_csv(path, dtype={"CIK": str}))
+    return load_table(path)
+
+
+def filing_url(base_url: str, cik: int, accession: str) -> str:
+    """
+    Rebuild the archive URL of one filing.
+    
+    Args:
+        base_url (str): EDGAR archive root, or "" for the path relative to it
+        cik (int): Company CIK
+        accession (str): Accession number
+    
+    Returns:
+        str: URL of the complete submission text file
+    """
+    return f"{base_url}edgar/data/{int(cik)}/{accession}.txt"
+
+
+def filing_urls(filings: pd.DataFrame, base_url: str = "") -> pd.Series:
+    """
+    Rebuild the archive URLs of a filings list.
+    
+    Args:
+        filings (pd.DataFrame): Compact filings list
+        base_url (str): EDGAR archive root, or "" for paths relative to it
+    
+    Returns:
+        pd.Series: URL per row
+    """
+    return base_url + "edgar/data/" + filings["CIK"].astype(str) + "/" + filing_accessions(filings) + ".txt"
\ No newline at end of file
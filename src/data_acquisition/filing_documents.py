@@ -0,0 +1,329 @@
+"""
+Document index of full-submission filings for the Stock Selector project.
+"""
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__, "logs/filing_documents.log")
+
+_HEADER_FIELD_REGEX = re.compile(rb"<(TYPE|SEQUENCE|FILENAME|DESCRIPTION)>([^\r\n<]*)")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    doc_type TEXT NOT NULL,
+    sequence TEXT,
+    filename TEXT,
+    description TEXT,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    PRIMARY KEY (path, position)
+);
+"""
+
+
+class FilingDocument:
+    """One <DOCUMENT> block of a full-submission filing."""
+    
+    __slots__ = ("doc_type", "sequence", "filename", "description", "start", "end")
+    
+    def __init__(
+        self,
+        doc_type: str,
+        sequence: Optional[str],
+        filename: Optional[str],
+        description: Optional[str],
+        start: int,
+        end: int
+    ):
+        """
+        Initialize the document.
+        
+        Args:
+            doc_type (str): Document type, e.g. 10-K, EX-21 or EX-101.INS
+            sequence (Optional[str]): Sequence number within the submission
+            filename (Optional[str]): Original file name
+            description (Optional[str]): Description given by the filer
+            start (int): Byte offset where the <TEXT> content begins
+            end (int): Byte offset where the <TEXT> content ends
+        """
+        self.doc_type = doc_type
+        self.sequence = sequence
+        self.filename = filename
+        self.description = description
+        self.start = start
+        self.end = end
+    
+    @property
+    def size(self) -> int:
+        """
+        Get the size of the document content.
+        
+        Returns:
+            int: Size in bytes
+        """
+        return self.end - self.start
+
+
+def scan_documents(data) -> List[FilingDocument]:
+    """
+    Find the <DOCUMENT> blocks of a full-submission filing.
+    
+    Only the markers and the few header lines of each block are examined,
+    so the scan runs at memory speed.
+    
+    Args:
+        data: Filing bytes or memory map
+    
+    Returns:
+        List[FilingDocument]: Documents in file order, empty if the file has no blocks
+    """
+    documents = []
+    position = 0
+    while True:
+        begin = data.find(b"<DOCUMENT>", position)
+        if begin < 0:
+            break
+        text = data.find(b"<TEXT>", begin)
+        if text < 0:
+            break
+        fields = {
+            name.decode(): value.strip().decode("utf-8", "replace")
+            for name, value in _HEADER_FIELD_REGEX.findall(data[begin:text])
+        }
+        start = text + len(b"<TEXT>")
+        end = data.find(b"</TEXT>", start)
+        if end < 0:
+            end = len(data)
+        documents.append(FilingDocument(
+            fields.get("TYPE", ""),
+            fields.get("SEQUENCE"),
+            fields.get("FILENAME"),
+            fields.get("DESCRIPTION"),
+            start,
+            end
+        ))
+        position = end
+    return documents
+
+
+def primary_document(documents: List[FilingDocument]) -> Optional[FilingDocument]:
+    """
+    Get the main document of a submission, e.g. the 10-K itself.
+    
+    Args:
+        documents (List[FilingDocument]): Documents of the submission
+    
+    Returns:
+        Optional[FilingDocument]: First document, or None if there are none
+    """
+    return documents[0] if documents else None
+
+
+def xbrl_instance(documents: List[FilingDocument]) -> Optional[FilingDocument]:
+    """
+    Get the XBRL instance of a submission.
+    
+    Instances are filed as EX-101.INS, or, for inline XBRL filings, included
+    by EDGAR as an XML document named after the HTML one (*_htm.xml).
+    
+    Args:
+        documents (List[FilingDocument]): Documents of the submission
+    
+    Returns:
+        Optional[FilingDocument]: Instance document, or None if there is none
+    """
+    for document in documents:
+        if document.doc_type.upper() == "EX-101.INS":
+            return document
+    for document in documents:
+        if (document.filename or "").lower().endswith("_htm.xml"):
+            return document
+    return None
+
+
+class DocumentIndex:
+    """
+    Byte ranges of the documents in full-submission filings, kept in SQLite.
+    
+    A submission holds the form itself, its exhibits, the XBRL files and
+    encoded graphics. Each file is scanned once, when downloaded or on first
+    use, and the type, file name and byte range of every document are
+    recorded with the file's size and modification time, so a file that
+    changed is scanned again. Readers then take just the block they need.
+    Each thread gets its own connection.
+    """
+    
+    def __init__(self, db_path: str = "data/edgar/document_index.db"):
+        """
+        Open the index, creating the schema if needed.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use.
+        
+        Returns:
+            sqlite3.Connection: Connection in WAL mode
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    def close(self) -> None:
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+    
+    def _store(self, path: str, stat: os.stat_result, documents: List[FilingDocument]) -> None:
+        """
+        Replace the recorded documents of a file.
+        
+        Args:
+            path (str): Normalized file path
+            stat (os.stat_result): Status of the indexed file
+            documents (List[FilingDocument]): Its documents
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM documents WHERE path = ?", (path,))
+            self.connection.executemany(
+                "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (path, position, document.doc_type, document.sequence, document.filename,
+                     document.description, document.start, document.end)
+                    for position, document in enumerate(documents)
+                ]
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, indexed_at) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, time.time())
+            )
+    
+    def _is_current(self, path: str) -> bool:
+        """
+        Check whether a file is indexed and unchanged since.
+        
+        Args:
+            path (str): Normalized file path
+        
+        Returns:
+            bool: True if the recorded size and modification time match the file
+        """
+        stat = os.stat(path)
+        recorded = self.connection.execute(
+            "SELECT size, mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+        return recorded == (stat.st_size, stat.st_mtime_ns)
+    
+    def add(self, file_path: str, content: Optional[bytes] = None) -> List[FilingDocument]:
+        """
+        Index a filing.
+        
+        Args:
+            file_path (str): Path to the filing
+            content (Optional[bytes]): Contents of the file if already in memory, e.g. just downloaded
+        
+        Returns:
+            List[FilingDocument]: Documents of the filing
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with metrics.timer("document_index_seconds"):
+            if content is not None:
+                documents = scan_documents(content)
+            elif stat.st_size == 0:
+                documents = []
+            else:
+                with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    documents = scan_documents(data)
+        self._store(path, stat, documents)
+        metrics.increment("documents_indexed_total", len(documents))
+        return documents
+    
+    def documents(self, file_path: str) -> List[FilingDocument]:
+        """
+        Get the documents of a filing, indexing it if it is new or has changed.
+        
+        Args:
+            file_path (str): Path to the filing
+        
+        Returns:
+            List[FilingDocument]: Documents in file order
+        """
+        path = os.path.abspath(file_path)
+        if not self._is_current(path):
+            return self.add(path)
+        rows = self.connection.execute(
+            """
+            SELECT doc_type, sequence, filename, description, start, end FROM documents
+            WHERE path = ? ORDER BY position
+            """,
+            (path,)
+        )
+        return [FilingDocument(*row) for row in rows]
+    
+    def index_files(self, file_paths: Iterable[str]) -> int:
+        """
+        Index every new or changed filing.
+        
+        Args:
+            file_paths (Iterable[str]): Paths to filings
+        
+        Returns:
+            int: Number of filings indexed
+        """
+        indexed = 0
+        for file_path in file_paths:
+            path = os.path.abspath(file_path)
+            if not self._is_current(path):
+                self.add(path)
+                indexed += 1
+        logger.info(f"Indexed documents of {indexed} filings")
+        return indexed
+
+
+def read_document(file_path: str, document: FilingDocument) -> bytes:
+    """
+    Read one document of a filing without reading the rest of the file.
+    
+    Args:
+        file_path (str): Path to the filing
+        document (FilingDocument): Document to read
+    
+    Returns:
+        bytes: Content of the document's <TEXT> block
+    """
+    with open(file_path, "rb") as f:
+        f.seek(document.start)
+        content = f.read(document.size)
+    metrics.increment("filing_bytes_read_total", len(content), scope="document")
+    return content
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+SEC filing header index for the Stock Selector project.
+"""
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from src.utils.config import config
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__, "logs/filing_headers.log")
+
+# Standard industrial classification of real estate investment trusts
+REIT_SIC_CODE = 6798
+
+# Header lines read and the index column each one fills
+HEADER_FIELDS = {
+    b"ACCESSION NUMBER": "accession_number",
+    b"CONFORMED SUBMISSION TYPE": "form",
+    b"CONFORMED PERIOD OF REPORT": "period_of_report",
+    b"FILED AS OF DATE": "filed_date",
+    b"CENTRAL INDEX KEY": "cik",
+    b"STANDARD INDUSTRIAL CLASSIFICATION": "sic",
+    b"FISCAL YEAR END": "fiscal_year_end"
+}
+
+HEADER_COLUMNS = [
+    "path", "cik", "accession_number", "form", "period_of_report", "filed_date",
+    "fiscal_year_end", "sic", "size", "mtime_ns"
+]
+
+_HEADER_LINE_REGEX = re.compile(
+    rb"^[ \t]*(" + b"|".join(re.escape(name) for name in HEADER_FIELDS) + rb"):[ \t]*(.*?)[ \t\r]*$",
+    re.M
+)
+_SIC_REGEX = re.compile(r"\[(\d{4})\]")
+_HEADER_END_MARKERS = (b"</SEC-HEADER>", b"</IMS-HEADER>", b"<DOCUMENT>")
+
+_HEADER_CHUNK_BYTES = 16 * 1024
+_HEADER_MAX_BYTES = 1024 * 1024
+
+
+def read_header(file_path: str) -> Dict[str, object]:
+    """
+    Read the SEC header at the top of a full-submission filing.
+    
+    Only the header is read, in small chunks, never the documents after it.
+    For each field the first value is kept, which is the filer's when a
+    filing lists several companies.
+    
+    Args:
+        file_path (str): Path to the filing
+    
+    Returns:
+        Dict[str, object]: Header values by column; sic as an integer (0 if unknown), dates as strings
+    """
+    header = b""
+    with open(file_path, "rb") as f:
+        while len(header) < _HEADER_MAX_BYTES:
+            chunk = f.read(_HEADER_CHUNK_BYTES)
+            header += chunk
+            if not chunk or any(marker in header for marker in _HEADER_END_MARKERS):
+                break
+    metrics.increment("filing_bytes_read_total", len(header), scope="header")
+    
+    values: Dict[str, object] = {}
+    for name, value in _HEADER_LINE_REGEX.findall(header):
+        column = HEADER_FIELDS[name]
+        if column not in values:
+            values[column] = value.decode("utf-8", "replace")
+    sic = _SIC_REGEX.search(values.get("sic", ""))
+    values["sic"] = int(sic.group(1)) if sic else 0
+    return values
+
+
+def _header_row(file_path: str, previous: Dict[str, dict]) -> Optional[Dict[str, object]]:
+    """
+    Get the index row of a filing, reusing the previous one if the file is unchanged.
+    
+    Args:
+        file_path (str): Absolute path to the filing
+        previous (Dict[str, dict]): Rows of the previous index by path
+    
+    Returns:
+        Optional[Dict[str, object]]: Row with HEADER_COLUMNS, or None if the file cannot be read
+    """
+    try:
+        stat = os.stat(file_path)
+        row = previous.get(file_path)
+        if row is not None and row["size"] == stat.st_size and row["mtime_ns"] == stat.st_mtime_ns:
+            return row
+        row = read_header(file_path)
+    except OSError as e:
+        logger.error(f"Error reading header of {file_path}: {e}")
+        return None
+    row.update({"path": file_path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    return row
+
+
+def build_header_index(
+    file_paths: List[str],
+    max_workers: int = 8,
+    previous: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Read the headers of many filings in one parallel pass.
+    
+    Args:
+        file_paths (List[str]): Paths to filings
+        max_workers (int): Number of reader threads
+        previous (Optional[pd.DataFrame]): Earlier index whose rows are reused for unchanged files
+    
+    Returns:
+        pd.DataFrame: One row per filing with HEADER_COLUMNS; dates as datetime64, cik and sic as integers
+    """
+    reused = {}
+    if previous is not None and len(previous):
+        # Dates go back to the header's format, to be parsed with the new rows
+        previous = previous.assign(**{
+            column: previous[column].dt.strftime("%Y%m%d") for column in ("period_of_report", "filed_date")
+        })
+        reused = {row["path"]: row for row in previous.to_dict("records")}
+    
+    paths = [os.path.abspath(path) for path in file_paths]
+    with metrics.timer("header_index_seconds"):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            rows = [row for row in executor.map(lambda path: _header_row(path, reused), paths, chunksize=64)
+                    if row is not None]
+    
+    index = pd.DataFrame(rows).reindex(columns=HEADER_COLUMNS)
+    for column in ("period_of_report", "filed_date"):
+        index[column] = pd.to_datetime(index[column], format="%Y%m%d", errors="coerce")
+    for column in ("cik", "sic", "size", "mtime_ns"):
+        index[column] = pd.to_numeric(index[column], errors="coerce").fillna(0).astype("int64")
+    for column in ("accession_number", "form", "fiscal_year_end"):
+        index[column] = index[column].fillna("").astype(str)
+    return index
+
+
+def save_header_index(index: pd.DataFrame, directory: str) -> None:
+    """
+    Save the index as one .npy file per column.
+    
+    Args:
+        index (pd.DataFrame): Output of build_header_index
+        directory (str): Directory to write to
+    """
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    
+    for column in HEADER_COLUMNS:
+        values = index[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        elif column in ("period_of_report", "filed_date"):
+            values = values.astype("datetime64[D]")
+        path = os.path.join(directory, f"{column}.npy")
+        with open(f"{path}.tmp", "wb") as f:
+            np.save(f, values)
+        os.replace(f"{path}.tmp", path)
+    
+    # Metadata is written last so an interrupted save is never loaded
+    with open(meta_path, "w") as f:
+        json.dump({"columns": HEADER_COLUMNS, "rows": len(index)}, f)
+
+
+def load_header_index(directory: str) -> Optional[pd.DataFrame]:
+    """
+    Load an index saved by save_header_index.
+    
+    Args:
+        directory (str): Directory written by save_header_index
+    
+    Returns:
+        Optional[pd.DataFrame]: Index, or None if nothing was saved
+    """
+    meta_path = os.path.join(directory, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    index = pd.DataFrame({
+        column: np.load(os.path.join(directory, f"{column}.npy")) for column in meta["columns"]
+    })
+    for column in ("period_of_report", "filed_date"):
+        index[column] = index[column].astype("datetime64[ns]")
+    return index
+
+
+def index_filing_headers(
+    filings_dir: Optional[str] = None,
+    index_dir: Optional[str] = None,
+    max_workers: int = 8
+) -> pd.DataFrame:
+    """
+    Update the header index of every downloaded filing.
+    
+    Files indexed before and unchanged since are not read again.
+    
+    Args:
+        filings_dir (Optional[str]): Directory containing downloaded filings
+        index_dir (Optional[str]): Directory of the saved index (storage.header_index if None)
+        max_workers (int): Number of reader threads
+    
+    Returns:
+        pd.DataFrame: Header index of the filings
+    """
+    if filings_dir is None:
+        filings_dir = os.path.join(config.get("storage.filings_dir", "data/edgar"), "filings")
+    if index_dir is None:
+        index_dir = config.get("storage.header_index", "data/edgar/header_index")
+    
+    file_paths = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(filings_dir)
+        for name in names
+        if name.endswith(".txt")
+    ]
+    previous = load_header_index(index_dir)
+    index = build_header_index(file_paths, max_workers, previous)
+    save_header_index(index, index_dir)
+    logger.info(f"Indexed headers of {len(index)} filings in {filings_dir}")
+    return index
+
+
+def fiscal_years(index: pd.DataFrame) -> pd.Series:
+    """
+    Get the fiscal year each filing reports on.
+    
+    The year of the period of report is used. Without one, the fiscal year is
+    the one that ended last before the filing date, according to the
+    company's fiscal year end (MMDD).
+    
+    Args:
+        index (pd.DataFrame): Header index
+    
+    Returns:
+        pd.Series: Fiscal year per row, missing where neither can be determined
+    """
+    years = index["period_of_report"].dt.year.astype("Int64")
+    filed = index["filed_date"]
+    fye = pd.to_numeric(index["fiscal_year_end"].str.strip(), errors="coerce")
+    month_day = filed.dt.month * 100 + filed.dt.day
+    inferred = (filed.dt.year - (month_day <= fye).astype(int)).where(fye.notna() & filed.notna())
+    return years.fillna(inferred.astype("Int64"))
+
+
+def is_reit(sic: pd.Series) -> pd.Series:
+    """
+    Check which standard industrial classifications are real estate investment trusts.
+    
+    Args:
+        sic (pd.Series): SIC codes
+    
+    Returns:
+        pd.Series: True for REITs
+    """
+    return pd.to_numeric(sic, errors="coerce") == REIT_SIC_CODE
\ No newline at end of file
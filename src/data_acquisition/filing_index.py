@@ -0,0 +1,192 @@
+"""
+Accession-keyed filing index for the Stock Selector project.
+"""
+import os
+import pandas as pd
+from typing import Dict, Optional
+from src.data_acquisition.filing_headers import fiscal_years
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/filing_index.log")
+
+# Annual report forms kept in the filings list; amendments end in /A
+ANNUAL_FORMS = ["10-K", "10-K/A"]
+
+INDEX_COLUMNS = [
+    "accession_number", "cik", "form", "filing_date", "fiscal_year", "path", "amends", "rank",
+    "authoritative"
+]
+
+
+def accession_number(url: str) -> str:
+    """
+    Get the accession number of a filing from its EDGAR archive URL or path.
+    
+    Args:
+        url (str): URL or path ending in <accession number>.txt
+    
+    Returns:
+        str: Accession number, e.g. 0000320193-23-000106
+    """
+    return os.path.splitext(url.rstrip("/").rsplit("/", 1)[-1])[0]
+
+
+def accession_ids(accessions: pd.Series) -> pd.Series:
+    """
+    Pack accession numbers into integers.
+    
+    The 18 digits of an accession number fit in an int64, which takes a
+    fraction of the memory of the formatted string.
+    
+    Args:
+        accessions (pd.Series): Accession numbers, e.g. 0000320193-23-000106
+    
+    Returns:
+        pd.Series: int64 accession IDs
+    """
+    return accessions.astype(str).str.replace("-", "", regex=False).astype("int64")
+
+
+def format_accession(accession_id: int) -> str:
+    """
+    Format an accession ID as an accession number.
+    
+    Args:
+        accession_id (int): Output of accession_ids
+    
+    Returns:
+        str: Accession number, e.g. 0000320193-23-000106
+    """
+    digits = f"{int(accession_id):018d}"
+    return f"{digits[:10]}-{digits[10:12]}-{digits[12:]}"
+
+
+def is_amendment(form: str) -> bool:
+    """
+    Check whether a form type is an amendment.
+    
+    Args:
+        form (str): Form type, e.g. 10-K or 10-K/A
+    
+    Returns:
+        bool: True for amendments
+    """
+    return form.upper().endswith("/A")
+
+
+def filing_path(filings_dir: str, cik, form: str, date: str, accession: Optional[str] = None) -> str:
+    """
+    Get the path a filing is downloaded to.
+    
+    The accession number makes the name unique when a company files twice
+    on the same date; without one, the legacy {form}_{date}.txt name is used.
+    
+    Args:
+        filings_dir (str): Directory containing downloaded filings
+        cik: Company CIK
+        form (str): Form type
+        date (str): Filing date (YYYY-MM-DD)
+        accession (Optional[str]): Accession number
+    
+    Returns:
+        str: Path under filings_dir/<cik>/<year>/
+    """
+    name = f"{form.replace('/', '-')}_{date}_{accession}" if accession else f"{form}_{date}"
+    return f"{filings_dir}/{cik}/{date[:4]}/{name}.txt"
+
+
+def filing_accessions(filings: pd.DataFrame) -> pd.Series:
+    """
+    Get the accession numbers of a filings list.
+    
+    Compact lists hold them as accession IDs, and CSV lists generated before
+    the Accession column existed derive them from the URLs.
+    
+    Args:
+        filings (pd.DataFrame): Filings list
+    
+    Returns:
+        pd.Series: Accession number per row
+    """
+    if "Accession" in filings.columns:
+        if pd.api.types.is_integer_dtype(filings["Accession"]):
+            digits = filings["Accession"].astype(str).str.zfill(18)
+            return digits.str[:10] + "-" + digits.str[10:12] + "-" + digits.str[12:]
+        return filings["Accession"].astype(str)
+    return filings["URL"].map(accession_number)
+
+
+def build_filing_index(
+    filings: pd.DataFrame,
+    filings_dir: str,
+    headers: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Index the annual reports of a filings list by accession number.
+    
+    Filings are grouped by company and fiscal period, the period coming from
+    the header index when the filing was downloaded and from the filing date
+    otherwise. Each amendment is linked to the latest original filed on or
+    before it for the same period. Within a period, filings are ranked from
+    the latest filed, and the latest is marked authoritative, as its facts
+    supersede those of the filings before it.
+    
+    Args:
+        filings (pd.DataFrame): Filings list with CIK, Form, Date and Accession or URL
+        filings_dir (str): Directory containing downloaded filings
+        headers (Optional[pd.DataFrame]): Header index of the downloaded filings
+    
+    Returns:
+        pd.DataFrame: INDEX_COLUMNS, one row per accession number, ordered by cik,
+            fiscal_year and rank; amends is empty for originals
+    """
+    filings = filings[filings["Form"].isin(ANNUAL_FORMS)]
+    dates = pd.to_datetime(filings["Date"])
+    index = pd.DataFrame({
+        "accession_number": filing_accessions(filings).to_numpy(),
+        "cik": filings["CIK"].astype("int64").to_numpy(),
+        "form": filings["Form"].astype(str).to_numpy(),
+        "filing_date": dates.to_numpy()
+    })
+    index["path"] = [
+        filing_path(filings_dir, cik, form, date, accession)
+        for cik, form, date, accession in zip(
+            index["cik"], index["form"], dates.dt.strftime("%Y-%m-%d"), index["accession_number"])
+    ]
+    index = index.drop_duplicates(subset=["accession_number"], keep="last")
+    
+    # Step 1: Fiscal period from the header index, else the year filed
+    header_years: Dict[str, object] = {}
+    if headers is not None and len(headers):
+        header_years = dict(zip(headers["path"], fiscal_years(headers)))
+    years = pd.Series(
+        [header_years.get(os.path.abspath(path)) for path in index["path"]], index=index.index, dtype="Int64")
+    index["fiscal_year"] = years.fillna(index["filing_date"].dt.year.astype("Int64")).astype("int64")
+    
+    # Step 2: Link each amendment to the latest original of its period
+    amendment = index["form"].map(is_amendment)
+    originals = index.loc[~amendment, ["cik", "fiscal_year", "filing_date", "accession_number"]]
+    amendments = index.loc[amendment, ["cik", "fiscal_year", "filing_date", "accession_number"]]
+    links = pd.merge_asof(
+        amendments.sort_values("filing_date"),
+        originals.sort_values("filing_date").rename(columns={"accession_number": "amends"}),
+        on="filing_date",
+        by=["cik", "fiscal_year"],
+        direction="backward"
+    )
+    index["amends"] = index["accession_number"].map(
+        dict(zip(links["accession_number"], links["amends"]))).fillna("")
+    
+    # Step 3: Rank each period's filings from the latest filed
+    index = index.sort_values(
+        ["cik", "fiscal_year", "filing_date", "accession_number"],
+        ascending=[True, True, False, False]
+    )
+    index["rank"] = index.groupby(["cik", "fiscal_year"]).cumcount()
+    index["authoritative"] = index["rank"] == 0
+    
+    logger.info(
+        f"Indexed {len(index)} filings: {int(amendment.sum())} amendments, "
+        f"{int(index['authoritative'].sum())} fiscal periods"
+    )
+    return index.reindex(columns=INDEX_COLUMNS).reset_index(drop=True)
\ No newline at end of file
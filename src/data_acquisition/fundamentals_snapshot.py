@@ -0,0 +1,305 @@
+"""
+Fundamentals snapshot service for the Stock Selector project.
+"""
+import json
+import os
+import sqlite3
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional
+from src.utils.config import config
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__, "logs/fundamentals_snapshot.log")
+
+# Snapshot fields by group; each group is cached with its own time to live
+FIELD_GROUPS = {
+    "profile": ["name", "sector"],
+    "ratios": ["market_cap", "pe_ratio", "dividend_yield"]
+}
+
+SNAPSHOT_COLUMNS = ["ticker"] + [field for fields in FIELD_GROUPS.values() for field in fields]
+
+# Failed and empty fetches are cached as the "missing" group, for an hour
+MISSING_GROUP = "missing"
+
+DEFAULT_TTL_DAYS = {"profile": 30, "ratios": 1, MISSING_GROUP: 1 / 24}
+
+# yfinance info keys of each snapshot field
+YFINANCE_FIELDS = {
+    "name": "longName",
+    "sector": "sector",
+    "market_cap": "marketCap",
+    "pe_ratio": "trailingPE",
+    "dividend_yield": "dividendYield"
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    ticker TEXT NOT NULL,
+    field_group TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (ticker, field_group)
+);
+"""
+
+
+class YFinanceProvider:
+    """Fetches snapshot fields from Yahoo Finance ticker info."""
+    
+    def fetch(self, ticker: str) -> Dict[str, Any]:
+        """
+        Fetch the snapshot fields of a ticker.
+        
+        Args:
+            ticker (str): Ticker symbol
+        
+        Returns:
+            Dict[str, Any]: Snapshot fields, None where Yahoo has no value
+        """
+        import yfinance as yf
+        
+        with metrics.timer("http_request_seconds", source="yfinance_info"):
+            info = yf.Ticker(ticker).info
+        return {field: info.get(key) for field, key in YFINANCE_FIELDS.items()}
+
+
+class OfflineProvider:
+    """Serves snapshot fields from memory, for tests and runs without network access."""
+    
+    def __init__(self, records: Dict[str, Dict[str, Any]]):
+        """
+        Initialize the provider.
+        
+        Args:
+            records (Dict[str, Dict[str, Any]]): Snapshot fields by ticker
+        """
+        self.records = records
+        self.calls = 0
+    
+    @classmethod
+    def from_csv(cls, file_path: str) -> "OfflineProvider":
+        """
+        Load the records from a CSV file with SNAPSHOT_COLUMNS.
+        
+        Args:
+            file_path (str): Path to the CSV file
+        
+        Returns:
+            OfflineProvider: Provider over the file's rows
+        """
+        frame = pd.read_csv(file_path, dtype={"ticker": str})
+        frame = frame.astype(object).where(frame.notna(), None)
+        return cls(frame.set_index("ticker").to_dict("index"))
+    
+    def fetch(self, ticker: str) -> Dict[str, Any]:
+        """
+        Look up the snapshot fields of a ticker.
+        
+        Args:
+            ticker (str): Ticker symbol
+        
+        Returns:
+            Dict[str, Any]: Snapshot fields
+        
+        Raises:
+            KeyError: If the ticker has no record
+        """
+        self.calls += 1
+        record = self.records[ticker]
+        return {field: record.get(field) for field in SNAPSHOT_COLUMNS[1:]}
+
+
+class FundamentalsSnapshotService:
+    """
+    Fetches company snapshots concurrently behind a persistent TTL cache.
+    
+    Name and sector rarely change and are kept for a month, while price-based
+    ratios expire after a day. Tickers whose fetch failed or returned no
+    fields are remembered for a short while, so they are not requested again
+    on every call. Only tickers with an expired group are fetched, by a
+    bounded thread pool; the cache lives in SQLite and is only touched from
+    the calling thread.
+    """
+    
+    def __init__(
+        self,
+        provider=None,
+        cache_file: str = "data/fundamentals_snapshot.db",
+        max_workers: int = 8,
+        ttl_days: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the service.
+        
+        Args:
+            provider: Object with a fetch(ticker) method (YFinanceProvider if None)
+            cache_file (str): Path to the SQLite cache
+            max_workers (int): Maximum number of concurrent fetches
+            ttl_days (Optional[Dict[str, float]]): Time to live in days per field group
+        """
+        self.provider = provider if provider is not None else YFinanceProvider()
+        self.max_workers = max_workers
+        self.ttl_seconds = {
+            group: days * 86400 for group, days in {**DEFAULT_TTL_DAYS, **(ttl_days or {})}.items()
+        }
+        os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(cache_file, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+    
+    def _cached(self, tickers: List[str], now: float) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Load the unexpired cached groups of tickers, MISSING_GROUP included.
+        
+        Args:
+            tickers (List[str]): Ticker symbols
+            now (float): Current time as a Unix timestamp
+        
+        Returns:
+            Dict[str, Dict[str, Dict[str, Any]]]: Fields by ticker and group
+        """
+        cached: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for start in range(0, len(tickers), 500):
+            batch = tickers[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT ticker, field_group, payload, fetched_at FROM snapshots "
+                f"WHERE ticker IN ({', '.join('?' * len(batch))})",
+                batch
+            )
+            for ticker, group, payload, fetched_at in rows:
+                if now - fetched_at < self.ttl_seconds.get(group, 0):
+                    cached.setdefault(ticker, {})[group] = json.loads(payload)
+        return cached
+    
+    def _store(self, results: Dict[str, Dict[str, Any]], missing: List[str], now: float) -> None:
+        """
+        Cache freshly fetched fields, one row per ticker and group.
+        
+        Tickers without fields get a MISSING_GROUP row instead, and those
+        with fields lose the one an earlier fetch may have left.
+        
+        Args:
+            results (Dict[str, Dict[str, Any]]): Fields by ticker
+            missing (List[str]): Tickers whose fetch failed or returned no fields
+            now (float): Fetch time as a Unix timestamp
+        """
+        rows = [
+            (ticker, group, json.dumps({field: fields.get(field) for field in group_fields}, default=str), now)
+            for ticker, fields in results.items()
+            for group, group_fields in FIELD_GROUPS.items()
+        ]
+        rows += [(ticker, MISSING_GROUP, "{}", now) for ticker in missing]
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM snapshots WHERE ticker = ? AND field_group = ?",
+                [(ticker, MISSING_GROUP) for ticker in results]
+            )
+            self.connection.executemany(
+                """
+                INSERT INTO snapshots (ticker, field_group, payload, fetched_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (ticker, field_group) DO UPDATE SET
+                    payload = excluded.payload, fetched_at = excluded.fetched_at
+                """,
+                rows
+            )
+    
+    def _fetch(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch one ticker, logging instead of raising on failure.
+        
+        Args:
+            ticker (str): Ticker symbol
+        
+        Returns:
+            Optional[Dict[str, Any]]: Snapshot fields, or None if the fetch failed
+        """
+        try:
+            return self.provider.fetch(ticker)
+        except Exception as e:
+            logger.error(f"Error fetching snapshot for {ticker}: {e}")
+            return None
+    
+    def snapshot(self, tickers: Iterable[str]) -> pd.DataFrame:
+        """
+        Get the snapshot of every ticker, fetching only expired or uncached ones.
+        
+        Args:
+            tickers (Iterable[str]): Ticker symbols; duplicates are returned once
+        
+        Returns:
+            pd.DataFrame: SNAPSHOT_COLUMNS, one row per ticker in input order, NaN where unavailable
+        """
+        tickers = list(dict.fromkeys(tickers))
+        now = time.time()
+        
+        # Step 1: Serve what the cache still holds
+        cached = self._cached(tickers, now)
+        stale = [
+            ticker for ticker in tickers
+            if MISSING_GROUP not in cached.get(ticker, {}) and len(cached.get(ticker, {})) < len(FIELD_GROUPS)
+        ]
+        metrics.increment("snapshot_cache_total", len(tickers) - len(stale), result="hit")
+        metrics.increment("snapshot_cache_total", len(stale), result="miss")
+        
+        # Step 2: Fetch the rest concurrently and cache it from this thread
+        fetched: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        if stale:
+            logger.info(f"Fetching snapshots for {len(stale)} of {len(tickers)} tickers")
+            stage = metrics.current_stage()
+            
+            def fetch(tkr):
+                with metrics.stage(stage, timed=False):
+                    return self._fetch(tkr)
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(fetch, ticker): ticker for ticker in stale}
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result is None or all(value is None for value in result.values()):
+                        missing.append(futures[future])
+                    else:
+                        fetched[futures[future]] = result
+            self._store(fetched, missing, time.time())
+        
+        # Step 3: Combine cached groups and fetched fields
+        rows = []
+        for ticker in tickers:
+            row = {"ticker": ticker}
+            for fields in cached.get(ticker, {}).values():
+                row.update(fields)
+            row.update(fetched.get(ticker, {}))
+            rows.append(row)
+        return pd.DataFrame(rows).reindex(columns=SNAPSHOT_COLUMNS)
+    
+    def close(self) -> None:
+        """Close the cache."""
+        self.connection.close()
+
+
+def fetch_snapshots(tickers: Iterable[str], provider=None) -> pd.DataFrame:
+    """
+    Get company snapshots using the configured cache, pool size and times to live.
+    
+    Args:
+        tickers (Iterable[str]): Ticker symbols
+        provider: Object with a fetch(ticker) method (YFinanceProvider if None)
+    
+    Returns:
+        pd.DataFrame: SNAPSHOT_COLUMNS, one row per ticker
+    """
+    service = FundamentalsSnapshotService(
+        provider,
+        cache_file=config.get("snapshot.cache_file", "data/fundamentals_snapshot.db"),
+        max_workers=config.get("snapshot.max_workers", 8),
+        ttl_days=config.get("snapshot.ttl_days", DEFAULT_TTL_DAYS)
+    )
+    try:
+        return service.snapshot(tickers)
+    finally:
+        service.close()
\ No newline at end of file
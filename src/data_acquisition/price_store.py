@@ -0,0 +1,644 @@
+"""
+Daily stock price storage for the Stock Selector project.
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Union
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__, "logs/price_store.log")
+
+INDEX_FILE = "_index.csv"
+INDEX_COLUMNS = ["ticker", "first_date", "last_date", "rows"]
+RETURN_INDEX_DIR = "_returns"
+TRADING_DAYS_PER_YEAR = 252
+
+# A history ending less than this many days before the newest one was fetched earlier, not ended
+ENDED_AFTER_DAYS = 10
+
+
+class PriceStore:
+    """Stores daily price histories as per-ticker CSV files with a summary index."""
+    
+    def __init__(self, root: str = "data/daily_stock_prices"):
+        """
+        Initialize the price store.
+        
+        Args:
+            root (str): Directory holding one CSV file per ticker
+        """
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self._index: Optional[Dict[str, Dict]] = None
+        
+        os.makedirs(root, exist_ok=True)
+    
+    def _price_path(self, ticker: str) -> str:
+        """
+        Get the price file path for a ticker.
+        
+        Args:
+            ticker (str): Ticker symbol
+        
+        Returns:
+            str: Price file path
+        """
+        return os.path.join(self.root, f"{ticker}.csv")
+    
+    @property
+    def index(self) -> Dict[str, Dict]:
+        """
+        Get the store index, loading or rebuilding it on first access.
+        
+        Returns:
+            Dict[str, Dict]: Mapping of ticker to first_date, last_date and rows
+        """
+        if self._index is None:
+            if os.path.exists(self.index_path):
+                index_df = pd.read_csv(self.index_path, dtype={"ticker": str})
+                self._index = index_df.set_index("ticker").to_dict("index")
+            else:
+                self._index = self._rebuild_index()
+        return self._index
+    
+    def _rebuild_index(self) -> Dict[str, Dict]:
+        """
+        Rebuild the index from existing price files.
+        
+        Only the first data row and the last line of each file are parsed,
+        so rebuilding does not parse whole histories.
+        
+        Returns:
+            Dict[str, Dict]: Mapping of ticker to first_date, last_date and rows
+        """
+        index = {}
+        for file_name in os.listdir(self.root):
+            ticker, ext = os.path.splitext(file_name)
+            if ext != ".csv" or file_name == INDEX_FILE:
+                continue
+            entry = self._scan_price_file(os.path.join(self.root, file_name))
+            if entry is not None:
+                index[ticker] = entry
+        
+        if index:
+            logger.info(f"Rebuilt price index for {len(index)} tickers")
+            self._index = index
+            self.save_index()
+        return index
+    
+    @staticmethod
+    def _scan_price_file(path: str, block_size: int = 1 << 20) -> Optional[Dict]:
+        """
+        Read the date range and row count of a price file without parsing it.
+        
+        The first data row is read from the start of the file and the last one
+        from a block at its end; the rows are counted by scanning the bytes
+        for line breaks block by block, without splitting the lines.
+        
+        Args:
+            path (str): Path to the price CSV file
+            block_size (int): Bytes read at a time
+        
+        Returns:
+            Optional[Dict]: Index entry or None if the file has no data rows
+        """
+        with open(path, 'rb') as f:
+            f.readline()  # Header
+            first_line = f.readline().strip()
+            if not first_line:
+                return None
+            
+            # Count the line breaks, adding one for a last line without a trailing break
+            f.seek(0)
+            breaks = 0
+            last_byte = b""
+            for block in iter(lambda: f.read(block_size), b""):
+                breaks += block.count(b"\n")
+                last_byte = block[-1:]
+            lines = breaks + (last_byte != b"\n")
+            
+            # The last line lies in the tail, grown until it holds a complete line
+            size = f.seek(0, os.SEEK_END)
+            tail_size = 4096
+            while True:
+                f.seek(max(size - tail_size, 0))
+                tail = f.read().rstrip()
+                if b"\n" in tail or tail_size >= size:
+                    break
+                tail_size *= 2
+            last_line = tail.rsplit(b"\n", 1)[-1]
+        
+        first_date = first_line.split(b",", 1)[0].decode()
+        last_date = last_line.split(b",", 1)[0].decode()
+        return {"first_date": first_date, "last_date": last_date, "rows": lines - 1}
+    
+    def refresh_index(self, tickers: List[str]) -> None:
+        """
+        Add index entries for price files written after the index was last saved.
+        
+        Args:
+            tickers (List[str]): Tickers whose files should be scanned
+        """
+        index = self.index
+        for ticker in tickers:
+            path = self._price_path(ticker)
+            entry = self._scan_price_file(path) if os.path.exists(path) else None
+            if entry is not None:
+                index[ticker] = entry
+    
+    def save_index(self) -> None:
+        """Persist the index atomically next to the price files."""
+        index_df = pd.DataFrame.from_dict(self.index, orient="index")
+        index_df = index_df.rename_axis("ticker").reset_index()
+        index_df = index_df.reindex(columns=INDEX_COLUMNS)
+        tmp_path = f"{self.index_path}.tmp"
+        index_df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.index_path)
+    
+    def tickers(self) -> List[str]:
+        """
+        Get the tickers that have stored price histories.
+        
+        Returns:
+            List[str]: Stored tickers
+        """
+        return list(self.index)
+    
+    def written_before(self, date: str) -> List[str]:
+        """
+        Get the stored tickers whose price files were last written before a date.
+        
+        Args:
+            date (str): Date in YYYY-MM-DD format
+        
+        Returns:
+            List[str]: Tickers with older price files
+        """
+        cutoff = pd.Timestamp(date).timestamp()
+        return [
+            ticker for ticker in self.index
+            if os.path.exists(self._price_path(ticker)) and os.path.getmtime(self._price_path(ticker)) < cutoff
+        ]
+    
+    def write(self, ticker: str, hist: pd.DataFrame) -> None:
+        """
+        Store a price history and record its first and last trading dates.
+        
+        The index is updated in memory; call save_index to persist it.
+        
+        Args:
+            ticker (str): Ticker symbol
+            hist (pd.DataFrame): History as returned by yfinance (Date index or column)
+        """
+        index = self.index
+        data = hist.reset_index() if "Date" not in hist.columns else hist.copy()
+        if not pd.api.types.is_string_dtype(data["Date"]):
+            data["Date"] = pd.to_datetime(data["Date"]).dt.strftime('%Y-%m-%d')
+        with metrics.timer("file_write_seconds", kind="prices"):
+            data.to_csv(self._price_path(ticker), index=False)
+        
+        index[ticker] = {
+            "first_date": data["Date"].iloc[0],
+            "last_date": data["Date"].iloc[-1],
+            "rows": len(data)
+        }
+    
+    def load(self, ticker: str) -> pd.DataFrame:
+        """
+        Load the stored price history for a ticker.
+        
+        Args:
+            ticker (str): Ticker symbol
+        
+        Returns:
+            pd.DataFrame: Price history indexed by date
+        """
+        return pd.read_csv(self._price_path(ticker), index_col="Date", parse_dates=["Date"])
+    
+    def first_trade_dates(self) -> pd.DataFrame:
+        """
+        Get the first trading date of every stored ticker.
+        
+        Returns:
+            pd.DataFrame: Columns ticker and first_date
+        """
+        return pd.DataFrame({
+            "ticker": list(self.index),
+            "first_date": [entry["first_date"] for entry in self.index.values()]
+        })
+    
+    def price_matrix(
+        self,
+        tickers: Optional[List[str]] = None,
+        column: str = "Close"
+    ) -> pd.DataFrame:
+        """
+        Load one price column for many tickers as a date-by-ticker matrix.
+        
+        Args:
+            tickers (Optional[List[str]]): Tickers to load (all stored tickers if None)
+            column (str): Price column to load
+        
+        Returns:
+            pd.DataFrame: Float prices indexed by date with one column per ticker
+        """
+        if tickers is None:
+            tickers = self.tickers()
+        
+        series = {}
+        for ticker in tickers:
+            if ticker not in self.index:
+                continue
+            series[ticker] = pd.read_csv(
+                self._price_path(ticker),
+                usecols=["Date", column],
+                index_col="Date",
+                parse_dates=["Date"]
+            )[column]
+        
+        if not series:
+            return pd.DataFrame(dtype="float64")
+        return pd.concat(series, axis=1).sort_index().astype("float64")
+    
+    def return_index(self, benchmark: Optional[str] = None) -> "ReturnIndex":
+        """
+        Get the cumulative return arrays for all stored tickers.
+        
+        The arrays are saved under the store and memory-mapped on later calls;
+        they are rebuilt whenever the price index has changed since they were
+        written or a different benchmark is requested.
+        
+        Args:
+            benchmark (Optional[str]): Ticker used for beta cross-products
+        
+        Returns:
+            ReturnIndex: Cumulative return arrays
+        """
+        directory = os.path.join(self.root, RETURN_INDEX_DIR)
+        signature = self._index_signature()
+        cached = ReturnIndex.load(directory)
+        if cached is not None and cached.signature == signature and cached.benchmark == benchmark:
+            return cached
+        
+        logger.info(f"Building return index for {len(self.index)} tickers")
+        return_index = ReturnIndex.from_prices(self.price_matrix(), benchmark)
+        return_index.signature = signature
+        return_index.save(directory)
+        return return_index
+    
+    def _index_signature(self) -> str:
+        """
+        Identify the current state of the price index.
+        
+        Returns:
+            str: Modification time and size of the index file
+        """
+        if not os.path.exists(self.index_path):
+            self.save_index()
+        stat = os.stat(self.index_path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _forward_fill(values: np.ndarray) -> None:
+    """
+    Forward-fill missing prices in place, row by row.
+    
+    Leading gaps stay NaN. Working on whole rows keeps memory access
+    contiguous, which is much faster than filling along axis 0.
+    
+    Args:
+        values (np.ndarray): Prices, one row per date and one column per ticker
+    """
+    for i in range(1, len(values)):
+        np.copyto(values[i], values[i - 1], where=np.isnan(values[i]))
+
+
+def _cumulative_sum(values: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sum along axis 0 in place, row by row for contiguous memory access.
+    
+    Args:
+        values (np.ndarray): Values, one row per date and one column per ticker
+    
+    Returns:
+        np.ndarray: The same array holding running totals
+    """
+    for i in range(1, len(values)):
+        np.add(values[i - 1], values[i], out=values[i])
+    return values
+
+
+class ReturnIndex:
+    """
+    Prefix sums of daily returns for constant-time window statistics.
+    
+    Row t of each cumulative array holds the total from the first date up to
+    trading day t, so the return, volatility, Sharpe ratio or beta of any
+    window (start, end] comes from the difference of two rows.
+    """
+    
+    ARRAYS = ["log_prices", "cum_returns", "cum_squares", "cum_downside", "cum_cross"]
+    
+    def __init__(
+        self,
+        dates: pd.DatetimeIndex,
+        tickers: Sequence[str],
+        arrays: Dict[str, np.ndarray],
+        first_pos: np.ndarray,
+        last_pos: np.ndarray,
+        benchmark: Optional[str] = None,
+        signature: Optional[str] = None,
+        ended_after_days: int = ENDED_AFTER_DAYS
+    ):
+        """
+        Initialize the return index from precomputed arrays.
+        
+        Histories are not all fetched on the same day, so a ticker only counts
+        as ended when its last price is more than ended_after_days older than
+        the newest date; a more recent history is carried forward to the end.
+        
+        Args:
+            dates (pd.DatetimeIndex): Trading dates, one per row
+            tickers (Sequence[str]): Tickers, one per column
+            arrays (Dict[str, np.ndarray]): Arrays named in ARRAYS (cum_cross may be None)
+            first_pos (np.ndarray): First row with a price, per ticker
+            last_pos (np.ndarray): Last row with a price, per ticker
+            benchmark (Optional[str]): Ticker the cross-products were computed against
+            signature (Optional[str]): Price index state the arrays were built from
+            ended_after_days (int): Days a history may stop before the newest date and still count as current
+        """
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = list(tickers)
+        self.columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.log_prices = arrays["log_prices"]
+        self.cum_returns = arrays["cum_returns"]
+        self.cum_squares = arrays["cum_squares"]
+        self.cum_downside = arrays["cum_downside"]
+        self.cum_cross = arrays.get("cum_cross")
+        self.first_pos = first_pos
+        self.last_pos = last_pos
+        self.benchmark = benchmark
+        self.signature = signature
+        
+        # Tickers without any price, or none in the last ended_after_days, have ended
+        self.ended = np.asarray(last_pos) < 0
+        if len(self.dates):
+            cutoff = self.dates.values[-1] - np.timedelta64(ended_after_days, "D")
+            self.ended |= self.dates.values[np.clip(last_pos, 0, None)] < cutoff
+    
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, benchmark: Optional[str] = None) -> "ReturnIndex":
+        """
+        Build the cumulative arrays from a price matrix.
+        
+        Args:
+            prices (pd.DataFrame): Prices indexed by date with one column per ticker
+            benchmark (Optional[str]): Ticker used for beta cross-products
+        
+        Returns:
+            ReturnIndex: Cumulative return arrays
+        """
+        if not prices.index.is_monotonic_increasing:
+            prices = prices.sort_index()
+        values = prices.to_numpy(dtype="float64", copy=True)
+        valid = ~np.isnan(values)
+        n_rows = len(values)
+        has_data = valid.any(axis=0)
+        first_pos = np.where(has_data, valid.argmax(axis=0), n_rows)
+        last_pos = np.where(has_data, n_rows - 1 - valid[::-1].argmax(axis=0), -1)
+        
+        _forward_fill(values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_prices = np.log(values)
+            returns = np.empty_like(values)
+            returns[0] = 0.0
+            np.divide(values[1:], values[:-1], out=returns[1:])
+            returns[1:] -= 1.0
+        returns[~np.isfinite(returns)] = 0.0
+        
+        # Fill every array before accumulating, since accumulation is in place
+        losses = np.minimum(returns, 0.0)
+        losses *= losses
+        squares = returns * returns
+        cross = None
+        if benchmark in prices.columns:
+            cross = returns * returns[:, [prices.columns.get_loc(benchmark)]]
+        else:
+            benchmark = None
+        
+        arrays = {
+            "log_prices": log_prices,
+            "cum_returns": _cumulative_sum(returns),
+            "cum_squares": _cumulative_sum(squares),
+            "cum_downside": _cumulative_sum(losses),
+            "cum_cross": _cumulative_sum(cross) if cross is not None else None
+        }
+        
+        return cls(prices.index, prices.columns, arrays, first_pos, last_pos, benchmark)
+    
+    def save(self, directory: str) -> None:
+        """
+        Save the arrays as .npy files that can be memory-mapped.
+        
+        Args:
+            directory (str): Directory to write to
+        """
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        
+        arrays = {name: getattr(self, name) for name in self.ARRAYS + ["first_pos", "last_pos"]}
+        arrays["dates"] = self.dates.values.astype("datetime64[ns]")
+        for name, array in arrays.items():
+            if array is None:
+                continue
+            # Replace files instead of overwriting them so open memory maps stay valid
+            path = os.path.join(directory, f"{name}.npy")
+            with open(f"{path}.tmp", 'wb') as f:
+                np.save(f, array)
+            os.replace(f"{path}.tmp", path)
+        
+        meta = {
+            "tickers": self.tickers,
+            "benchmark": self.benchmark,
+            "signature": self.signature
+        }
+        # Metadata is written last so an interrupted save is never loaded
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+    
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> Optional["ReturnIndex"]:
+        """
+        Load saved arrays, memory-mapped by default.
+        
+        Args:
+            directory (str): Directory written by save
+            mmap_mode (Optional[str]): numpy memory-map mode, or None to read into memory
+        
+        Returns:
+            Optional[ReturnIndex]: Loaded index or None if nothing was saved
+        """
+        meta_path = os.path.join(directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        
+        def _load(name):
+            path = os.path.join(directory, f"{name}.npy")
+            return np.load(path, mmap_mode=mmap_mode) if os.path.exists(path) else None
+        
+        arrays = {name: _load(name) for name in cls.ARRAYS}
+        if meta["benchmark"] is None:
+            arrays["cum_cross"] = None
+        return cls(
+            pd.DatetimeIndex(np.load(os.path.join(directory, "dates.npy"))),
+            meta["tickers"],
+            arrays,
+            _load("first_pos"),
+            _load("last_pos"),
+            meta["benchmark"],
+            meta["signature"]
+        )
+    
+    def positions(self, dates: Union[Sequence, pd.Timestamp]) -> np.ndarray:
+        """
+        Map dates to rows, using the last trading day on or before each date.
+        
+        Args:
+            dates (Union[Sequence, pd.Timestamp]): Dates to look up
+        
+        Returns:
+            np.ndarray: Row positions (-1 for dates before the first row)
+        """
+        lookup = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates)))
+        return self.dates.searchsorted(lookup, side="right") - 1
+    
+    def column_positions(self, tickers: Sequence[str]) -> np.ndarray:
+        """
+        Map tickers to columns.
+        
+        Args:
+            tickers (Sequence[str]): Tickers to look up
+        
+        Returns:
+            np.ndarray: Column positions (-1 for unknown tickers)
+        """
+        return np.array([self.columns.get(ticker, -1) for ticker in tickers], dtype=np.int64)
+    
+    def window_stats(
+        self,
+        start_pos: Union[int, np.ndarray],
+        end_pos: Union[int, np.ndarray],
+        cols: Optional[Union[int, np.ndarray]] = None,
+        risk_free_rate: float = 0.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compute window statistics from row differences.
+        
+        Arguments are broadcast against each other, so one call can cover many
+        tickers, many windows, or both. A result is NaN when the ticker has no
+        price at the window start or ended before the window end; a ticker
+        whose history is merely a few days older than the newest one is
+        measured to its last price.
+        
+        Args:
+            start_pos (Union[int, np.ndarray]): Window start rows
+            end_pos (Union[int, np.ndarray]): Window end rows
+            cols (Optional[Union[int, np.ndarray]]): Columns (all tickers if None)
+            risk_free_rate (float): Annual risk-free rate for Sharpe and Sortino ratios
+        
+        Returns:
+            Dict[str, np.ndarray]: total_return, cagr, volatility, sharpe_ratio,
+                sortino_ratio and beta
+        """
+        if cols is None:
+            cols = np.arange(len(self.tickers))
+        s, e, c = np.broadcast_arrays(
+            np.asarray(start_pos, dtype=np.int64),
+            np.asarray(end_pos, dtype=np.int64),
+            np.asarray(cols, dtype=np.int64)
+        )
+        known = c >= 0
+        c = np.where(known, c, 0)
+        s_safe, e_safe = np.clip(s, 0, None), np.clip(e, 0, None)
+        valid = known & (s >= self.first_pos[c]) & ((e <= self.last_pos[c]) | ~self.ended[c]) & (e > s)
+        n = (e - s).astype("float64")
+        
+        def _diff(array, columns=c):
+            return array[e_safe, columns] - array[s_safe, columns]
+        
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            years = (self.dates.values[e_safe] - self.dates.values[s_safe]) / np.timedelta64(1, "D") / 365.25
+            total_return = np.exp(_diff(self.log_prices)) - 1.0
+            mean = _diff(self.cum_returns) / n
+            variance = (_diff(self.cum_squares) - n * mean * mean) / (n - 1)
+            volatility = np.sqrt(variance * TRADING_DAYS_PER_YEAR)
+            excess_return = mean * TRADING_DAYS_PER_YEAR - risk_free_rate
+            downside = np.sqrt(_diff(self.cum_downside) / n * TRADING_DAYS_PER_YEAR)
+            
+            stats = {
+                "total_return": total_return,
+                "cagr": (1.0 + total_return) ** (1.0 / years) - 1.0,
+                "volatility": volatility,
+                "sharpe_ratio": excess_return / volatility,
+                "sortino_ratio": excess_return / downside,
+                "beta": np.full(n.shape, np.nan)
+            }
+            if self.cum_cross is not None:
+                b = np.full_like(c, self.columns[self.benchmark])
+                mean_b = _diff(self.cum_returns, b) / n
+                covariance = _diff(self.cum_cross) - n * mean * mean_b
+                variance_b = _diff(self.cum_squares, b) - n * mean_b * mean_b
+                stats["beta"] = np.where(s >= self.first_pos[b], covariance / variance_b, np.nan)
+        
+        for values in stats.values():
+            values[~valid] = np.nan
+        return stats
+    
+    def query(
+        self,
+        tickers: Sequence[str],
+        start_dates: Union[Sequence, pd.Timestamp],
+        end_dates: Union[Sequence, pd.Timestamp],
+        risk_free_rate: float = 0.0
+    ) -> pd.DataFrame:
+        """
+        Answer a batch of "ticker between start and end" questions.
+        
+        Dates may be scalars shared by all tickers or one per ticker.
+        
+        Args:
+            tickers (Sequence[str]): Tickers to query
+            start_dates (Union[Sequence, pd.Timestamp]): Window start dates
+            end_dates (Union[Sequence, pd.Timestamp]): Window end dates
+            risk_free_rate (float): Annual risk-free rate for Sharpe and Sortino ratios
+        
+        Returns:
+            pd.DataFrame: One row per ticker with the window statistics
+        """
+        stats = self.window_stats(
+            self.positions(start_dates),
+            self.positions(end_dates),
+            self.column_positions(tickers),
+            risk_free_rate
+        )
+        return pd.DataFrame(stats, index=pd.Index(list(tickers), name="ticker"))
+    
+    def period_returns(self, dates: Sequence) -> np.ndarray:
+        """
+        Total return of every ticker between consecutive dates.
+        
+        Args:
+            dates (Sequence): Increasing period boundaries
+        
+        Returns:
+            np.ndarray: One row per period and one column per ticker
+        """
+        rows = self.positions(dates)
+        return self.window_stats(rows[:-1, None], rows[1:, None])["total_return"]
\ No newline at end of file
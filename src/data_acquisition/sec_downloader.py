@@ -1,13 +1,29 @@
 """
 SEC EDGAR data downloader for the Stock Selector project.
 """
+import hashlib
+import json
 import os
 import requests
 import time
-from typing import Dict, List
+from email.utils import formatdate
+from typing import Dict, List, Optional
 from tqdm import tqdm
 import pandas as pd
+from src.data_acquisition.filing_documents import DocumentIndex
+from src.data_acquisition.filing_headers import read_header
+from src.data_acquisition.compact_tables import (
+    compact_filings_list,
+    filing_url,
+    filings_list_path,
+    load_filings_list,
+    save_table
+)
+from src.data_acquisition.filing_index import ANNUAL_FORMS, accession_number, filing_path, format_accession
+from src.utils.checkpoint import JobCheckpoint
 from src.utils.config import config
+from src.utils.metrics import metrics
+from src.utils.work_queue import WorkQueue, partition, run_worker
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__, "logs/sec_downloader.log")
@@ -23,14 +39,113 @@ class SECFilingDownloader:
         self.rate_limit_delay = config.get("sec_edgar.rate_limit_delay", 0.1)
         self.headers = {"User-Agent": self.user_agent}
         self.project_folder = config.get("storage.filings_dir", "data/edgar")
+        self.index_final_after_days = config.get("sec_edgar.index_final_after_days", 7)
         
         # Create project directory
         os.makedirs(self.project_folder, exist_ok=True)
     
+    @property
+    def validators_file(self) -> str:
+        """
+        Get the path of the file recording the cache validators of the index files.
+        
+        Returns:
+            str: Path under the project folder
+        """
+        return os.path.join(self.project_folder, "index_validators.json")
+    
+    def _load_index_validators(self) -> Dict[str, Dict]:
+        """
+        Load the cache validators recorded for the downloaded master.idx files.
+        
+        Returns:
+            Dict[str, Dict]: Mapping of "<year>/<quarter>" to etag, last_modified and fetched_at
+        """
+        if not os.path.exists(self.validators_file):
+            return {}
+        with open(self.validators_file, "r") as f:
+            return json.load(f)
+    
+    def _save_index_validators(self, validators: Dict[str, Dict]) -> None:
+        """
+        Save the cache validators atomically.
+        
+        Args:
+            validators (Dict[str, Dict]): Mapping of "<year>/<quarter>" to etag, last_modified and fetched_at
+        """
+        tmp_file = f"{self.validators_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(validators, f, indent=2)
+        os.replace(tmp_file, self.validators_file)
+    
+    def _index_is_final(self, year: int, qtr: str, fetched_at: float) -> bool:
+        """
+        Check whether a local master.idx can no longer change.
+        
+        SEC appends to the index of the current quarter every day; once the
+        quarter is over, and some days have passed for late filings, a copy
+        fetched after that is final.
+        
+        Args:
+            year (int): Year of the index
+            qtr (str): Quarter of the index, e.g. QTR1
+            fetched_at (float): Time the local copy was fetched or validated, as a Unix timestamp
+        
+        Returns:
+            bool: True if the local copy is final
+        """
+        quarter_end = pd.Timestamp(year=year, month=int(qtr[-1]) * 3, day=1) + pd.offsets.MonthEnd(1)
+        final_at = quarter_end + pd.Timedelta(days=self.index_final_after_days + 1)
+        return pd.Timestamp(fetched_at, unit="s") >= final_at
+    
+    def _download_master_file(self, url: str, file_path: str, validator: Optional[Dict]) -> Optional[Dict]:
+        """
+        Download one master.idx, conditionally if a local copy exists.
+        
+        Args:
+            url (str): URL of the index file
+            file_path (str): Local path of the index file
+            validator (Optional[Dict]): Recorded etag and last_modified of the local copy
+        
+        Returns:
+            Optional[Dict]: New validator of the local copy, or None if the download failed
+        """
+        headers = dict(self.headers)
+        if validator is not None and os.path.exists(file_path):
+            if validator.get("etag"):
+                headers["If-None-Match"] = validator["etag"]
+            if validator.get("last_modified"):
+                headers["If-Modified-Since"] = validator["last_modified"]
+        
+        with metrics.timer("http_request_seconds", source="sec_index"):
+            response = requests.get(url, headers=headers)
+        metrics.increment("http_responses_total", source="sec_index", status=response.status_code)
+        if response.status_code == 304:
+            return {**validator, "fetched_at": time.time()}
+        if response.status_code != 200:
+            return None
+        
+        with metrics.timer("file_write_seconds", kind="master_index"):
+            with open(f"{file_path}.part", 'wb') as f:
+                f.write(response.content)
+            os.replace(f"{file_path}.part", file_path)
+        metrics.increment("downloaded_bytes_total", len(response.content), source="sec_index")
+        return {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time()
+        }
+    
     def download_master_files(self, start_year: int, end_year: int) -> None:
         """
         Download SEC EDGAR master index files for specified years.
         
+        Index files that may still change, those of the current quarter and
+        of quarters that ended only recently, are revalidated with
+        If-None-Match and If-Modified-Since requests: an unchanged file costs
+        a 304 response, and an updated one is downloaded again. Final files
+        are never requested twice.
+        
         Args:
             start_year (int): Starting year
             end_year (int): Ending year
@@ -38,6 +153,7 @@ class SECFilingDownloader:
         logger.info(f"Downloading master files from {start_year} to {end_year}")
         
         quarters = ["QTR1", "QTR2", "QTR3", "QTR4"]
+        validators = self._load_index_validators()
         
         # Calculate total number of tasks for progress bar
         total_tasks = 0
@@ -70,25 +186,32 @@ class SECFilingDownloader:
                     # Construct URL for master.idx
                     url = f"{self.base_url}edgar/full-index/{year}/{qtr}/master.idx"
                     file_path = os.path.join(qtr_dir, "master.idx")
+                    key = f"{year}/{qtr}"
+                    
+                    # Skip final local copies; copies from before validators were kept are dated by mtime
+                    validator = validators.get(key)
+                    if os.path.exists(file_path):
+                        if validator is None:
+                            mtime = os.path.getmtime(file_path)
+                            validator = {"last_modified": formatdate(mtime, usegmt=True), "fetched_at": mtime}
+                        if self._index_is_final(year, qtr, validator["fetched_at"]):
+                            pbar.update(1)
+                            continue
                     
-                    # Download only if file doesn't already exist
-                    if not os.path.exists(file_path):
-                        try:
-                            response = requests.get(url, headers=self.headers)
-                            if response.status_code == 200:
-                                with open(file_path, 'wb') as f:
-                                    f.write(response.content)
-                                logger.debug(f"Downloaded {year}/{qtr}/master.idx")
-                            else:
-                                logger.error(
-                                    f"Failed to download {year}/{qtr}/master.idx - "
-                                    f"Status: {response.status_code}"
-                                )
-                        except Exception as e:
-                            logger.error(
-                                f"Error downloading {year}/{qtr}/master.idx: {e}"
-                            )
-                        # Respect SEC rate limits
+                    try:
+                        validator = self._download_master_file(url, file_path, validator)
+                        if validator is not None:
+                            validators[key] = validator
+                            self._save_index_validators(validators)
+                            logger.debug(f"Downloaded or validated {key}/master.idx")
+                        else:
+                            logger.error(f"Failed to download {key}/master.idx")
+                    except Exception as e:
+                        logger.error(
+                            f"Error downloading {year}/{qtr}/master.idx: {e}"
+                        )
+                    # Respect SEC rate limits
+                    with metrics.timer("rate_limit_sleep_seconds"):
                         time.sleep(self.rate_limit_delay)
                     # Update progress bar after each quarter
                     pbar.update(1)
@@ -99,14 +222,20 @@ class SECFilingDownloader:
     def generate_filings_list(
         self,
         idx_dir: str = None,
-        output_file: str = "data/filings_list.csv"
+        output_file: str = None
     ) -> None:
         """
-        Generate a filings list CSV from master index files.
+        Generate the filings list from master index files.
+        
+        Annual reports and their amendments are listed, each with the
+        accession number that identifies it, in the compact schema of
+        compact_filings_list: URLs are rebuilt from the CIK and accession
+        number when a filing is downloaded.
         
         Args:
             idx_dir (str): Directory containing master.idx files
-            output_file (str): Path to save the filings list CSV
+            output_file (str): Path to save the filings list (storage.filings_list if None),
+                as Parquet or .npz depending on whether pyarrow is installed
         """
         if idx_dir is None:
             idx_dir = self.project_folder
@@ -127,86 +256,198 @@ class SECFilingDownloader:
                 for qtr in quarters:
                     idx_file = f"{idx_dir}/{year}/{qtr}/master.idx"
                     if os.path.exists(idx_file):
+                        metrics.increment("index_files_parsed_total")
                         with open(idx_file, 'r', encoding='latin-1') as f:
                             lines = f.readlines()[11:]  # Skip header
                         for line in lines:
                             parts = line.strip().split('|')
-                            if len(parts) >= 5 and parts[2] in ['10-K']:
-                                filings_list.append({
-                                    'CIK': parts[0],
-                                    'Company': parts[1],
-                                    'Form': parts[2],
-                                    'Date': parts[3],
-                                    'URL': self.base_url + parts[4]
-                                })
+                            if len(parts) >= 5 and parts[2] in ANNUAL_FORMS:
+                                filings_list.append(
+                                    (parts[0], parts[1], parts[2], parts[3], accession_number(parts[4])))
                         pbar.update(1)
                         pbar.set_description(f"Parsing {year}/{qtr}")
         
-        filings_df = pd.DataFrame(filings_list)
-        filings_df.to_csv(output_file, index=False)
+        filings_df = compact_filings_list(
+            pd.DataFrame(filings_list, columns=['CIK', 'Company', 'Form', 'Date', 'Accession']))
+        output_file = save_table(filings_df, output_file or filings_list_path())
         logger.info(f"Generated new {output_file} with {len(filings_df)} entries.")
     
+    def _adopt_legacy_file(self, legacy_path: str, file_path: str, accession: str) -> None:
+        """
+        Rename a filing downloaded under its legacy name, if it is the expected one.
+        
+        Args:
+            legacy_path (str): Path under the {form}_{date}.txt name
+            file_path (str): Path under the accession-keyed name
+            accession (str): Accession number of the expected filing
+        """
+        if os.path.exists(file_path) or not os.path.exists(legacy_path):
+            return
+        try:
+            if read_header(legacy_path).get("accession_number") == accession:
+                os.replace(legacy_path, file_path)
+                logger.debug(f"Renamed {legacy_path} to {file_path}")
+        except OSError as e:
+            logger.warning(f"Error renaming {legacy_path}: {e}")
+    
+    def _download_filing(
+        self,
+        cik: int,
+        form: str,
+        date: str,
+        accession: str,
+        download_dir: str,
+        checkpoint: JobCheckpoint,
+        done: set,
+        document_index: DocumentIndex
+    ) -> str:
+        """
+        Download one filing of the filings list unless it is already on disk.
+        
+        Args:
+            cik (int): Company CIK
+            form (str): Form type
+            date (str): Filing date (YYYY-MM-DD)
+            accession (str): Accession number
+            download_dir (str): Directory to save downloaded filings
+            checkpoint (JobCheckpoint): Checkpoint of the download job
+            done (set): Paths checkpointed as complete
+            document_index (DocumentIndex): Index of the filings' documents
+        
+        Returns:
+            str: skipped, downloaded or failed
+        """
+        url = filing_url(self.base_url, cik, accession)
+        file_path = filing_path(download_dir, cik, form, date, accession)
+        save_dir = os.path.dirname(file_path)
+        self._adopt_legacy_file(filing_path(download_dir, cik, form, date), file_path, accession)
+        
+        # Skip checkpointed files, and complete files from runs before checkpointing
+        if file_path in done or (os.path.exists(file_path) and os.path.getsize(file_path) > 0):
+            if file_path not in done:
+                checkpoint.complete(file_path)
+            return "skipped"
+        
+        # Download the file
+        os.makedirs(save_dir, exist_ok=True)
+        checkpoint.start([file_path])
+        outcome = "failed"
+        try:
+            with metrics.timer("http_request_seconds", source="sec_filing"):
+                response = requests.get(url, headers=self.headers)
+            metrics.increment("http_responses_total", source="sec_filing", status=response.status_code)
+            if response.status_code == 200:
+                with metrics.timer("file_write_seconds", kind="filing"):
+                    with open(f"{file_path}.part", 'wb') as f:
+                        f.write(response.content)
+                    os.replace(f"{file_path}.part", file_path)
+                metrics.increment("downloaded_bytes_total", len(response.content), source="sec_filing")
+                checkpoint.complete(file_path)
+                
+                # Index the documents while the content is in memory; extraction indexes it otherwise
+                try:
+                    document_index.add(file_path, response.content)
+                except Exception as e:
+                    logger.warning(f"Error indexing documents of {file_path}: {e}")
+                outcome = "downloaded"
+            else:
+                checkpoint.fail(file_path, f"HTTP {response.status_code}")
+                logger.error(f"Failed to download {url} - Status: {response.status_code}")
+        except Exception as e:
+            checkpoint.fail(file_path, str(e))
+            logger.error(f"Error downloading {url}: {e}")
+        
+        with metrics.timer("rate_limit_sleep_seconds"):
+            time.sleep(self.rate_limit_delay)  # Respect rate limit
+        return outcome
+    
     def download_filings(
         self,
-        filings_list_file: str = "data/filings_list.csv",
-        download_dir: str = None
+        filings_list_file: str = None,
+        download_dir: str = None,
+        resume: bool = True,
+        queue: Optional[WorkQueue] = None
     ) -> None:
         """
         Download 10-K filings from a filings list.
         
+        Every finished file is checkpointed, so a restarted run skips it
+        without touching the disk. Files are written under a temporary name
+        first, so an interrupted download is never mistaken for a complete one.
+        File names include the accession number; a file downloaded under the
+        legacy {form}_{date}.txt name is renamed when its header shows it is
+        the same filing.
+        
+        With a work queue, the filings list is partitioned into units of
+        consecutive rows shared with the other workers of the queue, and this
+        process downloads only the units it claims. A unit with a failed
+        download is released to be retried.
+        
         Args:
-            filings_list_file (str): Path to the filings list CSV
+            filings_list_file (str): Path to the filings list (storage.filings_list if None)
             download_dir (str): Directory to save downloaded filings
+            resume (bool): Continue from the last checkpoint instead of starting over
+            queue (Optional[WorkQueue]): Queue shared by the workers of a distributed download
         """
         if download_dir is None:
             download_dir = os.path.join(self.project_folder, "filings")
             
         logger.info(f"Downloading filings to {download_dir}")
         
-        # Read filings list
-        filings_df = pd.read_csv(filings_list_file)
+        # Read filings list; URLs and accession numbers are formatted per filing when needed
+        filings_df = load_filings_list(filings_list_file)
+        ciks = filings_df['CIK'].to_numpy()
+        forms = filings_df['Form'].to_numpy()
+        dates = filings_df['Date'].to_numpy().astype("datetime64[D]")
+        accessions = filings_df['Accession'].to_numpy()
         total_files = len(filings_df)
-        downloaded = 0
-        skipped = 0
-        failed = 0
-        
-        with tqdm(total=total_files, desc="Downloading Filings") as pbar:
-            for index, row in filings_df.iterrows():
-                cik, form, date, url = row['CIK'], row['Form'], row['Date'], row['URL']
-                year = date[:4]
-                save_dir = f"{download_dir}/{cik}/{year}"
-                os.makedirs(save_dir, exist_ok=True)
-                file_path = f"{save_dir}/{form}_{date}.txt"
-                
-                # Check if file already exists and is not empty
-                if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                    skipped += 1
-                    if skipped % 1000 == 0:  # Log every 1000 skips
-                        logger.debug(f"Skipped {skipped} files so far (e.g., {file_path})")
-                    pbar.update(1)
-                    continue
-                
-                # Download the file
-                try:
-                    response = requests.get(url, headers=self.headers)
-                    if response.status_code == 200:
-                        with open(file_path, 'wb') as f:
-                            f.write(response.content)
-                        downloaded += 1
-                        pbar.set_description(
-                            f"Downloaded: {downloaded}, Skipped: {skipped}, Failed: {failed}"
-                        )
-                    else:
-                        failed += 1
-                        logger.error(f"Failed to download {url} - Status: {response.status_code}")
-                except Exception as e:
+        outcomes = {"downloaded": 0, "skipped": 0, "failed": 0}
+        
+        checkpoint = JobCheckpoint("download_filings")
+        if not resume:
+            checkpoint.reset()
+        checkpoint.log_resume()
+        done = checkpoint.completed()
+        document_index = DocumentIndex(config.get("storage.document_index", "data/edgar/document_index.db"))
+        
+        def download_rows(positions: List[int], pbar) -> int:
+            failed = 0
+            for position in positions:
+                outcome = self._download_filing(
+                    ciks[position], forms[position], str(dates[position]), format_accession(accessions[position]),
+                    download_dir, checkpoint, done, document_index)
+                outcomes[outcome] += 1
+                if outcome == "failed":
                     failed += 1
-                    logger.error(f"Error downloading {url}: {e}")
-                
-                time.sleep(self.rate_limit_delay)  # Respect rate limit
+                if outcome == "skipped" and outcomes["skipped"] % 1000 == 0:  # Log every 1000 skips
+                    logger.debug(f"Skipped {outcomes['skipped']} files so far")
+                pbar.set_description(
+                    f"Downloaded: {outcomes['downloaded']}, Skipped: {outcomes['skipped']}, "
+                    f"Failed: {outcomes['failed']}"
+                )
                 pbar.update(1)
+            return failed
+        
+        # A worker cannot tell in advance how many rows it will claim
+        with tqdm(total=total_files if queue is None else None, desc="Downloading Filings") as pbar:
+            if queue is None:
+                download_rows(range(total_files), pbar)
+            else:
+                # Units hold row positions, so the rows they point to version them
+                queue.add(
+                    partition(list(range(total_files)), config.get("work_queue.unit_size", 500)),
+                    version=hashlib.sha256(accessions.tobytes()).hexdigest()
+                )
+                
+                def process(positions: List[int]) -> Dict[str, int]:
+                    failed = download_rows(positions, pbar)
+                    if failed:
+                        raise RuntimeError(f"{failed} of {len(positions)} filings failed to download")
+                    return {"filings": len(positions)}
+                
+                run_worker(queue, process)
         
         logger.info(
-            f"Download complete. Summary: Downloaded: {downloaded}, "
-            f"Skipped: {skipped}, Failed: {failed}"
+            f"Download complete. Summary: Downloaded: {outcomes['downloaded']}, "
+            f"Skipped: {outcomes['skipped']}, Failed: {outcomes['failed']}"
         )
\ No newline at end of file
@@ -0,0 +1,343 @@
+"""
+Point-in-time security master for the Stock Selector project.
+"""
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple, Union
+from src.data_acquisition.security_store import open_security_store
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/security_master.log")
+
+MASTER_COLUMNS = ["cik", "ticker", "name", "exchange", "ipo_date", "start_date", "end_date", "primary"]
+
+
+def normalize_cik(ciks: pd.Series) -> pd.Series:
+    """
+    Format CIKs as 10-digit zero-padded strings.
+    
+    Accepts integers, floats and strings with or without leading zeros in one
+    vectorized pass; values that are not numbers become missing.
+    
+    Args:
+        ciks (pd.Series): Raw CIK values
+    
+    Returns:
+        pd.Series: Zero-padded CIK strings
+    """
+    numbers = pd.to_numeric(ciks.astype("string").str.strip(), errors="coerce").astype("Int64")
+    return numbers.astype("string").str.zfill(10)
+
+
+def cik_ids(ciks: pd.Series) -> pd.Series:
+    """
+    Parse CIKs into 32-bit integers.
+    
+    Accepts the same values as normalize_cik. CIKs are at most 10 digits but
+    still far below 2**31, so an int32 holds them in a fifth of the memory of
+    the zero-padded strings.
+    
+    Args:
+        ciks (pd.Series): Raw CIK values
+    
+    Returns:
+        pd.Series: Nullable Int32 CIKs
+    """
+    return pd.to_numeric(ciks.astype("string").str.strip(), errors="coerce").astype("Int32")
+
+
+def _close_intervals(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fill open validity bounds so a company's primary listings do not overlap.
+    
+    A listing without a start begins the day after the previous listing of the
+    same company ends, and one without an end stops the day before the next
+    one starts.
+    
+    Args:
+        table (pd.DataFrame): Primary listings with start_date and end_date
+    
+    Returns:
+        pd.DataFrame: Listings with the bounds filled where they can be inferred
+    """
+    table = table.sort_values(["cik", "end_date", "start_date"], na_position="last", kind="stable")
+    same_cik_prev = table["cik"].eq(table["cik"].shift())
+    same_cik_next = table["cik"].eq(table["cik"].shift(-1))
+    previous_end = table["end_date"].shift() + pd.Timedelta(days=1)
+    next_start = table["start_date"].shift(-1) - pd.Timedelta(days=1)
+    table["start_date"] = table["start_date"].fillna(previous_end.where(same_cik_prev))
+    table["end_date"] = table["end_date"].fillna(next_start.where(same_cik_next))
+    return table
+
+
+def bound_reused_tickers(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Start open-start listings after earlier owners of the same ticker stopped using it.
+    
+    A ticker can be reused once its former company changed symbol or was
+    delisted. A listing without a start then begins the day after the last
+    end date of the ticker's listings by other companies that ended before
+    it, so the new owner does not match the dates of the old one.
+    
+    Args:
+        table (pd.DataFrame): Listings with cik, ticker, start_date and end_date
+    
+    Returns:
+        pd.DataFrame: Listings with the bounded start dates filled in
+    """
+    table = table.copy()
+    table["start_date"] = pd.to_datetime(table["start_date"])
+    table["end_date"] = pd.to_datetime(table["end_date"])
+    open_start = table.loc[table["start_date"].isna(), ["cik", "ticker", "end_date"]].reset_index()
+    closed = table.loc[table["end_date"].notna(), ["cik", "ticker", "end_date"]]
+    pairs = open_start.merge(closed, on="ticker", suffixes=("", "_before"))
+    pairs = pairs[
+        (pairs["cik"] != pairs["cik_before"])
+        & (pairs["end_date"].isna() | (pairs["end_date_before"] < pairs["end_date"]))
+    ]
+    if len(pairs):
+        starts = pairs.groupby("index")["end_date_before"].max() + pd.Timedelta(days=1)
+        table.loc[starts.index, "start_date"] = starts
+    return table
+
+
+def build_security_master(
+    securities: pd.DataFrame,
+    history_file: str = "data/ticker_history.csv"
+) -> pd.DataFrame:
+    """
+    Build the listing table from the current mapping and known ticker changes.
+    
+    The security list gives each company's current tickers, the first one
+    being its primary listing. The optional history file lists
+    former tickers with the dates they were used (cik, ticker, start_date,
+    end_date); each becomes a closed primary listing so filings made under an
+    old symbol resolve to the right ticker. A ticker another company used
+    before is only valid for its current owner after the earlier use ended.
+    
+    Args:
+        securities (pd.DataFrame): Security list with cik, name, ticker, exchange and ipo_date
+        history_file (str): Path to the ticker history CSV (optional)
+    
+    Returns:
+        pd.DataFrame: One row per listing with MASTER_COLUMNS, cik as int32 and exchange categorical
+    """
+    current = securities[securities["ticker"].notna() & (securities["ticker"] != "Not Found")].copy()
+    if "ipo_date" not in current.columns:
+        current["ipo_date"] = pd.NA
+    current["start_date"] = pd.NaT
+    current["end_date"] = pd.NaT
+    current["primary"] = ~current.duplicated(subset=["cik"], keep="first")
+    
+    frames = [current]
+    if os.path.exists(history_file):
+        history = pd.read_csv(history_file, dtype={"cik": str, "ticker": str})
+        history = history.assign(name=pd.NA, exchange=pd.NA, ipo_date=pd.NA, primary=True)
+        frames.append(history)
+        logger.info(f"Loaded {len(history)} former listings from {history_file}")
+    else:
+        logger.warning(
+            f"No ticker history at {history_file}: every company resolves to its current ticker "
+            f"on all dates, so lookups are not point-in-time for companies that changed ticker"
+        )
+    
+    table = pd.concat(frames, ignore_index=True)
+    table["cik"] = cik_ids(table["cik"])
+    table = table.dropna(subset=["cik"])
+    table["cik"] = table["cik"].astype("int32")
+    table["exchange"] = table["exchange"].astype("category")
+    for column in ["ipo_date", "start_date", "end_date"]:
+        table[column] = pd.to_datetime(table[column], errors="coerce")
+    table["primary"] = table["primary"].astype(bool)
+    
+    # A company's listing history starts at its earliest known first trade
+    table["ipo_date"] = table.groupby("cik")["ipo_date"].transform("min")
+    
+    primary = _close_intervals(table[table["primary"]])
+    table = bound_reused_tickers(pd.concat([primary, table[~table["primary"]]]))
+    table = table.drop_duplicates(subset=["cik", "ticker", "start_date", "end_date"])
+    return table.sort_values(["cik", "start_date"], na_position="first", kind="stable")[MASTER_COLUMNS].reset_index(drop=True)
+
+
+def record_ticker_changes(
+    previous: pd.DataFrame,
+    current: pd.DataFrame,
+    history_file: str = "data/ticker_history.csv",
+    as_of: Optional[Union[str, pd.Timestamp]] = None
+) -> int:
+    """
+    Append the primary tickers a new mapping replaces to the ticker history.
+    
+    The SEC ticker files only give current symbols, so the history is built
+    up from one mapping to the next: a company whose primary ticker changed
+    gets its former ticker recorded as ending the day before as_of. The start
+    of such a listing is left open and inferred from the listings before it.
+    
+    Args:
+        previous (pd.DataFrame): Security list before the update, with cik and ticker
+        current (pd.DataFrame): Security list after the update, with cik and ticker
+        history_file (str): Path to the ticker history CSV
+        as_of (Optional[Union[str, pd.Timestamp]]): Date of the new mapping (today if None)
+    
+    Returns:
+        int: Number of former listings recorded
+    """
+    def primary(securities):
+        listed = securities[securities["ticker"].notna() & (securities["ticker"] != "Not Found")]
+        listed = listed.assign(cik=cik_ids(listed["cik"])).dropna(subset=["cik"])
+        return listed.drop_duplicates(subset=["cik"]).set_index("cik")["ticker"]
+    
+    before, after = primary(previous), primary(current)
+    common = before.index.intersection(after.index)
+    changed = before[common][before[common] != after[common]]
+    if changed.empty:
+        return 0
+    
+    date = pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of)
+    changes = pd.DataFrame({
+        "cik": changed.index.astype("int64"),
+        "ticker": changed.to_numpy(),
+        "start_date": "",
+        "end_date": (date - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    })
+    history = pd.DataFrame(columns=changes.columns)
+    if os.path.exists(history_file):
+        history = pd.read_csv(history_file, dtype={"ticker": str, "start_date": str, "end_date": str})
+        known = set(zip(history["cik"].astype("int64"), history["ticker"]))
+        changes = changes[[(cik, ticker) not in known for cik, ticker in zip(changes["cik"], changes["ticker"])]]
+    if changes.empty:
+        return 0
+    
+    os.makedirs(os.path.dirname(history_file) or ".", exist_ok=True)
+    tmp_file = f"{history_file}.tmp"
+    pd.concat([history, changes], ignore_index=True).to_csv(tmp_file, index=False)
+    os.replace(tmp_file, history_file)
+    logger.info(f"Recorded {len(changes)} ticker changes in {history_file}")
+    return len(changes)
+
+
+class SecurityMaster:
+    """
+    Hashed CIK and ticker index with listing validity dates.
+    
+    Each key maps to the few listings it ever had, so a point-in-time lookup is
+    one dictionary access and a scan of a handful of date ranges. Missing
+    start or end dates mean the range is open on that side; when ranges
+    overlap, the one starting last is the most specific and wins.
+    """
+    
+    def __init__(self, table: pd.DataFrame):
+        """
+        Index a listing table.
+        
+        Args:
+            table (pd.DataFrame): Output of build_security_master
+        """
+        self.table = table.reset_index(drop=True)
+        starts = self.table["start_date"].fillna(pd.Timestamp.min).to_numpy(dtype="datetime64[ns]")
+        ends = self.table["end_date"].fillna(pd.Timestamp.max).to_numpy(dtype="datetime64[ns]")
+        
+        # Primary listings first so that they win among concurrent share classes,
+        # then the latest starts, so a bounded range wins over an open one
+        self._by_cik: Dict[int, List[Tuple[np.datetime64, np.datetime64, str]]] = {}
+        self._by_ticker: Dict[str, List[Tuple[np.datetime64, np.datetime64, int]]] = {}
+        order = np.lexsort((-starts.astype("int64"), ~self.table["primary"].to_numpy()))
+        ciks = self.table["cik"].to_numpy()
+        tickers = self.table["ticker"].to_numpy()
+        for i in order:
+            self._by_cik.setdefault(int(ciks[i]), []).append((starts[i], ends[i], tickers[i]))
+            self._by_ticker.setdefault(tickers[i], []).append((starts[i], ends[i], int(ciks[i])))
+    
+    @staticmethod
+    def _match(listings: List[Tuple], as_of: Optional[Union[str, pd.Timestamp]]):
+        """
+        Pick the first listing valid on a date.
+        
+        Args:
+            listings (List[Tuple]): (start, end, value) entries for one key
+            as_of (Optional[Union[str, pd.Timestamp]]): Lookup date (today if None)
+        
+        Returns:
+            The value of the matching listing, or None
+        """
+        date = np.datetime64(pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of), "ns")
+        for start, end, value in listings:
+            if start <= date <= end:
+                return value
+        return None
+    
+    def resolve(self, cik: Union[int, str], as_of: Optional[Union[str, pd.Timestamp]] = None) -> Optional[str]:
+        """
+        Find the ticker a company traded under on a date.
+        
+        Args:
+            cik (Union[int, str]): CIK, with or without leading zeros
+            as_of (Optional[Union[str, pd.Timestamp]]): Lookup date (today if None)
+        
+        Returns:
+            Optional[str]: Primary ticker, or None if the company was not listed
+        """
+        return self._match(self._by_cik.get(int(cik), []), as_of)
+    
+    def resolve_ticker(self, ticker: str, as_of: Optional[Union[str, pd.Timestamp]] = None) -> Optional[int]:
+        """
+        Find the company that used a ticker on a date.
+        
+        Args:
+            ticker (str): Ticker symbol
+            as_of (Optional[Union[str, pd.Timestamp]]): Lookup date (today if None)
+        
+        Returns:
+            Optional[int]: CIK, or None if the ticker was not in use
+        """
+        return self._match(self._by_ticker.get(ticker, []), as_of)
+    
+    def listings(self, as_of: Optional[Union[str, pd.Timestamp]] = None) -> pd.DataFrame:
+        """
+        Get the primary listing of every company listed on a date.
+        
+        Args:
+            as_of (Optional[Union[str, pd.Timestamp]]): Listing date (today if None)
+        
+        Returns:
+            pd.DataFrame: Rows of the listing table, one per cik
+        """
+        date = pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of)
+        valid = (
+            self.table["primary"]
+            & ~(self.table["start_date"] > date)
+            & ~(self.table["end_date"] < date)
+        )
+        return self.table[valid].drop_duplicates(subset=["cik"]).reset_index(drop=True)
+    
+    def primary_listings(self) -> pd.DataFrame:
+        """
+        Get every primary listing with its validity dates.
+        
+        Returns:
+            pd.DataFrame: Rows of the listing table that are primary listings
+        """
+        return self.table[self.table["primary"]].reset_index(drop=True)
+
+
+def load_security_master(
+    db_file: str = "data/securities.db",
+    consolidated_file: str = "data/consolidated_stock_list.csv",
+    history_file: str = "data/ticker_history.csv"
+) -> SecurityMaster:
+    """
+    Build and index the security master from the security store.
+    
+    Args:
+        db_file (str): Path to the security store database
+        consolidated_file (str): consolidated_stock_list.csv, imported if the store is empty
+        history_file (str): Path to the ticker history CSV (optional)
+    
+    Returns:
+        SecurityMaster: Indexed security master
+    """
+    securities = open_security_store(db_file, consolidated_file).read()
+    master = SecurityMaster(build_security_master(securities, history_file))
+    logger.info(f"Loaded security master with {len(master.table)} listings")
+    return master
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Indexed security list storage for the Stock Selector project.
+"""
+import os
+import sqlite3
+import threading
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/security_store.log")
+
+SECURITY_COLUMNS = ["cik", "name", "ticker", "exchange", "ipo_date"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS securities (
+    cik INTEGER NOT NULL,
+    ticker TEXT NOT NULL,
+    name TEXT,
+    exchange TEXT,
+    ipo_date TEXT,
+    PRIMARY KEY (cik, ticker)
+);
+CREATE INDEX IF NOT EXISTS securities_ticker ON securities (ticker);
+CREATE TABLE IF NOT EXISTS price_lookups (
+    ticker TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    checked_at TEXT NOT NULL
+);
+"""
+
+
+class SecurityStore:
+    """
+    Keeps the security list in SQLite so that updates are per-row upserts.
+    
+    The database runs in WAL mode, so readers in other processes see the last
+    committed batch while a writer is busy. Each thread gets its own
+    connection.
+    """
+    
+    def __init__(self, db_path: str = "data/securities.db", batch_size: int = 1000):
+        """
+        Open the store, creating the schema if needed.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+            batch_size (int): Rows written per transaction by bulk upserts
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._local = threading.local()
+        
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use.
+        
+        Returns:
+            sqlite3.Connection: Connection in WAL mode
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    def close(self) -> None:
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+    
+    def _executemany(self, sql: str, rows: Iterable[Tuple]) -> int:
+        """
+        Run a statement for many rows, committing every batch_size rows.
+        
+        Args:
+            sql (str): Parameterized statement
+            rows (Iterable[Tuple]): Parameters per row
+        
+        Returns:
+            int: Number of rows written
+        """
+        rows = list(rows)
+        for start in range(0, len(rows), self.batch_size):
+            with self.connection:
+                self.connection.executemany(sql, rows[start:start + self.batch_size])
+        return len(rows)
+    
+    def upsert_securities(self, securities: pd.DataFrame, prune: bool = False) -> int:
+        """
+        Insert or update securities, keeping IPO dates that are already known.
+        
+        Args:
+            securities (pd.DataFrame): Rows with cik, name, ticker, exchange and optionally ipo_date
+            prune (bool): Delete stored (cik, ticker) pairs missing from securities
+        
+        Returns:
+            int: Number of rows written
+        """
+        frame = securities.reindex(columns=SECURITY_COLUMNS).dropna(subset=["cik", "ticker"])
+        frame = frame.astype(object).where(frame.notna(), None)
+        rows = (
+            (int(row.cik), row.ticker, row.name, row.exchange, row.ipo_date)
+            for row in frame.itertuples(index=False)
+        )
+        count = self._executemany(
+            """
+            INSERT INTO securities (cik, ticker, name, exchange, ipo_date) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (cik, ticker) DO UPDATE SET
+                name = excluded.name,
+                exchange = excluded.exchange,
+                ipo_date = COALESCE(excluded.ipo_date, securities.ipo_date)
+            """,
+            rows
+        )
+        if prune:
+            self._prune(frame[["cik", "ticker"]])
+        logger.info(f"Upserted {count} securities into {self.db_path}")
+        return count
+    
+    def _prune(self, keys: pd.DataFrame) -> None:
+        """
+        Delete securities whose (cik, ticker) pair is not in keys.
+        
+        Args:
+            keys (pd.DataFrame): cik and ticker columns of the securities to keep
+        """
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS keep (cik INTEGER, ticker TEXT)")
+            self.connection.execute("DELETE FROM keep")
+            self.connection.executemany(
+                "INSERT INTO keep VALUES (?, ?)",
+                ((int(cik), ticker) for cik, ticker in keys.itertuples(index=False))
+            )
+            deleted = self.connection.execute(
+                "DELETE FROM securities WHERE (cik, ticker) NOT IN (SELECT cik, ticker FROM keep)").rowcount
+        if deleted:
+            logger.info(f"Removed {deleted} securities no longer in the mapping")
+    
+    def set_ipo_dates(self, ipo_dates: Dict[str, str]) -> int:
+        """
+        Record IPO dates by ticker.
+        
+        Args:
+            ipo_dates (Dict[str, str]): Mapping of ticker to first trading date
+        
+        Returns:
+            int: Number of tickers updated
+        """
+        return self._executemany(
+            "UPDATE securities SET ipo_date = ? WHERE ticker = ?",
+            ((date, ticker) for ticker, date in ipo_dates.items())
+        )
+    
+    def record_lookups(self, lookups: Dict[str, str]) -> int:
+        """
+        Checkpoint the outcome of price lookups so they are not repeated.
+        
+        Args:
+            lookups (Dict[str, str]): Mapping of ticker to status ("ok", "empty" or "error")
+        
+        Returns:
+            int: Number of lookups recorded
+        """
+        checked_at = pd.Timestamp.now().isoformat(timespec="seconds")
+        return self._executemany(
+            """
+            INSERT INTO price_lookups (ticker, status, checked_at) VALUES (?, ?, ?)
+            ON CONFLICT (ticker) DO UPDATE SET status = excluded.status, checked_at = excluded.checked_at
+            """,
+            ((ticker, status, checked_at) for ticker, status in lookups.items())
+        )
+    
+    def checked_tickers(self, statuses: Optional[List[str]] = None) -> List[str]:
+        """
+        Get the tickers whose price lookup has been checkpointed.
+        
+        Args:
+            statuses (Optional[List[str]]): Only return lookups with these statuses (all if None)
+        
+        Returns:
+            List[str]: Ticker symbols
+        """
+        sql = "SELECT ticker FROM price_lookups"
+        params: Tuple = ()
+        if statuses is not None:
+            sql += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+            params = tuple(statuses)
+        return [row[0] for row in self.connection.execute(sql, params)]
+    
+    def read(self) -> pd.DataFrame:
+        """
+        Read the security list.
+        
+        Returns:
+            pd.DataFrame: Securities with SECURITY_COLUMNS, in insertion order
+        """
+        return pd.read_sql_query(
+            f"SELECT {', '.join(SECURITY_COLUMNS)} FROM securities ORDER BY rowid", self.connection)
+    
+    def tickers(self) -> List[str]:
+        """
+        Get the distinct tickers in the security list.
+        
+        Returns:
+            List[str]: Ticker symbols, excluding "Not Found"
+        """
+        rows = self.connection.execute(
+            "SELECT DISTINCT ticker FROM securities WHERE ticker != 'Not Found' ORDER BY rowid")
+        return [row[0] for row in rows]
+    
+    def __len__(self) -> int:
+        """
+        Count the securities in the store.
+        
+        Returns:
+            int: Number of rows
+        """
+        return self.connection.execute("SELECT COUNT(*) FROM securities").fetchone()[0]
+    
+    def export_csv(self, output_file: str = "data/consolidated_stock_list.csv") -> None:
+        """
+        Write the security list in the consolidated_stock_list.csv layout.
+        
+        Args:
+            output_file (str): Path to the CSV file
+        """
+        securities = self.read()
+        tmp_file = f"{output_file}.tmp"
+        securities.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, output_file)
+        logger.info(f"Exported {len(securities)} securities to {output_file}")
+
+
+def open_security_store(
+    db_path: str = "data/securities.db",
+    csv_file: str = "data/consolidated_stock_list.csv"
+) -> SecurityStore:
+    """
+    Open the security store, importing the CSV security list into a new store.
+    
+    Args:
+        db_path (str): Path to the SQLite database file
+        csv_file (str): consolidated_stock_list.csv to import when the store is empty
+    
+    Returns:
+        SecurityStore: Opened store
+    """
+    store = SecurityStore(db_path)
+    if len(store) == 0 and os.path.exists(csv_file):
+        logger.info(f"Importing {csv_file} into {db_path}")
+        store.upsert_securities(pd.read_csv(csv_file, dtype={"cik": str}))
+    return store
\ No newline at end of file
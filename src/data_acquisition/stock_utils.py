@@ -6,9 +6,17 @@ import yfinance as yf
 from tqdm import tqdm
 import os
 import json
-from typing import List, Dict
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from src.utils.checkpoint import JobCheckpoint
 from src.utils.config import config
+from src.data_acquisition.price_store import PriceStore
+from src.data_acquisition.security_master import cik_ids, record_ticker_changes
+from src.data_acquisition.security_store import SecurityStore, open_security_store
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 
 logger = setup_logger(__name__, "logs/stock_utils.log")
 
@@ -17,16 +25,26 @@ def generate_cik_ticker_mapping(
     filings_dir: str = None,
     json_file: str = None,
     txt_file: str = None,
-    output_file: str = "data/consolidated_stock_list.csv"
+    output_file: str = "data/consolidated_stock_list.csv",
+    db_file: str = "data/securities.db",
+    history_file: str = "data/ticker_history.csv"
 ) -> None:
     """
     Generates a CIK-to-ticker mapping using JSON and TXT files, with JSON as primary source and TXT as fallback.
     
+    The mapping is upserted into the security store, which keeps IPO dates
+    found by earlier runs, and exported to the output CSV. CIKs are joined
+    as int32 rather than zero-padded strings, and exchanges are categorical.
+    Tickers the new mapping replaces are recorded in the ticker history for
+    point-in-time resolution by the security master.
+    
     Args:
         filings_dir (str): Directory containing CIK folders
         json_file (str): Path to company_tickers_exchange.json
         txt_file (str): Path to ticker.txt
         output_file (str): Path to save the output CSV
+        db_file (str): Path to the security store database
+        history_file (str): Path to the ticker history CSV
     """
     if filings_dir is None:
         filings_dir = os.path.join(config.get("storage.filings_dir", "data/edgar"), "filings")
@@ -40,8 +58,7 @@ def generate_cik_ticker_mapping(
     # Step 1: Load CIK list from filings directory
     cik_folders = [folder for folder in os.listdir(filings_dir)
                    if os.path.isdir(os.path.join(filings_dir, folder))]
-    my_ciks_df = pd.DataFrame(
-        {"cik": [f"{int(cik):010d}" for cik in cik_folders]})
+    my_ciks_df = pd.DataFrame({"cik": cik_ids(pd.Series(cik_folders, dtype=str))})
     
     # Step 2: Load JSON file
     with open(json_file, 'r') as f:
@@ -53,13 +70,12 @@ def generate_cik_ticker_mapping(
     # Step 3: Create DataFrame from JSON with correct column order
     json_df = pd.DataFrame(tickers_list, columns=[
                            "cik", "name", "ticker", "exchange"])
-    json_df["cik"] = json_df["cik"].apply(
-        lambda x: f"{int(x):010d}" if isinstance(x, int) else x.zfill(10))
+    json_df["cik"] = cik_ids(json_df["cik"])
     
     # Step 4: Load TXT file for fallback
     txt_df = pd.read_csv(txt_file, sep="\t", header=None,
                          names=["ticker", "cik"], dtype=str)
-    txt_df["cik"] = txt_df["cik"].apply(lambda x: x.zfill(10))
+    txt_df["cik"] = cik_ids(txt_df["cik"])
     
     # Step 5: Merge and process with progress bar
     total_steps = 3  # Merging with JSON, handling not found, combining results
@@ -84,131 +100,255 @@ def generate_cik_ticker_mapping(
         final_df = pd.concat([found, merged_txt], ignore_index=True)
         final_df["ticker"] = final_df["ticker"].fillna("Not Found")
         final_df = final_df[["cik", "name", "ticker", "exchange"]]
+        final_df["exchange"] = final_df["exchange"].astype("category")
         pbar.update(1)
         pbar.set_description("Combined results")
     
-    # Step 6: Save to CSV
-    final_df.to_csv(output_file, index=False)
+    # Step 6: Save to the security store and export the CSV
+    store = SecurityStore(db_file)
+    record_ticker_changes(store.read(), final_df, history_file)
+    store.upsert_securities(final_df, prune=True)
+    store.export_csv(output_file)
     logger.info(f"Saved mapping for {len(final_df)} rows to {output_file}")
 
 
-def update_ipo_dates(file_path: str = "data/consolidated_stock_list.csv") -> None:
+def update_ipo_dates(
+    file_path: str = "data/consolidated_stock_list.csv",
+    prices_dir: str = "data/daily_stock_prices",
+    db_file: str = "data/securities.db"
+) -> None:
     """
-    Updates the consolidated stock list CSV with IPO dates for each ticker.
+    Updates the IPO dates in the security store from the price store and exports the CSV.
+    
+    The first trading date of each stored history is recorded during price
+    ingestion, so no additional downloads are needed here. Tickers without
+    stored prices keep their existing dates.
     
     Args:
         file_path (str): Path to the consolidated_stock_list.csv file.
+        prices_dir (str): Directory of the daily price store.
+        db_file (str): Path to the security store database.
     """
-    logger.info(f"Updating IPO dates in {file_path}")
+    logger.info(f"Updating IPO dates in {db_file}")
+    
+    # Step 1: Open the security store, importing the CSV on first use
+    store = open_security_store(db_file, file_path)
+    
+    # Step 2: Load first trading dates from the price store index
+    first_dates = PriceStore(prices_dir).first_trade_dates()
     
-    # Step 1: Read the consolidated stock list
-    stock_list = pd.read_csv(file_path)
+    # Step 3: Update only the tickers with stored prices
+    store.set_ipo_dates(dict(zip(first_dates['ticker'], first_dates['first_date'])))
+    logger.info(f"Found first trading dates for {len(first_dates)} tickers.")
     
-    # Ensure 'ipo_date' column exists; if not, create it with NaN
-    if 'ipo_date' not in stock_list.columns:
-        stock_list['ipo_date'] = pd.NA
+    # Step 4: Export the CSV for compatibility
+    store.export_csv(file_path)
+    logger.info(f"Updated {file_path} with IPO dates.")
+
+
+def _fetch_history(ticker: str) -> Tuple[str, str, Optional[pd.DataFrame], Optional[str]]:
+    """
+    Fetch the full daily price history of a ticker.
     
-    # Step 2: Filter tickers to process
-    # Skip tickers that are "Not Found" or already have a valid IPO date
-    tickers_to_process = stock_list[
-        (stock_list['ticker'] != "Not Found") &
-        (stock_list['ipo_date'].isna() |
-         (stock_list['ipo_date'] == "Not Found"))
-    ]['ticker'].tolist()
+    Args:
+        ticker (str): Ticker symbol
     
-    # Step 3: Function to get IPO date using yfinance
-    def get_ipo_date(ticker):
+    Returns:
+        Tuple[str, str, Optional[pd.DataFrame], Optional[str]]: Ticker, status
+            ("ok", "empty" or "error"), history and error message
+    """
+    try:
+        with metrics.timer("http_request_seconds", source="yfinance"):
+            hist = yf.Ticker(ticker).history(period="max")
+    except Exception as e:
+        metrics.increment("price_lookups_total", status="error")
+        return ticker, "error", None, str(e)
+    status = "empty" if hist.empty else "ok"
+    metrics.increment("price_lookups_total", status=status)
+    return ticker, status, None if hist.empty else hist, None
+
+
+def _write_price_stream(
+    results: queue.Queue,
+    store: PriceStore,
+    db_file: str,
+    batch_size: int,
+    pbar: tqdm,
+    stage: Optional[str] = None
+) -> None:
+    """
+    Persist fetched histories from a queue until the end-of-stream marker.
+    
+    Each history is written and checkpointed as soon as it is taken off the
+    queue. The price index, first trading dates and lookup outcomes are saved
+    every batch_size histories and once more at the end of the stream.
+    
+    Args:
+        results (queue.Queue): Items from _fetch_history, then None
+        store (PriceStore): Price store to write to
+        db_file (str): Path to the security store database
+        batch_size (int): Number of histories between index saves
+        pbar (tqdm): Progress bar to advance per ticker
+        stage (Optional[str]): Metrics stage of the calling thread
+    """
+    with metrics.stage(stage, timed=False):
+        _drain_price_stream(results, store, db_file, batch_size, pbar)
+
+
+def _drain_price_stream(
+    results: queue.Queue,
+    store: PriceStore,
+    db_file: str,
+    batch_size: int,
+    pbar: tqdm
+) -> None:
+    """
+    Body of _write_price_stream, run inside the caller's metrics stage.
+    
+    Args:
+        results (queue.Queue): Items from _fetch_history, then None
+        store (PriceStore): Price store to write to
+        db_file (str): Path to the security store database
+        batch_size (int): Number of histories between index saves
+        pbar (tqdm): Progress bar to advance per ticker
+    """
+    # SQLite connections belong to the thread that opened them
+    checkpoint = JobCheckpoint("stock_prices")
+    securities = SecurityStore(db_file)
+    batch = []
+    lookups = {}
+    
+    def flush():
+        # Keep draining the queue even if bookkeeping fails, or fetchers would block
+        try:
+            with metrics.timer("file_write_seconds", kind="price_index"):
+                store.save_index()
+            securities.set_ipo_dates({tkr: store.index[tkr]['first_date'] for tkr in batch})
+            securities.record_lookups(lookups)
+        except Exception as e:
+            logger.error(f"Error saving price index: {e}")
+        batch.clear()
+        lookups.clear()
+    
+    while True:
+        item = results.get()
+        if item is None:
+            break
+        ticker, status, hist, error = item
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="max")
-            if not hist.empty:
-                return hist.index[0].strftime('%Y-%m-%d')
+            if status == "ok":
+                store.write(ticker, hist)
+                checkpoint.complete(ticker, status)
+                batch.append(ticker)
+                pbar.set_description(f"Downloaded {ticker}")
+            elif status == "empty":
+                checkpoint.complete(ticker, status)
+                pbar.write(f"No data for {ticker}")
             else:
-                return "Not Found"
-        except Exception:
-            return "Not Found"
+                checkpoint.fail(ticker, error)
+                pbar.write(f"Error downloading {ticker}: {error}")
+            lookups[ticker] = status
+        except Exception as e:
+            logger.error(f"Error saving prices for {ticker}: {e}")
+        pbar.update(1)
+        
+        # Save the index periodically
+        if len(batch) >= batch_size:
+            flush()
     
-    # Step 4: Update IPO dates with progress bar
-    if tickers_to_process:
-        logger.info(f"Processing {len(tickers_to_process)} tickers...")
-        for ticker in tqdm(tickers_to_process, desc="Fetching IPO Dates"):
-            ipo_date = get_ipo_date(ticker)
-            # Update the 'ipo_date' column for this ticker
-            stock_list.loc[stock_list['ticker']
-                           == ticker, 'ipo_date'] = ipo_date
-    
-    # Step 5: Save the updated DataFrame back to the CSV
-    stock_list.to_csv(file_path, index=False)
-    logger.info(f"Updated {file_path} with IPO dates.")
+    # End of stream: save whatever the last partial batch holds
+    flush()
+    checkpoint.close()
+    securities.close()
 
 
 def download_daily_stock_prices(
     consolidated_file: str = "data/consolidated_stock_list.csv",
     output_dir: str = "data/daily_stock_prices",
-    batch_size: int = 100
+    batch_size: int = 100,
+    db_file: str = "data/securities.db",
+    resume: bool = True,
+    workers: int = 4,
+    queue_size: int = 32,
+    refresh_before: Optional[str] = None
 ) -> None:
     """
-    Downloads and stores daily stock prices since IPO date for each ticker using yfinance.
+    Downloads and stores the full daily price history for each ticker using yfinance.
+    
+    Fetcher threads push finished histories onto a bounded queue and a single
+    writer thread persists them, so at most queue_size + workers histories
+    are held in memory. Every history is written and checkpointed as soon as
+    the writer receives it, so an interrupted run resumes with the next
+    ticker. The price index, first trading dates and lookup outcomes are
+    saved to the security store every batch_size histories and at the end of
+    the stream. Tickers that returned no data are not requested again. The
+    performance benchmark is always included. Stored histories of listed
+    tickers are only fetched again when written before refresh_before.
     
     Args:
-        consolidated_file (str): Path to consolidated_stock_list.csv with ticker and ipo_date.
+        consolidated_file (str): Path to consolidated_stock_list.csv, imported if the security store is empty.
         output_dir (str): Directory to store daily stock price CSV files.
-        batch_size (int): Number of tickers to process before saving progress.
+        batch_size (int): Number of tickers to process before saving the index.
+        db_file (str): Path to the security store database.
+        resume (bool): Continue from the last checkpoint instead of starting over.
+        workers (int): Number of fetcher threads.
+        queue_size (int): Maximum number of fetched histories waiting to be written.
+        refresh_before (Optional[str]): Fetch stored histories written before this date again (never if None).
     """
     logger.info(f"Downloading daily stock prices to {output_dir}")
     
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
+    store = PriceStore(output_dir)
+    securities = open_security_store(db_file, consolidated_file)
     
-    # Load consolidated stock list
-    df = pd.read_csv(consolidated_file)
-    tickers_with_ipo = df[['ticker', 'ipo_date']].dropna(subset=['ipo_date'])
-    tickers_with_ipo = tickers_with_ipo[tickers_with_ipo['ticker']
-                                        != 'Not Found']
+    # Load tickers from the security store
+    benchmark = config.get("performance.benchmark_ticker", "^GSPC")
+    tickers = pd.DataFrame({'ticker': securities.tickers() + [benchmark]})
+    tickers = tickers.dropna().drop_duplicates()
     
-    # Filter out already processed tickers
-    existing_files = {f.split('.')[0] for f in os.listdir(
-        output_dir) if f.endswith('.csv')}
-    tickers_to_process = tickers_with_ipo[~tickers_with_ipo['ticker'].isin(
-        existing_files)]
+    # Index histories saved after the last index update of an interrupted run
+    checkpoint = JobCheckpoint("stock_prices")
+    if not resume:
+        checkpoint.reset()
+    checkpoint.log_resume()
+    fetched = checkpoint.completed()
+    checkpoint.close()
+    store.refresh_index([tkr for tkr, status in fetched.items() if status == "ok" and tkr not in store.index])
     
-    if not tickers_to_process.empty:
+    # Filter out already processed tickers and lookups that found no data, except stale histories
+    stale = set(store.written_before(refresh_before)) if refresh_before else set()
+    done = ((set(store.tickers()) | set(fetched)) - stale) | set(securities.checked_tickers(["empty"]))
+    if stale:
+        logger.info(f"Refreshing histories written before {refresh_before}")
+    tickers_to_process = tickers.loc[~tickers['ticker'].isin(done), 'ticker'].tolist()
+    
+    if tickers_to_process:
         logger.info(f"Processing {len(tickers_to_process)} tickers...")
-        batch = []
+        results = queue.Queue(maxsize=queue_size)
         
         with tqdm(total=len(tickers_to_process), desc="Downloading Daily Stock Prices") as pbar:
-            for index, row in tickers_to_process.iterrows():
-                ticker = row['ticker']
-                ipo_date = row['ipo_date']
-                
-                # Skip if IPO date is invalid or "Not Found"
-                if ipo_date == "Not Found" or pd.isna(ipo_date):
-                    pbar.update(1)
-                    continue
-                
-                # Download daily stock prices from IPO date to present
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(start=ipo_date)
-                    if not hist.empty:
-                        hist.reset_index(inplace=True)
-                        hist['Date'] = hist['Date'].dt.strftime(
-                            '%Y-%m-%d')  # Ensure consistent date format
-                        batch.append((ticker, hist))
-                        pbar.set_description(f"Downloaded {ticker}")
-                    else:
-                        pbar.write(f"No data for {ticker}")
-                except Exception as e:
-                    pbar.write(f"Error downloading {ticker}: {e}")
-                
-                pbar.update(1)
-                
-                # Save batch periodically
-                if len(batch) >= batch_size or index == len(tickers_to_process) - 1:
-                    for tkr, data in batch:
-                        data.to_csv(os.path.join(
-                            output_dir, f"{tkr}.csv"), index=False)
-                    batch = []
+            writer = threading.Thread(
+                target=_write_price_stream,
+                args=(results, store, db_file, batch_size, pbar, metrics.current_stage()),
+                name="price-writer"
+            )
+            writer.start()
+            stage = metrics.current_stage()
+            
+            def fetch(tkr):
+                with metrics.stage(stage, timed=False):
+                    item = _fetch_history(tkr)
+                with metrics.timer("queue_wait_seconds", queue="prices"):
+                    results.put(item)
+            
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(fetch, ticker) for ticker in tickers_to_process]
+                    for future in futures:
+                        future.result()
+            finally:
+                # Signal the end of the stream so the writer flushes the last batch
+                results.put(None)
+                writer.join()
         
         logger.info(f"Daily stock prices saved to {output_dir}")
     else:
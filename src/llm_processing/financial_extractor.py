@@ -7,8 +7,17 @@ import re
 from typing import Dict, List, Tuple, Optional
 from bs4 import BeautifulSoup
 import openai
+from src.data_acquisition.filing_documents import (
+    DocumentIndex,
+    FilingDocument,
+    primary_document,
+    read_document,
+    xbrl_instance
+)
+from src.llm_processing.inline_xbrl import InlineXbrlDocument, has_inline_xbrl
 from src.utils.config import config
 from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
 
 logger = setup_logger(__name__, "logs/financial_extractor.log")
 
@@ -34,27 +43,34 @@ class FinancialDataExtractor:
         
         # Precompile regex for us-gaap tags
         self.us_gaap_regex = re.compile(r'us-gaap:.*', re.I)
+        
+        # Byte ranges of the documents in each submission, so only the needed one is read
+        self.document_index = DocumentIndex(config.get("storage.document_index", "data/edgar/document_index.db"))
     
-    def _get_cache_path(self, cik: str, year: str) -> str:
+    def _get_cache_path(self, cik: str, accession: str) -> str:
         """
-        Get cache file path for a CIK and year.
+        Get cache file path for a filing.
+        
+        Responses are keyed by accession number: entries of the former
+        {cik}_{year} layout, whose year was the filing year rather than the
+        fiscal year, are never read.
         
         Args:
             cik (str): CIK identifier
-            year (str): Fiscal year
+            accession (str): Accession number of the filing
             
         Returns:
             str: Cache file path
         """
-        return os.path.join(self.cache_dir, f"{cik}_{year}.json")
+        return os.path.join(self.cache_dir, f"{cik}_{accession}.json")
     
-    def _load_from_cache(self, cik: str, year: str) -> Optional[Dict]:
+    def _load_from_cache(self, cik: str, accession: str) -> Optional[Dict]:
         """
-        Load cached response for a CIK and year.
+        Load cached response for a filing.
         
         Args:
             cik (str): CIK identifier
-            year (str): Fiscal year
+            accession (str): Accession number of the filing
             
         Returns:
             Optional[Dict]: Cached response or None if not found
@@ -62,33 +78,54 @@ class FinancialDataExtractor:
         if not self.cache_responses:
             return None
             
-        cache_path = self._get_cache_path(cik, year)
+        cache_path = self._get_cache_path(cik, accession)
         if os.path.exists(cache_path):
             try:
                 with open(cache_path, 'r') as f:
-                    return json.load(f)
+                    data = json.load(f)
+                metrics.increment("llm_cache_total", result="hit")
+                return data
             except Exception as e:
-                logger.warning(f"Error loading cache for {cik}_{year}: {e}")
+                logger.warning(f"Error loading cache for {cik}_{accession}: {e}")
+        metrics.increment("llm_cache_total", result="miss")
         return None
     
-    def _save_to_cache(self, cik: str, year: str, data: Dict) -> None:
+    def _save_to_cache(self, cik: str, accession: str, data: Dict) -> None:
         """
         Save response to cache.
         
         Args:
             cik (str): CIK identifier
-            year (str): Fiscal year
+            accession (str): Accession number of the filing
             data (Dict): Data to cache
         """
         if not self.cache_responses:
             return
             
-        cache_path = self._get_cache_path(cik, year)
+        cache_path = self._get_cache_path(cik, accession)
         try:
             with open(cache_path, 'w') as f:
                 json.dump(data, f)
         except Exception as e:
-            logger.warning(f"Error saving cache for {cik}_{year}: {e}")
+            logger.warning(f"Error saving cache for {cik}_{accession}: {e}")
+    
+    def _read_filing(self, filing_path: str, document: Optional[FilingDocument] = None) -> str:
+        """
+        Read one document of a filing, or the whole file.
+        
+        Args:
+            filing_path (str): Path to the filing file
+            document (Optional[FilingDocument]): Document to read (the whole file if None)
+        
+        Returns:
+            str: Text of the document or file
+        """
+        if document is not None:
+            return read_document(filing_path, document).decode('utf-8', 'replace')
+        with open(filing_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        metrics.increment("filing_bytes_read_total", len(content), scope="file")
+        return content
     
     def _extract_financial_metrics_with_llm(self, filing_text: str) -> Dict[str, float]:
         """
@@ -130,15 +167,17 @@ class FinancialDataExtractor:
         """
         
         try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a financial analyst expert at extracting financial metrics from SEC filings."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.0,  # Use low temperature for consistent extraction
-                max_tokens=1000
-            )
+            with metrics.timer("llm_request_seconds", model=self.model):
+                response = openai.ChatCompletion.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": "You are a financial analyst expert at extracting financial metrics from SEC filings."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.0,  # Use low temperature for consistent extraction
+                    max_tokens=1000
+                )
+            metrics.increment("llm_requests_total", model=self.model)
             
             # Extract JSON from response
             content = response.choices[0].message.content
@@ -156,7 +195,13 @@ class FinancialDataExtractor:
             logger.error(f"Error extracting financial metrics with LLM: {e}")
             return {}
     
-    def extract_from_filing(self, cik: str, year: str, filing_path: str) -> Dict[str, float]:
+    def extract_from_filing(
+        self,
+        cik: str,
+        year: str,
+        filing_path: str,
+        accession: Optional[str] = None
+    ) -> Dict[str, float]:
         """
         Extract financial metrics from a filing.
         
@@ -164,22 +209,22 @@ class FinancialDataExtractor:
             cik (str): CIK identifier
             year (str): Fiscal year
             filing_path (str): Path to the filing file
+            accession (Optional[str]): Accession number keying the response cache (not cached if None)
             
         Returns:
             Dict[str, float]: Extracted financial metrics
         """
         # Check cache first
-        cached_data = self._load_from_cache(cik, year)
+        cached_data = self._load_from_cache(cik, accession) if accession else None
         if cached_data is not None:
-            logger.info(f"Loaded cached data for {cik}_{year}")
+            logger.info(f"Loaded cached data for {cik}_{accession}")
             return cached_data
         
         logger.info(f"Extracting financial metrics for {cik}_{year}")
         
-        # Read filing content
+        # Read the form itself, without its exhibits and XBRL files
         try:
-            with open(filing_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            content = self._read_filing(filing_path, primary_document(self.document_index.documents(filing_path)))
         except Exception as e:
             logger.error(f"Error reading {filing_path}: {e}")
             return {}
@@ -188,7 +233,8 @@ class FinancialDataExtractor:
         metrics = self._extract_financial_metrics_with_llm(content)
         
         # Save to cache
-        self._save_to_cache(cik, year, metrics)
+        if accession:
+            self._save_to_cache(cik, accession, metrics)
         
         return metrics
     
@@ -206,19 +252,51 @@ class FinancialDataExtractor:
         """
         logger.info(f"Extracting XBRL data for {cik}_{year}")
         
+        # Locate the form and the XBRL instance within the submission
+        try:
+            documents = self.document_index.documents(filing_path)
+        except Exception as e:
+            logger.error(f"Error indexing {filing_path}: {e}")
+            return {}
+        primary = primary_document(documents)
+        if primary is not None:
+            start, end, scope = primary.start, primary.end, "document"
+        else:
+            start, end, scope = 0, os.path.getsize(filing_path), "file"
+        
+        # Inline XBRL facts are read in a streaming pass rather than from a parsed DOM
+        try:
+            if has_inline_xbrl(filing_path, start, end):
+                with metrics.timer("xbrl_parse_seconds", format="inline"):
+                    document = InlineXbrlDocument.parse(filing_path, start=start, end=end)
+                metrics.increment("xbrl_filings_total", result="inline")
+                metrics.increment("filing_bytes_read_total", end - start, scope=scope)
+                return document.facts_for_year(year)
+        except Exception as e:
+            logger.error(f"Error reading inline XBRL from {filing_path}: {e}")
+            return {}
+        
+        # Submissions keep the XBRL instance in a document of its own
+        instance = xbrl_instance(documents)
+        if documents and instance is None:
+            metrics.increment("xbrl_filings_total", result="no_xbrl")
+            return {}
+        
         # Read filing content
         try:
-            with open(filing_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            content = self._read_filing(filing_path, instance)
         except Exception as e:
             logger.error(f"Error reading {filing_path}: {e}")
             return {}
         
         # Quick check for XBRL content
         if '<context' not in content.lower():
+            metrics.increment("xbrl_filings_total", result="no_xbrl")
             return {}
         
-        soup = BeautifulSoup(content, 'lxml')
+        with metrics.timer("xbrl_parse_seconds", format="instance"):
+            soup = BeautifulSoup(content, 'lxml')
+        metrics.increment("xbrl_filings_total", result="parsed")
         context_elements = soup.find_all('context')
         if not context_elements:
             return {}
@@ -229,8 +307,8 @@ class FinancialDataExtractor:
             context_id = context.get('id')
             period = context.find('period')
             if period:
-                # Try to extract year from period
-                for tag in ['instant', 'endDate', 'startDate']:
+                # Try to extract year from period (the HTML parser lowercases tag names)
+                for tag in ['instant', 'enddate', 'startdate']:
                     date_tag = period.find(tag)
                     if date_tag:
                         date_str = date_tag.text.strip()
@@ -245,7 +323,7 @@ class FinancialDataExtractor:
             return {}
         
         # Extract metrics
-        metrics = {}
+        extracted = {}
         for element in soup.find_all(self.us_gaap_regex):
             try:
                 value = float(element.text.strip())
@@ -254,9 +332,9 @@ class FinancialDataExtractor:
             context_ref = element.get('contextref')
             if context_ref in context_to_year and context_to_year[context_ref] == int(year):
                 tag = element.name.lower()
-                metrics[tag] = value
+                extracted[tag] = value
         
-        return metrics
+        return extracted
     
     def validate_and_combine(
         self, 
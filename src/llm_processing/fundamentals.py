@@ -0,0 +1,282 @@
+"""
+Fundamentals table builder for the Stock Selector project.
+"""
+import os
+import uuid
+from itertools import groupby
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from typing import Dict, List, Optional
+from src.data_acquisition.compact_tables import load_filings_list
+from src.data_acquisition.filing_headers import index_filing_headers
+from src.data_acquisition.filing_index import build_filing_index, is_amendment
+from src.llm_processing.financial_extractor import FinancialDataExtractor
+from src.llm_processing.tag_normalization import default_normalizer
+from src.utils.checkpoint import JobCheckpoint
+from src.utils.config import config
+from src.utils.logger import setup_logger
+from src.utils.work_queue import WorkQueue, partition, run_worker
+
+logger = setup_logger(__name__, "logs/fundamentals.log")
+
+# Metrics requested from the LLM and kept from XBRL facts
+CANONICAL_METRICS = [
+    "NetIncomeLoss",
+    "EarningsPerShareBasic",
+    "DebtCurrent",
+    "LongTermDebt",
+    "CashAndCashEquivalentsAtCarryingValue",
+    "OperatingIncomeLoss",
+    "StockholdersEquity",
+    "Revenues",
+    "IncomeTaxExpenseBenefit",
+    "IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest",
+    "DepreciationDepletionAndAmortization",
+    "EarningsBeforeInterestTaxesDepreciationAmortizationEBITDA"
+]
+
+FILING_COLUMNS = ["cik", "fiscal_year", "filing_date", "form", "sic", "accession_number"]
+
+# Version of the extracted rows; raise it whenever extraction or normalization
+# changes so checkpointed rows of earlier versions are extracted again
+EXTRACTOR_VERSION = 7
+
+
+def normalize_metrics(metrics: Dict[str, float]) -> Dict[str, float]:
+    """
+    Map extracted metric names to canonical names, dropping unknown ones.
+    
+    XBRL tags are extracted in lowercase while the LLM returns canonical names,
+    so the lookup is case-insensitive. Legacy and alternative us-gaap tags,
+    such as SalesRevenueNet for Revenues, resolve through the tag taxonomy,
+    the metric's own tag taking precedence.
+    
+    Args:
+        metrics (Dict[str, float]): Extracted metrics
+    
+    Returns:
+        Dict[str, float]: Metrics keyed by canonical name
+    """
+    return default_normalizer().normalize(metrics)
+
+
+def _extract_filing(
+    filing,
+    extractor: FinancialDataExtractor,
+    checkpoint: JobCheckpoint,
+    done: Dict,
+    header_sic: Dict[str, int]
+) -> Optional[Dict]:
+    """
+    Extract the metrics a filing reports itself, reusing its checkpointed row.
+    
+    Args:
+        filing: Filing index row
+        extractor (FinancialDataExtractor): Metric extractor
+        checkpoint (JobCheckpoint): Checkpoint of the extraction job
+        done (Dict): Checkpointed rows by filing path
+        header_sic (Dict[str, int]): SIC code by absolute filing path
+    
+    Returns:
+        Optional[Dict]: Row with FILING_COLUMNS and metrics, or None if the filing holds no financial data
+    """
+    filing_path = filing.path
+    if filing_path in done:
+        return done[filing_path]
+    if not os.path.exists(filing_path):
+        return None
+    cik, year = str(filing.cik), str(filing.fiscal_year)
+    
+    # Prefer structured XBRL facts and fall back to the LLM, except for amendments
+    # without XBRL, which rarely restate the financial statements
+    xbrl_metrics = extractor.extract_from_xbrl(cik, year, filing_path)
+    llm_metrics = {}
+    if not xbrl_metrics and not is_amendment(filing.form):
+        llm_metrics = extractor.extract_from_filing(cik, year, filing_path, filing.accession_number)
+    metrics = normalize_metrics(extractor.validate_and_combine(xbrl_metrics, llm_metrics))
+    row = None
+    if metrics:
+        row = {
+            "cik": int(filing.cik),
+            "fiscal_year": int(filing.fiscal_year),
+            "filing_date": filing.filing_date.strftime("%Y-%m-%d"),
+            "form": filing.form,
+            "sic": int(header_sic.get(os.path.abspath(filing_path), 0)),
+            "accession_number": filing.accession_number,
+            **metrics
+        }
+    checkpoint.complete(filing_path, row)
+    return row
+
+
+def _extract_filings(
+    index: pd.DataFrame,
+    extractor: FinancialDataExtractor,
+    checkpoint: JobCheckpoint,
+    done: Dict,
+    header_sic: Dict[str, int],
+    progress: bool = True
+) -> List[Dict]:
+    """
+    Extract the first and the latest filing of each fiscal period of a filing index.
+    
+    The first filing of a period gives a row as of its own filing date. The
+    latest filing with financial data gives a later row holding the metrics
+    known by then: the first filing's, overlaid with those it restates. Only
+    when the latest filings hold no financial data, such as amendments that
+    only add exhibits, are earlier ones read in its place; filings superseded
+    by a later one, or refiled on the same day, are not extracted.
+    
+    Args:
+        index (pd.DataFrame): Filing index rows, every filing of a period included
+        extractor (FinancialDataExtractor): Metric extractor
+        checkpoint (JobCheckpoint): Checkpoint of the extraction job
+        done (Dict): Checkpointed rows by filing path
+        header_sic (Dict[str, int]): SIC code by absolute filing path
+        progress (bool): Show a progress bar
+    
+    Returns:
+        List[Dict]: Up to two rows per fiscal period
+    """
+    rows = []
+    filings = index.itertuples(index=False)
+    if progress:
+        filings = tqdm(filings, total=len(index), desc="Extracting Fundamentals")
+    
+    for _, period in groupby(filings, key=lambda filing: (filing.cik, filing.fiscal_year)):
+        # The index ranks a period's filings from the latest filed
+        *later, first = list(period)
+        latest = None
+        for filing in later:
+            latest = _extract_filing(filing, extractor, checkpoint, done, header_sic)
+            if latest is not None:
+                break
+        
+        # A filing refiled on the same day is superseded from the start
+        period_rows = [latest]
+        if latest is None or first.filing_date < filing.filing_date:
+            period_rows.insert(0, _extract_filing(first, extractor, checkpoint, done, header_sic))
+        
+        metrics = {}
+        for row in period_rows:
+            if row is None:
+                continue
+            metrics.update({name: value for name, value in row.items() if name not in FILING_COLUMNS})
+            rows.append({**{column: row[column] for column in FILING_COLUMNS}, **metrics})
+    return rows
+
+
+def extract_fundamentals(
+    filings_list_file: str = None,
+    filings_dir: str = None,
+    output_file: str = None,
+    resume: bool = True,
+    queue: Optional[WorkQueue] = None
+) -> pd.DataFrame:
+    """
+    Extract canonical metrics from every downloaded filing into one table.
+    
+    Each row keeps the filing date so that analyses can restrict themselves to
+    facts that were public at a given date. The row extracted from each filing
+    is checkpointed under EXTRACTOR_VERSION, so a restarted run only processes
+    new filings and rows of an earlier extractor version are never reused.
+    
+    The fiscal year and industry of each filing come from the header index,
+    so companies whose fiscal year does not end in December are aligned on
+    the period they report rather than the year they filed in.
+    
+    Annual reports and their amendments are indexed by accession number. The
+    latest filing of a fiscal period that holds financial data adds a row as
+    of its own filing date, with its metrics overlaid on the first filing's,
+    so the first filing stays in effect until then. Filings in between are
+    superseded and not extracted.
+    
+    With a work queue, the fiscal periods are partitioned into units shared
+    with the other workers of the queue. Each worker extracts the units it
+    claims and stores their rows with them in the queue; once no unit is
+    left, every worker writes the table assembled from all units.
+    
+    Args:
+        filings_list_file (str): Path to the filings list (storage.filings_list if None)
+        filings_dir (str): Directory containing downloaded filings
+        output_file (str): Path to save the fundamentals CSV
+        resume (bool): Reuse checkpointed rows instead of extracting every filing again
+        queue (Optional[WorkQueue]): Queue shared by the workers of a distributed extraction
+    
+    Returns:
+        pd.DataFrame: One row per filing with financial data, with FILING_COLUMNS and CANONICAL_METRICS
+    """
+    if filings_dir is None:
+        filings_dir = os.path.join(config.get("storage.filings_dir", "data/edgar"), "filings")
+    if output_file is None:
+        output_file = os.path.join(
+            config.get("storage.processed_data_dir", "data/processed"), "fundamentals.csv")
+    
+    logger.info(f"Extracting fundamentals from filings in {filings_dir}")
+    
+    filings = load_filings_list(filings_list_file)
+    
+    # Fiscal years and SIC codes from the filing headers, read in one parallel pass
+    headers = index_filing_headers(filings_dir)
+    header_sic = dict(zip(headers["path"], headers["sic"]))
+    
+    # Annual filings by company and fiscal period, amendments linked to their originals
+    index = build_filing_index(filings, filings_dir, headers)
+    index_file = config.get("storage.filing_index", "data/edgar/filing_index.csv")
+    os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+    index.to_csv(index_file, index=False)
+    
+    extractor = FinancialDataExtractor()
+    checkpoint = JobCheckpoint(f"extract_fundamentals_v{EXTRACTOR_VERSION}")
+    if not resume:
+        checkpoint.reset()
+    checkpoint.log_resume()
+    done = checkpoint.completed()
+    
+    if queue is None:
+        rows = _extract_filings(index, extractor, checkpoint, done, header_sic)
+    else:
+        # Units of whole periods, in index order, so every worker derives the same ones
+        periods = index[["cik", "fiscal_year"]].drop_duplicates()
+        queue.add(
+            partition(periods.to_numpy().tolist(), config.get("work_queue.unit_size", 500)),
+            version=str(EXTRACTOR_VERSION)
+        )
+        positions = index.groupby(["cik", "fiscal_year"], sort=False).indices
+        
+        def process(unit_periods: List[List[int]]) -> List[Dict]:
+            unit_index = index.iloc[np.concatenate([positions[tuple(period)] for period in unit_periods])]
+            return _extract_filings(unit_index, extractor, checkpoint, done, header_sic, progress=False)
+        
+        run_worker(queue, process)
+        failed = queue.counts()["failed"]
+        if failed:
+            logger.warning(f"{failed} units of {queue.job} failed; their periods are missing")
+        rows = [row for unit_rows in queue.results().values() for row in unit_rows]
+    
+    fundamentals = pd.DataFrame(rows, columns=FILING_COLUMNS + CANONICAL_METRICS)
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    
+    # Workers finishing together write the same table; each replaces it whole
+    temp_file = f"{output_file}.{uuid.uuid4().hex}.part"
+    fundamentals.to_csv(temp_file, index=False)
+    os.replace(temp_file, output_file)
+    logger.info(f"Saved fundamentals for {len(fundamentals)} filings to {output_file}")
+    return fundamentals
+
+
+def load_fundamentals(file_path: str = None) -> pd.DataFrame:
+    """
+    Load the fundamentals table with parsed filing dates.
+    
+    Args:
+        file_path (str): Path to the fundamentals CSV
+    
+    Returns:
+        pd.DataFrame: Fundamentals table
+    """
+    if file_path is None:
+        file_path = os.path.join(
+            config.get("storage.processed_data_dir", "data/processed"), "fundamentals.csv")
+    return pd.read_csv(file_path, parse_dates=["filing_date"])
\ No newline at end of file
@@ -0,0 +1,456 @@
+"""
+Streaming inline XBRL fact extraction for the Stock Selector project.
+"""
+import html
+import mmap
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/inline_xbrl.log")
+
+# Inline XBRL and context elements; their prefix is required, since the default namespace is XHTML
+_TAG_REGEX = re.compile(
+    rb"<(/?)[a-z][\w.-]*:(nonfraction|nonnumeric|continuation|context|instant|startdate|enddate"
+    rb"|explicitmember|typedmember)\b([^>]*)>",
+    re.I
+)
+_ATTRIBUTE_REGEX = re.compile(rb"""([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_MARKUP_REGEX = re.compile(rb"<[^>]*>")
+_EXCLUDE_REGEX = re.compile(rb"<(?:[a-z][\w.-]*:)?exclude\b.*?</(?:[a-z][\w.-]*:)?exclude\s*>", re.I | re.S)
+_INLINE_MARKER_REGEX = re.compile(rb"<ix:(?:nonfraction|header)\b", re.I)
+
+# Transformation formats (local name without hyphens) that need more than removing grouping separators
+_ZERO_FORMATS = {"fixedzero", "zerodash", "numdash"}
+_COMMA_DECIMAL_FORMATS = {"numcommadecimal", "numdotcomma", "numspacecomma", "numcomma"}
+_UNIT_DECIMAL_FORMATS = {"numunitdecimal", "numunitdecimalin"}
+_WORD_FORMATS = {"numwordsen", "numworden"}
+
+_SMALL_NUMBERS = {
+    word: value for value, word in enumerate(
+        "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+        "fifteen sixteen seventeen eighteen nineteen".split()
+    )
+}
+_SMALL_NUMBERS.update({
+    word: 10 * (value + 2) for value, word in enumerate(
+        "twenty thirty forty fifty sixty seventy eighty ninety".split())
+})
+_SMALL_NUMBERS.update({"no": 0, "none": 0})
+_LARGE_NUMBERS = {"thousand": 10 ** 3, "million": 10 ** 6, "billion": 10 ** 9, "trillion": 10 ** 12}
+
+# Length in days of the durations accepted as a fiscal year, 52/53-week years included
+_ANNUAL_DAYS = (350, 380)
+
+
+class InlineFact:
+    """One fact of an inline XBRL document."""
+    
+    __slots__ = ("name", "context_ref", "value", "unit_ref", "decimals")
+    
+    def __init__(
+        self,
+        name: str,
+        context_ref: str,
+        value,
+        unit_ref: Optional[str] = None,
+        decimals: Optional[str] = None
+    ):
+        """
+        Initialize the fact.
+        
+        Args:
+            name (str): Concept name as written, e.g. us-gaap:Revenues
+            context_ref (str): Context identifier
+            value: float for numeric facts, str for text facts
+            unit_ref (Optional[str]): Unit identifier of numeric facts
+            decimals (Optional[str]): Decimals attribute of numeric facts
+        """
+        self.name = name
+        self.context_ref = context_ref
+        self.value = value
+        self.unit_ref = unit_ref
+        self.decimals = decimals
+
+
+def _attributes(raw: bytes) -> Dict[str, str]:
+    """
+    Parse the attributes of a tag.
+    
+    Args:
+        raw (bytes): Text between the tag name and the closing bracket
+    
+    Returns:
+        Dict[str, str]: Attribute values by lowercase name
+    """
+    return {
+        name.decode("ascii", "replace").lower(): html.unescape(
+            (double if double is not None else single).decode("utf-8", "replace"))
+        for name, double, single in _ATTRIBUTE_REGEX.findall(raw)
+    }
+
+
+def _text(content: bytes, separator: bytes = b"") -> str:
+    """
+    Get the text of a fact, without markup and excluded content.
+    
+    Args:
+        content (bytes): Markup between the fact's opening and closing tags
+        separator (bytes): What removed tags are replaced with
+    
+    Returns:
+        str: Unescaped text
+    """
+    if b"xclude" in content:
+        content = _EXCLUDE_REGEX.sub(b"", content)
+    return html.unescape(_MARKUP_REGEX.sub(separator, content).decode("utf-8", "replace"))
+
+
+def _words_to_number(text: str) -> Optional[int]:
+    """
+    Convert an English number in words, e.g. "two hundred fifty", to an integer.
+    
+    Args:
+        text (str): Number in words
+    
+    Returns:
+        Optional[int]: Number, or None if a word is not a number
+    """
+    total = current = 0
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if word == "and":
+            continue
+        if word in _SMALL_NUMBERS:
+            current += _SMALL_NUMBERS[word]
+        elif word == "hundred":
+            current *= 100
+        elif word in _LARGE_NUMBERS:
+            total += current * _LARGE_NUMBERS[word]
+            current = 0
+        else:
+            return None
+    return total + current
+
+
+def parse_number(text: str, number_format: Optional[str] = None) -> Optional[Decimal]:
+    """
+    Parse the displayed value of a nonFraction fact according to its format.
+    
+    Args:
+        text (str): Displayed text, e.g. "1,234.5"
+        number_format (Optional[str]): format attribute, e.g. ixt:num-dot-decimal
+    
+    Returns:
+        Optional[Decimal]: Unscaled, unsigned value, or None if the text does not parse
+    """
+    fmt = (number_format or "").rpartition(":")[2].replace("-", "").lower()
+    text = text.strip()
+    if fmt in _ZERO_FORMATS:
+        return Decimal(0)
+    if fmt in _WORD_FORMATS:
+        number = _words_to_number(text)
+        return None if number is None else Decimal(number)
+    if fmt in _UNIT_DECIMAL_FORMATS:
+        groups = re.findall(r"\d+", text)
+        if not groups:
+            return None
+        text = groups[0] + (f".{groups[1]}" if len(groups) > 1 else "")
+    elif fmt in _COMMA_DECIMAL_FORMATS:
+        text = re.sub(r"[.\s' ]", "", text).replace(",", ".")
+    else:
+        text = re.sub(r"[,\s' ]", "", text)
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+class InlineXbrlDocument:
+    """
+    Facts and contexts of an inline XBRL filing, read in one streaming pass.
+    
+    The file is memory-mapped and scanned for inline XBRL and context tags
+    only, so the HTML around the facts is never parsed into a tree and memory
+    stays flat however large the filing is. Numeric facts are scaled and
+    signed from their scale and sign attributes; text facts are joined with
+    their continuations.
+    """
+    
+    def __init__(self):
+        """Initialize an empty document."""
+        self.contexts: Dict[str, Dict[str, object]] = {}
+        self.facts: List[InlineFact] = []
+        self.skipped = 0
+    
+    @classmethod
+    def parse(
+        cls,
+        file_path: str,
+        text_facts: bool = False,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> "InlineXbrlDocument":
+        """
+        Read the facts and contexts of a filing.
+        
+        Args:
+            file_path (str): Path to an HTML filing or full-submission text file
+            text_facts (bool): Also read nonNumeric facts and their continuations
+            start (int): Byte offset to start at, e.g. of one document of a submission
+            end (Optional[int]): Byte offset to stop at (end of file if None)
+        
+        Returns:
+            InlineXbrlDocument: Parsed document
+        """
+        document = cls()
+        with open(file_path, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                return document
+            try:
+                document._scan(data, text_facts, start, len(data) if end is None else end)
+            finally:
+                data.close()
+        return document
+    
+    def _scan(self, data, text_facts: bool, start: int, end: int) -> None:
+        """
+        Collect facts and contexts from the tags of a document.
+        
+        Args:
+            data: Document bytes or memory map
+            text_facts (bool): Also read nonNumeric facts and their continuations
+            start (int): Byte offset to start at
+            end (int): Byte offset to stop at
+        """
+        open_facts = []
+        context = None
+        period_field = None
+        text_parts: Dict[str, tuple] = {}
+        chained = []
+        
+        for match in _TAG_REGEX.finditer(data, start, end):
+            closing, tag, raw = match.group(1), match.group(2).lower(), match.group(3)
+            
+            # Step 1: Contexts and their periods
+            if tag == b"context":
+                if closing:
+                    context = None
+                else:
+                    context_id = _attributes(raw).get("id")
+                    context = self.contexts.setdefault(context_id, {"dimensional": False})
+            elif tag in (b"instant", b"startdate", b"enddate"):
+                if context is None:
+                    continue
+                if closing and period_field is not None:
+                    context[period_field[0]] = data[period_field[1]:match.start()].decode("ascii", "replace").strip()
+                    period_field = None
+                elif not closing:
+                    period_field = (tag.decode(), match.end())
+            elif tag in (b"explicitmember", b"typedmember"):
+                if context is not None:
+                    context["dimensional"] = True
+            
+            # Step 2: Facts, whose content runs to the matching closing tag
+            elif tag in (b"nonnumeric", b"continuation") and not text_facts:
+                continue
+            elif not closing:
+                if raw.rstrip().endswith(b"/"):
+                    # Empty elements are nil facts
+                    continue
+                open_facts.append((tag, raw, match.end()))
+            else:
+                while open_facts and open_facts[-1][0] != tag:
+                    open_facts.pop()
+                if not open_facts:
+                    continue
+                _, raw_open, start = open_facts.pop()
+                attributes = _attributes(raw_open)
+                content = data[start:match.start()]
+                if tag == b"nonfraction":
+                    self._add_number(attributes, _text(content))
+                elif tag == b"nonnumeric":
+                    if attributes.get("continuedat"):
+                        chained.append((attributes, _text(content, b" ")))
+                    else:
+                        self._add_text(attributes, _text(content, b" "))
+                else:
+                    text_parts[attributes.get("id")] = (_text(content, b" "), attributes.get("continuedat"))
+        
+        # Step 3: Join text facts with their continuations
+        for attributes, text in chained:
+            parts = [text]
+            seen = set()
+            continued_at = attributes.get("continuedat")
+            while continued_at in text_parts and continued_at not in seen:
+                seen.add(continued_at)
+                part, continued_at = text_parts[continued_at]
+                parts.append(part)
+            self._add_text(attributes, " ".join(parts))
+    
+    def _add_number(self, attributes: Dict[str, str], text: str) -> None:
+        """
+        Record a nonFraction fact with its scale and sign applied.
+        
+        Args:
+            attributes (Dict[str, str]): Attributes of the fact
+            text (str): Displayed value
+        """
+        if attributes.get("xsi:nil") == "true":
+            return
+        number = parse_number(text, attributes.get("format"))
+        if number is None:
+            self.skipped += 1
+            logger.debug(f"Skipping {attributes.get('name')} with unparseable value {text!r}")
+            return
+        try:
+            number = number.scaleb(int(attributes.get("scale", 0)))
+        except ValueError:
+            self.skipped += 1
+            return
+        if attributes.get("sign") == "-":
+            number = -number
+        self.facts.append(InlineFact(
+            attributes.get("name", ""),
+            attributes.get("contextref"),
+            float(number),
+            attributes.get("unitref"),
+            attributes.get("decimals")
+        ))
+    
+    def _add_text(self, attributes: Dict[str, str], text: str) -> None:
+        """
+        Record a nonNumeric fact.
+        
+        Args:
+            attributes (Dict[str, str]): Attributes of the fact
+            text (str): Text of the fact and its continuations
+        """
+        self.facts.append(InlineFact(attributes.get("name", ""), attributes.get("contextref"), " ".join(text.split())))
+    
+    def context_year(self, context_id: str) -> Optional[int]:
+        """
+        Get the year of a context's instant, end date or start date, in that order.
+        
+        Args:
+            context_id (str): Context identifier
+        
+        Returns:
+            Optional[int]: Year, or None if the context has no parseable date
+        """
+        context = self.contexts.get(context_id)
+        if context is None:
+            return None
+        for field in ("instant", "enddate", "startdate"):
+            value = context.get(field)
+            if value and len(value) >= 4:
+                try:
+                    return int(value[:4])
+                except ValueError:
+                    continue
+        return None
+    
+    def _context_date(self, context_id: str, field: str) -> Optional[date]:
+        """
+        Get a date of a context.
+        
+        Args:
+            context_id (str): Context identifier
+            field (str): "instant", "startdate" or "enddate"
+        
+        Returns:
+            Optional[date]: Date, or None if the context has no parseable value
+        """
+        value = self.contexts.get(context_id, {}).get(field)
+        try:
+            return date.fromisoformat(value[:10]) if value else None
+        except ValueError:
+            return None
+    
+    def annual_contexts(self, year) -> List[str]:
+        """
+        Get the contexts of the annual period of report ending in a fiscal year.
+        
+        The period of report is the latest end of an entity-wide duration of
+        about twelve months that falls in the year. Its contexts are those
+        durations and the entity-wide instants on the same date; quarters,
+        such as a fourth quarter reported next to the year, and dimensional
+        contexts, such as segments, are left out.
+        
+        Args:
+            year: Fiscal year
+        
+        Returns:
+            List[str]: Context identifiers, empty if the year has no annual duration
+        """
+        year = int(year)
+        durations, instants = {}, {}
+        for context_id, context in self.contexts.items():
+            if context["dimensional"]:
+                continue
+            instant = self._context_date(context_id, "instant")
+            if instant is not None:
+                instants[context_id] = instant
+                continue
+            start, end = self._context_date(context_id, "startdate"), self._context_date(context_id, "enddate")
+            if start is not None and end is not None and _ANNUAL_DAYS[0] <= (end - start).days <= _ANNUAL_DAYS[1]:
+                durations[context_id] = end
+        
+        ends = [end for end in durations.values() if end.year == year]
+        if not ends:
+            return []
+        period_end = max(ends)
+        return [
+            context_id for context_id, end in {**durations, **instants}.items() if end == period_end
+        ]
+    
+    def facts_for_year(self, year, prefix: str = "us-gaap:") -> Dict[str, float]:
+        """
+        Get the numeric facts of a fiscal year in the form extract_from_xbrl returns.
+        
+        Only facts of the annual contexts are kept, so neither segment values
+        nor quarterly values stand in for the entity's annual figures.
+        
+        Args:
+            year: Fiscal year
+            prefix (str): Concept prefix to keep
+        
+        Returns:
+            Dict[str, float]: Mapping of lowercase concept name to value
+        """
+        contexts = set(self.annual_contexts(year))
+        facts: Dict[str, float] = {}
+        for fact in self.facts:
+            if not isinstance(fact.value, float) or fact.context_ref not in contexts:
+                continue
+            name = fact.name.lower()
+            if name.startswith(prefix):
+                facts[name] = fact.value
+        return facts
+
+
+def has_inline_xbrl(file_path: str, start: int = 0, end: Optional[int] = None) -> bool:
+    """
+    Check whether a filing contains inline XBRL, without reading it into memory.
+    
+    Args:
+        file_path (str): Path to the filing
+        start (int): Byte offset to start at, e.g. of one document of a submission
+        end (Optional[int]): Byte offset to stop at (end of file if None)
+    
+    Returns:
+        bool: True if an ix:header or ix:nonFraction tag is present
+    """
+    with open(file_path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return False
+        try:
+            return _INLINE_MARKER_REGEX.search(data, start, len(data) if end is None else end) is not None
+        finally:
+            data.close()
\ No newline at end of file
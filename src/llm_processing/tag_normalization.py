@@ -0,0 +1,209 @@
+"""
+XBRL tag normalization for the Stock Selector project.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from src.utils.config import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/tag_normalization.log")
+
+# us-gaap concepts reported for each canonical metric, besides the metric itself,
+# in order of precedence: when a filing reports several, the first one wins.
+# Only concepts reporting the whole metric are listed, not components of it such
+# as goods-only revenue, domestic-only pretax income, depreciation alone, the
+# current portion of long-term debt, one class of notes or cash alone
+TAG_TAXONOMY = {
+    "NetIncomeLoss": [
+        "ProfitLoss",
+        "NetIncomeLossAvailableToCommonStockholdersBasic",
+        "NetIncomeLossAllocatedToLimitedPartners"
+    ],
+    "EarningsPerShareBasic": [
+        "EarningsPerShareBasicAndDiluted",
+        "IncomeLossFromContinuingOperationsPerBasicShare"
+    ],
+    "DebtCurrent": [],
+    "LongTermDebt": [
+        "LongTermDebtNoncurrent",
+        "LongTermDebtAndCapitalLeaseObligations"
+    ],
+    "CashAndCashEquivalentsAtCarryingValue": [
+        "CashCashEquivalentsRestrictedCashAndRestrictedCashEquivalents",
+        "CashAndDueFromBanks"
+    ],
+    "OperatingIncomeLoss": [],
+    "StockholdersEquity": [
+        "StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest",
+        "PartnersCapital",
+        "MembersEquity"
+    ],
+    "Revenues": [
+        "RevenueFromContractWithCustomerExcludingAssessedTax",
+        "RevenueFromContractWithCustomerIncludingAssessedTax",
+        "SalesRevenueNet",
+        "RevenuesNetOfInterestExpense",
+        "RealEstateRevenueNet",
+        "OperatingLeasesIncomeStatementLeaseRevenue"
+    ],
+    "IncomeTaxExpenseBenefit": [
+        "IncomeTaxExpenseBenefitContinuingOperations"
+    ],
+    "IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest": [
+        "IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments"
+    ],
+    "DepreciationDepletionAndAmortization": [
+        "DepreciationAmortizationAndAccretionNet",
+        "DepreciationAndAmortization"
+    ],
+    "EarningsBeforeInterestTaxesDepreciationAmortizationEBITDA": []
+}
+
+
+class TagNormalizer:
+    """
+    Resolves XBRL tags to canonical metrics through a compiled lookup table.
+    
+    The taxonomy is compiled once into a hash table from lowercase concept
+    name to metric and rank, so each fact costs a single lookup. Prefixes
+    are ignored, which lets the canonical names returned by the LLM resolve
+    like the us-gaap tags of the XBRL extractors. When several tags of the
+    same metric are present, the one of lowest rank wins, and between equal
+    ranks the first one seen.
+    """
+    
+    def __init__(
+        self,
+        taxonomy: Optional[Dict[str, List[str]]] = None,
+        extra_tags: Optional[Dict[str, List[str]]] = None
+    ):
+        """
+        Compile the lookup table.
+        
+        Args:
+            taxonomy (Optional[Dict[str, List[str]]]): Alternative tags per canonical metric (TAG_TAXONOMY if None)
+            extra_tags (Optional[Dict[str, List[str]]]): Further tags per metric, ranked after the taxonomy's
+        """
+        taxonomy = TAG_TAXONOMY if taxonomy is None else taxonomy
+        extra_tags = extra_tags or {}
+        self.metrics = list(taxonomy)
+        self._lookup: Dict[str, Tuple[int, int]] = {}
+        
+        for index, metric in enumerate(self.metrics):
+            tags = [metric] + list(taxonomy[metric]) + list(extra_tags.get(metric, []))
+            for rank, tag in enumerate(tags):
+                key = self._key(tag)
+                if key in self._lookup and self._lookup[key][0] != index:
+                    logger.warning(f"Tag {tag} already maps to {self.metrics[self._lookup[key][0]]}, "
+                                   f"ignoring it for {metric}")
+                    continue
+                self._lookup.setdefault(key, (index, rank))
+        
+        unknown = set(extra_tags) - set(self.metrics)
+        if unknown:
+            logger.warning(f"Ignoring extra tags of unknown metrics: {sorted(unknown)}")
+    
+    @staticmethod
+    def _key(tag: str) -> str:
+        """
+        Get the lookup key of a tag.
+        
+        Args:
+            tag (str): Tag, with or without prefix, in any case
+        
+        Returns:
+            str: Lowercase concept name without prefix
+        """
+        return tag.lower().rpartition(":")[2]
+    
+    def resolve(self, tag: str) -> Optional[str]:
+        """
+        Get the canonical metric a tag reports.
+        
+        Args:
+            tag (str): XBRL tag or canonical name
+        
+        Returns:
+            Optional[str]: Canonical metric, or None if the tag is not mapped
+        """
+        entry = self._lookup.get(self._key(tag))
+        return self.metrics[entry[0]] if entry is not None else None
+    
+    def normalize(self, facts: Dict[str, float]) -> Dict[str, float]:
+        """
+        Map the facts of one filing to canonical metrics in a single pass.
+        
+        Args:
+            facts (Dict[str, float]): Values by tag
+        
+        Returns:
+            Dict[str, float]: Values by canonical metric, unmapped tags dropped
+        """
+        best: Dict[int, Tuple[int, float]] = {}
+        for tag, value in facts.items():
+            entry = self._lookup.get(tag.lower().rpartition(":")[2])
+            if entry is None:
+                continue
+            index, rank = entry
+            if index not in best or rank < best[index][0]:
+                best[index] = (rank, value)
+        return {self.metrics[index]: best[index][1] for index in sorted(best)}
+    
+    def normalize_table(
+        self,
+        facts: pd.DataFrame,
+        keys: List[str],
+        tag_column: str = "tag",
+        value_column: str = "value"
+    ) -> pd.DataFrame:
+        """
+        Map a long table of facts to one row of canonical metrics per filing.
+        
+        Tags are looked up once per distinct tag rather than once per fact,
+        and the result is spread over the table with array indexing, so
+        millions of facts are normalized in one vectorized pass.
+        
+        Args:
+            facts (pd.DataFrame): One row per fact, with the key, tag and value columns
+            keys (List[str]): Columns identifying a filing, e.g. cik and fiscal_year
+            tag_column (str): Column holding the tags
+            value_column (str): Column holding the values
+        
+        Returns:
+            pd.DataFrame: One row per filing with a mapped fact, keys followed by the metrics
+        """
+        codes, tags = pd.factorize(facts[tag_column])
+        
+        # Step 1: Resolve the distinct tags; the last slot serves missing tags (code -1)
+        entries = [self._lookup.get(self._key(str(tag)), (-1, 0)) for tag in tags] + [(-1, 0)]
+        metric_of = np.array([entry[0] for entry in entries], dtype=np.int32)
+        rank_of = np.array([entry[1] for entry in entries], dtype=np.int32)
+        metric = metric_of[codes]
+        mapped = metric >= 0
+        
+        # Step 2: Keep the fact of lowest rank per filing and metric
+        table = facts.loc[mapped, keys + [value_column]].assign(
+            _metric=metric[mapped], _rank=rank_of[codes][mapped])
+        table = table.sort_values("_rank", kind="stable").drop_duplicates(keys + ["_metric"])
+        
+        # Step 3: Spread the metrics into columns
+        wide = table.set_index(keys + ["_metric"])[value_column].unstack("_metric")
+        wide.columns = [self.metrics[index] for index in wide.columns]
+        return wide.reindex(columns=self.metrics).reset_index()
+
+
+_default_normalizer: Optional[TagNormalizer] = None
+
+
+def default_normalizer() -> TagNormalizer:
+    """
+    Get the normalizer of TAG_TAXONOMY with the configured extra tags, compiled on first use.
+    
+    Returns:
+        TagNormalizer: Shared normalizer
+    """
+    global _default_normalizer
+    if _default_normalizer is None:
+        _default_normalizer = TagNormalizer(extra_tags=config.get("tag_mapping.extra_tags", {}))
+    return _default_normalizer
\ No newline at end of file
@@ -0,0 +1,299 @@
+"""
+Task-graph runner for the Stock Selector project.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__, "logs/pipeline.log")
+
+# Files up to this size are fingerprinted by content, larger ones by size and mtime
+HASH_SIZE_LIMIT = 64 * 1024 * 1024
+
+
+def fingerprint(path: str, mode: str = "hash") -> Optional[str]:
+    """
+    Fingerprint a file or directory tree.
+    
+    Directories are fingerprinted by the relative path, size and mtime of
+    every file below them, so large trees are never read.
+    
+    Args:
+        path (str): File or directory path
+        mode (str): "hash" to hash file contents, "mtime" to use size and mtime only
+    
+    Returns:
+        Optional[str]: Hex digest, or None if the path does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(files):
+                stat = os.stat(os.path.join(root, file_name))
+                rel_path = os.path.relpath(os.path.join(root, file_name), path)
+                digest.update(f"{rel_path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+    
+    stat = os.stat(path)
+    if mode != "hash" or stat.st_size > HASH_SIZE_LIMIT:
+        digest.update(f"{stat.st_size}|{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Stage:
+    """A pipeline step with declared dependencies, inputs and outputs."""
+    
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        deps: Optional[List[str]] = None,
+        inputs: Optional[List[str]] = None,
+        outputs: Optional[List[str]] = None,
+        params: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Declare a stage.
+        
+        Args:
+            name (str): Unique stage name
+            func (Callable[[], Any]): Function that does the work
+            deps (Optional[List[str]]): Stages that must complete first
+            inputs (Optional[List[str]]): Files or directories the stage reads
+            outputs (Optional[List[str]]): Files or directories the stage writes
+            params (Optional[Dict[str, Any]]): Settings that invalidate the outputs when changed
+        """
+        self.name = name
+        self.func = func
+        self.deps = deps or []
+        self.inputs = inputs or []
+        self.outputs = outputs or []
+        self.params = params or {}
+
+
+class Pipeline:
+    """
+    Runs stages in dependency order, skipping the ones that are up to date.
+    
+    A stage is up to date when all its outputs exist, its inputs and params
+    have the fingerprints recorded at its last successful run, and none of its
+    dependencies completed after it. Stages whose dependencies are done run
+    concurrently in a thread pool, so a refresh takes as long as its slowest
+    branch.
+    """
+    
+    def __init__(
+        self,
+        stages: List[Stage],
+        state_file: str = "data/.pipeline_state.json",
+        fingerprint_mode: str = "hash"
+    ):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            stages (List[Stage]): Stages in any order
+            state_file (str): JSON file recording the last successful run of each stage
+            fingerprint_mode (str): "hash" or "mtime", see fingerprint
+        """
+        self.stages: Dict[str, Stage] = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.fingerprint_mode = fingerprint_mode
+        
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+        self.order = self._topological_order()
+    
+    def _topological_order(self) -> List[str]:
+        """
+        Order the stages so that every stage follows its dependencies.
+        
+        Returns:
+            List[str]: Stage names
+        """
+        order = []
+        state = {}
+        
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self.stages[name].deps:
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+        
+        for name in self.stages:
+            visit(name, [])
+        return order
+    
+    def upstream(self, name: str) -> List[str]:
+        """
+        Get a stage and everything it depends on, in run order.
+        
+        Args:
+            name (str): Stage name
+        
+        Returns:
+            List[str]: Stage names
+        """
+        if name not in self.stages:
+            raise ValueError(f"Unknown stage: {name}")
+        needed = set()
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            if current not in needed:
+                needed.add(current)
+                pending.extend(self.stages[current].deps)
+        return [stage for stage in self.order if stage in needed]
+    
+    def _load_state(self) -> Dict[str, Dict]:
+        """
+        Load the recorded stage runs.
+        
+        Returns:
+            Dict[str, Dict]: Mapping of stage name to signature and completion time
+        """
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, "r") as f:
+            return json.load(f)
+    
+    def _save_state(self, state: Dict[str, Dict]) -> None:
+        """
+        Save the recorded stage runs atomically.
+        
+        Args:
+            state (Dict[str, Dict]): Mapping of stage name to signature and completion time
+        """
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+    
+    def _signature(self, stage: Stage) -> str:
+        """
+        Fingerprint a stage's inputs and params.
+        
+        Args:
+            stage (Stage): Stage to fingerprint
+        
+        Returns:
+            str: Hex digest
+        """
+        parts = {path: fingerprint(path, self.fingerprint_mode) for path in stage.inputs}
+        payload = json.dumps({"inputs": parts, "params": stage.params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def is_up_to_date(self, name: str, state: Dict[str, Dict]) -> bool:
+        """
+        Check whether a stage can be skipped.
+        
+        Args:
+            name (str): Stage name
+            state (Dict[str, Dict]): Recorded stage runs
+        
+        Returns:
+            bool: True if the stage's last run is still valid
+        """
+        stage = self.stages[name]
+        record = state.get(name)
+        if record is None or not all(os.path.exists(path) for path in stage.outputs):
+            return False
+        for dep in stage.deps:
+            if state.get(dep, {}).get("completed_at", float("inf")) > record["completed_at"]:
+                return False
+        return record["signature"] == self._signature(stage)
+    
+    def _run_stage(self, name: str) -> Any:
+        """
+        Run a stage's function with its samples labeled by the stage name.
+        
+        Args:
+            name (str): Stage name
+        
+        Returns:
+            Any: Return value of the stage function
+        """
+        with metrics.stage(name):
+            return self.stages[name].func()
+    
+    def run(
+        self,
+        until: Optional[str] = None,
+        force: bool = False,
+        max_workers: int = 4
+    ) -> Dict[str, str]:
+        """
+        Run the pipeline, or one stage and its dependencies.
+        
+        Args:
+            until (Optional[str]): Last stage to run (all stages if None)
+            force (bool): Run stages even when they are up to date
+            max_workers (int): Maximum number of stages running at once
+        
+        Returns:
+            Dict[str, str]: Mapping of stage name to "ran" or "skipped"
+        """
+        selected = self.upstream(until) if until is not None else list(self.order)
+        state = self._load_state()
+        results: Dict[str, str] = {}
+        running = {}
+        
+        logger.info(f"Running pipeline stages: {', '.join(selected)}")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while len(results) < len(selected):
+                # Start or skip every stage whose dependencies are done
+                for name in selected:
+                    if name in results or name in running:
+                        continue
+                    if not all(dep in results for dep in self.stages[name].deps if dep in selected):
+                        continue
+                    if not force and self.is_up_to_date(name, state):
+                        logger.info(f"Skipping up-to-date stage {name}")
+                        results[name] = "skipped"
+                        continue
+                    logger.info(f"Starting stage {name}")
+                    running[name] = (executor.submit(self._run_stage, name), time.time())
+                
+                if not running:
+                    continue
+                
+                done, _ = wait([future for future, _ in running.values()], return_when=FIRST_COMPLETED)
+                for name, (future, started) in list(running.items()):
+                    if future not in done:
+                        continue
+                    del running[name]
+                    error = future.exception()
+                    if error is not None:
+                        logger.error(f"Stage {name} failed: {error}")
+                        for other, _ in running.values():
+                            other.cancel()
+                        raise error
+                    state[name] = {
+                        "signature": self._signature(self.stages[name]),
+                        "completed_at": time.time()
+                    }
+                    self._save_state(state)
+                    results[name] = "ran"
+                    logger.info(f"Finished stage {name} in {time.time() - started:.1f}s")
+        
+        return results
\ No newline at end of file
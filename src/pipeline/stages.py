@@ -0,0 +1,154 @@
+"""
+Pipeline stage declarations for the Stock Selector project.
+"""
+import os
+import pandas as pd
+from typing import List
+from src.data_acquisition.compact_tables import filings_list_path
+from src.data_acquisition.sec_downloader import SECFilingDownloader
+from src.data_acquisition.stock_utils import (
+    generate_cik_ticker_mapping,
+    update_ipo_dates,
+    download_daily_stock_prices
+)
+from src.data_acquisition.security_master import load_security_master
+from src.llm_processing.fundamentals import EXTRACTOR_VERSION, extract_fundamentals, load_fundamentals
+from src.analysis.performance import analyze_performance
+from src.analysis.screening import screen_stocks
+from src.pipeline.runner import Pipeline, Stage
+from src.utils.config import config
+
+SECURITIES_FILE = "data/consolidated_stock_list.csv"
+SECURITIES_DB = "data/securities.db"
+PRICES_DIR = "data/daily_stock_prices"
+
+
+def refresh_date(days: int) -> str:
+    """
+    Get the start of the current refresh period.
+    
+    Stages that fetch data which changes over time take this date as a param,
+    so they run again once per period even when nothing upstream changed.
+    
+    Args:
+        days (int): Length of a refresh period in days
+    
+    Returns:
+        str: First day of the current period in YYYY-MM-DD format
+    """
+    today = pd.Timestamp.today().normalize()
+    elapsed = (today - pd.Timestamp("1970-01-01")).days
+    return (today - pd.Timedelta(days=elapsed % max(days, 1))).strftime("%Y-%m-%d")
+
+
+def build_stages() -> List[Stage]:
+    """
+    Declare the stages of the full data refresh.
+    
+    Price downloads and fundamentals extraction only share the downloaded
+    filings, so they run side by side.
+    
+    Returns:
+        List[Stage]: Pipeline stages
+    """
+    filings_list_file = filings_list_path()
+    edgar_dir = config.get("storage.filings_dir", "data/edgar")
+    filings_dir = os.path.join(edgar_dir, "filings")
+    processed_dir = config.get("storage.processed_data_dir", "data/processed")
+    start_year = config.get("sec_edgar.start_year", 2010)
+    end_year = config.get("sec_edgar.end_year", 2025)
+    year_dirs = [os.path.join(edgar_dir, str(year)) for year in range(start_year, end_year + 1)]
+    refreshed = refresh_date(config.get("pipeline.refresh_days", 1))
+    performance_file = os.path.join(processed_dir, "performance_metrics.csv")
+    
+    def analyze():
+        performance = analyze_performance(PRICES_DIR)
+        os.makedirs(processed_dir, exist_ok=True)
+        performance.to_csv(performance_file)
+    
+    def screen():
+        selected = screen_stocks(
+            load_fundamentals(),
+            load_security_master(SECURITIES_DB, SECURITIES_FILE),
+            pd.read_csv(performance_file, header=[0, 1], index_col=0)
+        )
+        selected.to_csv(os.path.join(processed_dir, "screened_stocks.csv"), index=False)
+    
+    return [
+        Stage(
+            "master_files",
+            lambda: SECFilingDownloader().download_master_files(start_year, end_year),
+            outputs=year_dirs,
+            params={"start_year": start_year, "end_year": end_year, "refreshed": refreshed}
+        ),
+        Stage(
+            "filings_list",
+            lambda: SECFilingDownloader().generate_filings_list(output_file=filings_list_file),
+            deps=["master_files"],
+            inputs=year_dirs,
+            outputs=[filings_list_file]
+        ),
+        Stage(
+            "filings",
+            lambda: SECFilingDownloader().download_filings(filings_list_file, filings_dir),
+            deps=["filings_list"],
+            inputs=[filings_list_file],
+            outputs=[filings_dir]
+        ),
+        Stage(
+            "cik_ticker_mapping",
+            lambda: generate_cik_ticker_mapping(filings_dir, output_file=SECURITIES_FILE, db_file=SECURITIES_DB),
+            deps=["filings"],
+            inputs=["data/company_tickers_exchange.json", "data/ticker.txt"],
+            outputs=[SECURITIES_DB, SECURITIES_FILE]
+        ),
+        Stage(
+            "stock_prices",
+            lambda: download_daily_stock_prices(
+                SECURITIES_FILE, PRICES_DIR, db_file=SECURITIES_DB, refresh_before=refreshed),
+            deps=["cik_ticker_mapping"],
+            outputs=[PRICES_DIR],
+            params={"refreshed": refreshed}
+        ),
+        Stage(
+            "ipo_dates",
+            lambda: update_ipo_dates(SECURITIES_FILE, PRICES_DIR, db_file=SECURITIES_DB),
+            deps=["stock_prices"],
+            outputs=[SECURITIES_FILE]
+        ),
+        Stage(
+            "fundamentals",
+            lambda: extract_fundamentals(filings_list_file, filings_dir),
+            deps=["filings"],
+            outputs=[os.path.join(processed_dir, "fundamentals.csv")],
+            params={"extractor_version": EXTRACTOR_VERSION}
+        ),
+        Stage(
+            "performance",
+            analyze,
+            deps=["stock_prices"],
+            outputs=[performance_file],
+            params=config.get_performance_config()
+        ),
+        Stage(
+            "screening",
+            screen,
+            deps=["fundamentals", "ipo_dates", "performance"],
+            outputs=[os.path.join(processed_dir, "screened_stocks.csv")],
+            params=config.get_screening_config()
+        )
+    ]
+
+
+def build_pipeline() -> Pipeline:
+    """
+    Build the data refresh pipeline with the configured settings.
+    
+    Returns:
+        Pipeline: Pipeline over build_stages
+    """
+    return Pipeline(
+        build_stages(),
+        state_file=config.get("pipeline.state_file", "data/.pipeline_state.json"),
+        fingerprint_mode=config.get("pipeline.fingerprint_mode", "hash")
+    )
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Query service module for the Stock Selector project.
+"""
\ No newline at end of file
@@ -0,0 +1,469 @@
+"""
+Local query service for the Stock Selector project.
+"""
+import json
+import os
+import socketserver
+import threading
+import time
+import pandas as pd
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlparse
+from src.analysis.performance import performance_from_index
+from src.analysis.screening import CRITERIA_METRICS, derive_metrics, screen_metrics
+from src.data_acquisition.price_store import PriceStore, ReturnIndex
+from src.data_acquisition.security_master import SecurityMaster, load_security_master
+from src.llm_processing.fundamentals import load_fundamentals
+from src.pipeline.stages import PRICES_DIR, SECURITIES_DB, SECURITIES_FILE
+from src.utils.config import config
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__, "logs/query_service.log")
+
+# Pipeline stages whose outputs are served; a new run of any of them is a new version
+SERVED_STAGES = ["fundamentals", "cik_ticker_mapping", "stock_prices", "ipo_dates"]
+
+
+class ServingData:
+    """One loaded version of the data, never modified once built."""
+    
+    def __init__(
+        self,
+        fundamentals: pd.DataFrame,
+        securities: Union[pd.DataFrame, SecurityMaster],
+        return_index: ReturnIndex,
+        version: str = "",
+        horizons: Optional[List[int]] = None,
+        risk_free_rate: float = 0.0
+    ):
+        """
+        Derive the metrics and performance tables queries are answered from.
+        
+        Args:
+            fundamentals (pd.DataFrame): Table produced by extract_fundamentals
+            securities (Union[pd.DataFrame, SecurityMaster]): Security master, or a stock list
+                with cik, ticker and ipo_date
+            return_index (ReturnIndex): Cumulative return arrays of the price store
+            version (str): Version of the pipeline outputs the data was loaded from
+            horizons (Optional[List[int]]): Trailing windows in years (performance.time_frames if None)
+            risk_free_rate (float): Annual risk-free rate for Sharpe and Sortino ratios
+        """
+        if horizons is None:
+            horizons = config.get("performance.time_frames", [1, 3, 5, 10, 15, 20])
+        self.fundamentals = fundamentals
+        self.metrics = derive_metrics(fundamentals)
+        self.securities = securities
+        self.return_index = return_index
+        self.risk_free_rate = risk_free_rate
+        self.performance = performance_from_index(return_index, horizons, risk_free_rate)
+        self.version = version
+        self.loaded_at = time.time()
+
+
+def load_serving_data(version: str = "") -> ServingData:
+    """
+    Load the pipeline outputs into memory using the configured settings.
+    
+    Args:
+        version (str): Version the outputs belong to
+    
+    Returns:
+        ServingData: Loaded data
+    """
+    performance_config: Dict = config.get_performance_config()
+    benchmark = performance_config.get("benchmark_ticker", "^GSPC")
+    store = PriceStore(PRICES_DIR)
+    if benchmark not in store.index:
+        benchmark = None
+    return ServingData(
+        load_fundamentals(),
+        load_security_master(SECURITIES_DB, SECURITIES_FILE),
+        store.return_index(benchmark),
+        version,
+        performance_config.get("time_frames", [1, 3, 5, 10, 15, 20]),
+        performance_config.get("risk_free_rate", 0.0)
+    )
+
+
+def pipeline_version(state_file: Optional[str] = None) -> str:
+    """
+    Get the version of the served pipeline outputs.
+    
+    The pipeline records a stage run only once it has finished, so the
+    completion times of the served stages change exactly when complete new
+    outputs have been published.
+    
+    Args:
+        state_file (Optional[str]): Pipeline state file (pipeline.state_file if None)
+    
+    Returns:
+        str: Completion times of SERVED_STAGES, empty if the pipeline never ran
+    """
+    if state_file is None:
+        state_file = config.get("pipeline.state_file", "data/.pipeline_state.json")
+    if not os.path.exists(state_file):
+        return ""
+    with open(state_file, "r") as f:
+        state = json.load(f)
+    return json.dumps({stage: state.get(stage, {}).get("completed_at") for stage in SERVED_STAGES})
+
+
+class QueryService:
+    """
+    Answers screening, return and ranking queries from data held in memory.
+    
+    Fundamentals, derived metrics, the security master and the return arrays
+    are loaded once, so a query only filters and slices them. A watcher
+    thread polls the pipeline version and loads a new version in the
+    background when one is published; queries keep using the previous
+    version until the new one replaces it in a single assignment.
+    """
+    
+    def __init__(
+        self,
+        loader: Callable[[str], ServingData] = load_serving_data,
+        version: Callable[[], str] = pipeline_version,
+        reload_interval: float = 30.0
+    ):
+        """
+        Load the current version.
+        
+        Args:
+            loader (Callable[[str], ServingData]): Loads the data of a version
+            version (Callable[[], str]): Returns the current version
+            reload_interval (float): Seconds between version checks (no watcher if 0)
+        """
+        self.loader = loader
+        self.version = version
+        self.reload_interval = reload_interval
+        self._reload_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._watcher = None
+        
+        current = self.version()
+        with metrics.timer("service_load_seconds"):
+            self.data = self.loader(current)
+        logger.info(f"Loaded data version {current or '(unversioned)'}")
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the current version if it differs from the served one.
+        
+        Args:
+            force (bool): Load even if the version is unchanged
+        
+        Returns:
+            bool: True if new data is being served
+        """
+        with self._reload_lock:
+            current = self.version()
+            if not force and current == self.data.version:
+                return False
+            with metrics.timer("service_load_seconds"):
+                data = self.loader(current)
+            self.data = data
+        metrics.increment("service_reloads_total")
+        logger.info(f"Reloaded data version {current or '(unversioned)'}")
+        return True
+    
+    def _watch(self) -> None:
+        """Check the version periodically until stopped."""
+        while not self._stopped.wait(self.reload_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Error reloading data: {e}")
+    
+    def start_watcher(self) -> None:
+        """Start checking for new versions in a daemon thread."""
+        if self.reload_interval > 0 and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="query-service-watcher", daemon=True)
+            self._watcher.start()
+    
+    def stop(self) -> None:
+        """Stop the watcher thread."""
+        self._stopped.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+    
+    def status(self) -> Dict:
+        """
+        Describe the served data.
+        
+        Returns:
+            Dict: Version, load time and table sizes
+        """
+        data = self.data
+        dates = data.return_index.dates
+        return {
+            "version": data.version,
+            "loaded_at": pd.Timestamp(data.loaded_at, unit="s").isoformat(),
+            "filings": len(data.fundamentals),
+            "tickers": len(data.return_index.tickers),
+            "last_price_date": dates[-1].strftime("%Y-%m-%d") if len(dates) else None
+        }
+    
+    def screen(
+        self,
+        criteria: Optional[Dict[str, float]] = None,
+        as_of: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Screen companies, with thresholds overriding the configured ones.
+        
+        Args:
+            criteria (Optional[Dict[str, float]]): Thresholds replacing those of screening.stocks
+            as_of (Optional[str]): Screening date (today if None)
+        
+        Returns:
+            pd.DataFrame: Output of screen_metrics
+        """
+        data = self.data
+        return screen_metrics(
+            data.metrics,
+            data.securities,
+            data.performance,
+            {**config.get("screening.stocks", {}), **(criteria or {})},
+            as_of,
+            config.get("screening.reits", None)
+        )
+    
+    def returns(
+        self,
+        tickers: List[str],
+        start: str,
+        end: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Compute return and risk statistics of tickers over a window.
+        
+        Args:
+            tickers (List[str]): Tickers to query
+            start (str): Window start date
+            end (Optional[str]): Window end date (last trading day if None)
+        
+        Returns:
+            pd.DataFrame: One row per ticker with the window statistics
+        """
+        data = self.data
+        end = data.return_index.dates[-1] if end is None else end
+        return data.return_index.query(tickers, start, end, data.risk_free_rate).reset_index()
+    
+    def rank(
+        self,
+        metric: str = "sharpe_ratio",
+        horizon: int = 5,
+        top: int = 20,
+        ascending: bool = False,
+        screened: bool = False,
+        as_of: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Rank tickers on a trailing performance metric.
+        
+        Args:
+            metric (str): One of the performance METRICS
+            horizon (int): Trailing window in years, one of performance.time_frames
+            top (int): Number of tickers returned
+            ascending (bool): Rank from the lowest value, e.g. for volatility
+            screened (bool): Only rank the tickers that pass the configured screen
+            as_of (Optional[str]): Screening date when screened is set (today if None)
+        
+        Returns:
+            pd.DataFrame: ticker and value, best first, without the benchmark
+        
+        Raises:
+            ValueError: If the metric or horizon is not computed
+        """
+        data = self.data
+        column = (f"{horizon}Y", metric)
+        if column not in data.performance.columns:
+            raise ValueError(f"No {metric} over {horizon} years")
+        values = data.performance[column].dropna().drop(data.return_index.benchmark, errors="ignore")
+        if screened:
+            values = values[values.index.isin(self.screen(as_of=as_of)["ticker"])]
+        values = values.sort_values(ascending=ascending).head(top)
+        return pd.DataFrame({"ticker": values.index, metric: values.to_numpy()})
+
+
+def _records(frame: pd.DataFrame) -> List[Dict]:
+    """
+    Convert a table to JSON-ready records, with dates in ISO format and NaN as null.
+    
+    Args:
+        frame (pd.DataFrame): Table to convert
+    
+    Returns:
+        List[Dict]: One dictionary per row
+    """
+    return json.loads(frame.to_json(orient="records", date_format="iso"))
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    """
+    Routes HTTP requests to the server's QueryService.
+    
+    GET /health, /screen, /returns and /rank answer queries, with parameters
+    in the query string; POST /reload loads the current version.
+    """
+    
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+    
+    def _send_json(self, status: int, payload: Dict) -> None:
+        """
+        Send a JSON response.
+        
+        Args:
+            status (int): HTTP status code
+            payload (Dict): Response body
+        """
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _answer(self, route: str, params: Dict[str, str]) -> Dict:
+        """
+        Answer a GET query.
+        
+        Args:
+            route (str): Path of the request
+            params (Dict[str, str]): Query string parameters
+        
+        Returns:
+            Dict: Response body
+        
+        Raises:
+            LookupError: If the route does not exist
+            ValueError: If a parameter is invalid
+        """
+        service: QueryService = self.server.service
+        if route == "/health":
+            return service.status()
+        if route == "/screen":
+            criteria = {key: float(value) for key, value in params.items() if key in CRITERIA_METRICS}
+            rows = service.screen(criteria, params.get("as_of"))
+        elif route == "/returns":
+            tickers = [ticker for ticker in params.get("tickers", "").split(",") if ticker]
+            if not tickers or "start" not in params:
+                raise ValueError("tickers and start are required")
+            rows = service.returns(tickers, params["start"], params.get("end"))
+        elif route == "/rank":
+            rows = service.rank(
+                params.get("metric", "sharpe_ratio"),
+                int(params.get("horizon", 5)),
+                int(params.get("top", 20)),
+                params.get("ascending", "0") == "1",
+                params.get("screened", "0") == "1",
+                params.get("as_of")
+            )
+        else:
+            raise LookupError(route)
+        return {"version": service.data.version, "rows": _records(rows)}
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status = HTTPStatus.OK
+        with metrics.timer("service_request_seconds", route=url.path):
+            try:
+                payload = self._answer(url.path, params)
+            except LookupError as e:
+                status, payload = HTTPStatus.NOT_FOUND, {"error": f"Not found: {e}"}
+            except ValueError as e:
+                status, payload = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+            except Exception as e:
+                logger.error(f"Error answering {self.path}: {e}")
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+            self._send_json(status, payload)
+        metrics.increment("service_requests_total", route=url.path, status=int(status))
+    
+    def do_POST(self):
+        if urlparse(self.path).path != "/reload":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+            return
+        try:
+            reloaded = self.server.service.reload(force=True)
+            self._send_json(HTTPStatus.OK, {"reloaded": reloaded, **self.server.service.status()})
+        except Exception as e:
+            logger.error(f"Error reloading data: {e}")
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server listening on a Unix domain socket."""
+    
+    daemon_threads = True
+
+
+def create_server(
+    service: QueryService,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Optional[str] = None
+) -> socketserver.BaseServer:
+    """
+    Create the HTTP server of a query service, on TCP or on a Unix socket.
+    
+    Args:
+        service (QueryService): Service answering the queries
+        host (str): Address to listen on
+        port (int): TCP port to listen on (0 for any free port)
+        socket_path (Optional[str]): Unix socket to listen on instead of TCP
+    
+    Returns:
+        socketserver.BaseServer: Server, not yet serving
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, _QueryHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), _QueryHandler)
+    server.service = service
+    return server
+
+
+def serve(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    socket_path: Optional[str] = None,
+    reload_interval: Optional[float] = None
+) -> None:
+    """
+    Run the query service until interrupted, using the configured settings for missing arguments.
+    
+    Args:
+        host (Optional[str]): Address to listen on (service.host if None)
+        port (Optional[int]): TCP port to listen on (service.port if None)
+        socket_path (Optional[str]): Unix socket to listen on instead of TCP (service.socket if None)
+        reload_interval (Optional[float]): Seconds between version checks (service.reload_interval if None)
+    """
+    host = host or config.get("service.host", "127.0.0.1")
+    port = port if port is not None else config.get("service.port", 8765)
+    socket_path = socket_path or config.get("service.socket", None)
+    if reload_interval is None:
+        reload_interval = config.get("service.reload_interval", 30)
+    
+    service = QueryService(reload_interval=reload_interval)
+    server = create_server(service, host, port, socket_path)
+    service.start_watcher()
+    logger.info(f"Serving queries on {socket_path or f'http://{host}:{server.server_address[1]}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping query service")
+    finally:
+        service.stop()
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
\ No newline at end of file
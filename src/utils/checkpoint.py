@@ -0,0 +1,148 @@
+"""
+Job checkpointing for the Stock Selector project.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, "logs/checkpoint.log")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    unit TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    result TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS units_status ON units (status);
+"""
+
+
+class JobCheckpoint:
+    """
+    Records the progress of a long-running job, one row per work unit.
+    
+    Units are marked in flight when a batch starts and done as soon as each
+    one finishes, every change committed to a per-job SQLite file. After a
+    crash the job loads the done units in one query and redoes only the rest,
+    including the batch that was in flight.
+    """
+    
+    def __init__(self, job: str, directory: str = "data/checkpoints"):
+        """
+        Open or create the checkpoint of a job.
+        
+        Args:
+            job (str): Job name, used as the file name
+            directory (str): Directory holding checkpoint files
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.job = job
+        self.path = os.path.join(directory, f"{job}.db")
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+    
+    def _set_status(self, units: Iterable[str], status: str, results: Optional[Iterable[Any]] = None) -> None:
+        """
+        Record the status of units in one transaction.
+        
+        Args:
+            units (Iterable[str]): Work unit keys
+            status (str): "in_flight", "done" or "failed"
+            results (Optional[Iterable[Any]]): JSON-serializable result per unit
+        """
+        units = list(units)
+        results = [None] * len(units) if results is None else [json.dumps(result) for result in results]
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                """
+                INSERT INTO units (unit, status, result, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (unit) DO UPDATE SET
+                    status = excluded.status, result = excluded.result, updated_at = excluded.updated_at
+                """,
+                [(unit, status, result, now) for unit, result in zip(units, results)]
+            )
+    
+    def start(self, units: Iterable[str]) -> None:
+        """
+        Mark a batch of units as in flight.
+        
+        Args:
+            units (Iterable[str]): Work unit keys
+        """
+        self._set_status(units, "in_flight")
+    
+    def complete(self, unit: str, result: Any = None) -> None:
+        """
+        Mark a unit as done.
+        
+        Args:
+            unit (str): Work unit key
+            result (Any): JSON-serializable result to keep with the unit
+        """
+        self._set_status([unit], "done", [result])
+    
+    def complete_many(self, units: Iterable[str], results: Optional[Iterable[Any]] = None) -> None:
+        """
+        Mark several units as done in one transaction.
+        
+        Args:
+            units (Iterable[str]): Work unit keys
+            results (Optional[Iterable[Any]]): JSON-serializable result per unit
+        """
+        self._set_status(units, "done", results)
+    
+    def fail(self, unit: str, error: str) -> None:
+        """
+        Mark a unit as failed so that the next run retries it.
+        
+        Args:
+            unit (str): Work unit key
+            error (str): Error description
+        """
+        self._set_status([unit], "failed", [error])
+    
+    def completed(self) -> Dict[str, Any]:
+        """
+        Load every done unit with its result.
+        
+        Returns:
+            Dict[str, Any]: Mapping of unit key to result
+        """
+        rows = self.connection.execute("SELECT unit, result FROM units WHERE status = 'done'")
+        return {unit: json.loads(result) if result is not None else None for unit, result in rows}
+    
+    def in_flight(self) -> List[str]:
+        """
+        Get the units that were started but not finished.
+        
+        Returns:
+            List[str]: Work unit keys
+        """
+        return [row[0] for row in self.connection.execute("SELECT unit FROM units WHERE status = 'in_flight'")]
+    
+    def reset(self) -> None:
+        """Forget all recorded progress."""
+        with self.connection:
+            self.connection.execute("DELETE FROM units")
+        logger.info(f"Reset checkpoint for {self.job}")
+    
+    def log_resume(self) -> None:
+        """Log how much earlier progress the job resumes from."""
+        counts = dict(self.connection.execute("SELECT status, COUNT(*) FROM units GROUP BY status"))
+        if counts:
+            logger.info(
+                f"Resuming {self.job}: {counts.get('done', 0)} done, "
+                f"{counts.get('in_flight', 0)} in flight, {counts.get('failed', 0)} failed"
+            )
+    
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        self.connection.close()
\ No newline at end of file
@@ -1,23 +1,65 @@
 """
 Configuration management for the Stock Selector project.
 """
-import yaml
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
+
+# Environment variable that overrides the configuration file path
+CONFIG_ENV_VAR = "STOCK_SELECTOR_CONFIG"
+
+# Project root, used when the configuration file is not found from the working directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 class Config:
-    """Configuration manager for the Stock Selector project."""
+    """
+    Configuration manager for the Stock Selector project.
     
-    def __init__(self, config_path: str = "config/config.yaml"):
+    The file is read on first access and cached, so importing a module that
+    uses the configuration costs nothing until a value is needed.
+    """
+    
+    def __init__(self, config_path: Optional[str] = None):
         """
         Initialize the configuration manager.
         
         Args:
-            config_path (str): Path to the configuration file
+            config_path (Optional[str]): Path to the configuration file
+                ($STOCK_SELECTOR_CONFIG or config/config.yaml if None)
         """
-        self.config_path = config_path
-        self._config = self._load_config()
+        self.config_path = config_path or os.environ.get(CONFIG_ENV_VAR, "config/config.yaml")
+        self._values: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def _config(self) -> Dict[str, Any]:
+        """
+        Get the configuration dictionary, loading it on first use.
+        
+        Returns:
+            Dict[str, Any]: Configuration dictionary
+        """
+        if self._values is None:
+            with self._lock:
+                if self._values is None:
+                    self._values = self._load_config()
+        return self._values
+    
+    def _resolve_path(self) -> str:
+        """
+        Find the configuration file, relative to the working directory or else the project root.
+        
+        Returns:
+            str: Path to an existing configuration file
+        """
+        if os.path.exists(self.config_path):
+            return self.config_path
+        if not os.path.isabs(self.config_path):
+            project_path = os.path.join(PROJECT_ROOT, self.config_path)
+            if os.path.exists(project_path):
+                return project_path
+        raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
     
     def _load_config(self) -> Dict[str, Any]:
         """
@@ -26,11 +68,10 @@ class Config:
         Returns:
             Dict[str, Any]: Configuration dictionary
         """
-        if not os.path.exists(self.config_path):
-            raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
+        import yaml
         
-        with open(self.config_path, 'r') as file:
-            return yaml.safe_load(file)
+        with open(self._resolve_path(), 'r') as file:
+            return yaml.safe_load(file) or {}
     
     def get(self, key_path: str, default: Any = None) -> Any:
         """
@@ -1,9 +1,314 @@
 """
 Logging utilities for the Stock Selector project.
 """
+import atexit
+import json
 import logging
+import logging.handlers
 import os
-from typing import Optional
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from src.utils.config import config
+from src.utils.metrics import metrics
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Settings used for anything missing from the logging section of the configuration
+LOGGING_DEFAULTS = {
+    "file_format": "json",
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "rate_limit": 10
+}
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "stage"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record as JSON.
+        
+        Args:
+            record (logging.LogRecord): Record to format
+        
+        Returns:
+            str: JSON object with time, level, logger, message, thread, stage and any extra fields
+        """
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+            "stage": getattr(record, "stage", None)
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Caps the INFO and DEBUG records each call site may log per period.
+    
+    Records are counted per source line, so a message logged for every file
+    in a loop is cut down while other messages still get through. The first
+    record after a period with drops carries the number of records dropped.
+    Warnings and errors are never dropped.
+    """
+    
+    def __init__(self, rate: Union[int, Callable[[], int]], period: float = 1.0):
+        """
+        Initialize the filter.
+        
+        Args:
+            rate (Union[int, Callable[[], int]]): Records allowed per call site and period
+                (0 disables the limit), or a function called for it on first use
+            period (float): Length of a period in seconds
+        """
+        super().__init__()
+        self._rate = rate
+        self.period = period
+        self._lock = threading.Lock()
+        self._sites: Dict[Tuple[str, int], list] = {}
+    
+    @property
+    def rate(self) -> int:
+        """
+        Get the records allowed per call site and period.
+        
+        Returns:
+            int: Rate limit, 0 for none
+        """
+        if callable(self._rate):
+            self._rate = self._rate()
+        return self._rate
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide whether a record is logged.
+        
+        Args:
+            record (logging.LogRecord): Record to check
+        
+        Returns:
+            bool: False if the call site is over its limit
+        """
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.setdefault((record.pathname, record.lineno), [now, 0, 0])
+            if now - site[0] >= self.period:
+                if site[2]:
+                    record.suppressed = site[2]
+                site[:] = [now, 0, 0]
+            if site[1] >= self.rate:
+                site[2] += 1
+                return False
+            site[1] += 1
+        return True
+    
+    def pending(self) -> Dict[Tuple[str, int], int]:
+        """
+        Get the records dropped since each call site last got a record through.
+        
+        Returns:
+            Dict[Tuple[str, int], int]: Mapping of (path, line) to dropped records
+        """
+        with self._lock:
+            return {key: site[2] for key, site in self._sites.items() if site[2]}
+
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records with the message rendered and the active stage attached."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Copy a record so that it can be formatted later in the listener thread.
+        
+        Args:
+            record (logging.LogRecord): Record from the calling thread
+        
+        Returns:
+            logging.LogRecord: Record with its arguments merged into the message
+        """
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            record.msg += f" [{suppressed} similar messages suppressed]"
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stage = metrics.current_stage()
+        return record
+
+
+class _FileRouter(logging.Handler):
+    """Sends each record to the log file of the logger that made it."""
+    
+    def __init__(self, open_file: Callable[[str], logging.Handler]):
+        """
+        Initialize an empty routing table.
+        
+        Args:
+            open_file (Callable[[str], logging.Handler]): Returns the handler of a log file path
+        """
+        super().__init__()
+        self.open_file = open_file
+        self.routes: Dict[str, str] = {}
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Write a record to the file of its logger or the nearest parent with one.
+        
+        Args:
+            record (logging.LogRecord): Record to write
+        """
+        name = record.name
+        while name:
+            path = self.routes.get(name)
+            if path is not None:
+                self.open_file(path).handle(record)
+                return
+            name = name.rpartition(".")[0]
+
+
+class LogBackend:
+    """
+    Process-wide logging backend.
+    
+    Loggers only put records on an in-memory queue; a listener thread
+    formats them and does all console and file I/O, so logging never blocks
+    the threads doing the work. Log files are rotated by size and written
+    as JSON lines by default.
+    
+    Settings are read from the configuration when the first record is
+    logged, and log files are opened when they get their first record, so
+    setting up loggers at import time does no I/O.
+    """
+    
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        """
+        Start the backend.
+        
+        Args:
+            settings (Optional[Dict[str, Any]]): file_format ("json" or "text"), max_bytes,
+                backup_count and rate_limit (the logging section of the configuration if None)
+        """
+        self._settings = settings
+        self.rate_limit = RateLimitFilter(lambda: self.settings["rate_limit"])
+        self.queue_handler = _StructuredQueueHandler(queue.SimpleQueue())
+        self.queue_handler.addFilter(self.rate_limit)
+        self.console_handler = logging.StreamHandler()
+        self.console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        self.router = _FileRouter(self._file_handler)
+        self._file_handlers: Dict[str, logging.Handler] = {}
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.start()
+    
+    def start(self) -> None:
+        """Start the listener thread on a fresh queue."""
+        self.queue_handler.queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(
+            self.queue_handler.queue, self.console_handler, self.router, respect_handler_level=True)
+        self.listener.start()
+    
+    def stop(self) -> None:
+        """Write out every queued record and stop the listener thread."""
+        if self.listener is not None:
+            for (path, line), count in self.rate_limit.pending().items():
+                self.queue_handler.queue.put(logging.makeLogRecord({
+                    "name": __name__,
+                    "levelno": logging.INFO,
+                    "levelname": "INFO",
+                    "msg": f"{count} messages from {path}:{line} were suppressed by the rate limit"
+                }))
+            self.listener.stop()
+            self.listener = None
+    
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """
+        Get the logging settings, reading the configuration on first use.
+        
+        Logging keeps working with the defaults when there is no configuration file.
+        
+        Returns:
+            Dict[str, Any]: LOGGING_DEFAULTS overridden by the configured values
+        """
+        if self._settings is None:
+            try:
+                configured = config.get("logging", {}) or {}
+            except FileNotFoundError:
+                configured = {}
+            self._settings = {**LOGGING_DEFAULTS, **configured}
+        return self._settings
+    
+    def _file_handler(self, path: str) -> logging.Handler:
+        """
+        Get the rotating handler of a log file, creating it on first use.
+        
+        Args:
+            path (str): Absolute path to the log file
+        
+        Returns:
+            logging.Handler: Handler writing to the file
+        """
+        handler = self._file_handlers.get(path)
+        if handler is None:
+            settings = self.settings
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=settings["max_bytes"], backupCount=settings["backup_count"], delay=True)
+            handler.setFormatter(
+                JsonFormatter() if settings["file_format"] == "json" else logging.Formatter(TEXT_FORMAT))
+            self._file_handlers[path] = handler
+        return handler
+    
+    def add_file(self, name: str, log_file: str) -> None:
+        """
+        Route a logger's records to a rotating log file.
+        
+        Args:
+            name (str): Logger name
+            log_file (str): Path to the log file
+        """
+        self.router.routes[name] = os.path.abspath(log_file)
+
+
+_backend: Optional[LogBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> LogBackend:
+    """
+    Get the logging backend, starting it on first use.
+    
+    Returns:
+        LogBackend: Process-wide backend
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = LogBackend()
+            atexit.register(_backend.stop)
+            # Forked workers need their own listener thread
+            os.register_at_fork(after_in_child=_backend.start)
+        return _backend
 
 
 def setup_logger(
@@ -14,11 +319,14 @@ def setup_logger(
     """
     Set up a logger with optional file output.
     
+    Records go through the shared queue-based backend, which writes them to
+    the console and, if given, to the logger's own rotating file.
+    
     Args:
         name (str): Name of the logger
         log_file (Optional[str]): Path to log file (if None, only console logging)
         level (int): Logging level
-        
+    
     Returns:
         logging.Logger: Configured logger
     """
@@ -29,24 +337,10 @@ def setup_logger(
     if logger.handlers:
         return logger
     
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # File handler (if specified)
+    backend = get_backend()
     if log_file:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        backend.add_file(name, log_file)
+    logger.addHandler(backend.queue_handler)
     
     return logger
 
@@ -57,7 +351,7 @@ def get_logger(name: str) -> logging.Logger:
     
     Args:
         name (str): Name of the logger
-        
+    
     Returns:
         logging.Logger: Logger instance
     """
@@ -0,0 +1,262 @@
+"""
+Runtime metrics for the Stock Selector project.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds of the timing histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms with Prometheus and JSON export.
+    
+    Every sample is labeled with the stage that is active in the calling
+    thread, so the same metric can be broken down per command or pipeline
+    stage.
+    """
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            buckets (Tuple[float, ...]): Histogram bucket upper bounds
+        """
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        self._thread_stages: Dict[int, str] = {}
+    
+    def _labels(self, labels: Dict[str, str]) -> LabelKey:
+        """
+        Build the label key of a sample, adding the active stage.
+        
+        Args:
+            labels (Dict[str, str]): Labels given by the caller
+        
+        Returns:
+            LabelKey: Sorted label pairs
+        """
+        stage = getattr(self._local, "stage", None)
+        if stage is not None and "stage" not in labels:
+            labels = {**labels, "stage": stage}
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Add to a counter.
+        
+        Args:
+            name (str): Metric name
+            value (float): Amount to add
+            **labels: Label values
+        """
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Record a value, usually a duration in seconds, in a histogram.
+        
+        Args:
+            name (str): Metric name
+            value (float): Observed value
+            **labels: Label values
+        """
+        key = (name, self._labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # One count per bucket, then +Inf, sum and count
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 3)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[len(self.buckets)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+    
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """
+        Time a block of code into a histogram.
+        
+        Args:
+            name (str): Metric name
+            **labels: Label values
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+    
+    def current_stage(self) -> Optional[str]:
+        """
+        Get the stage active in the calling thread.
+        
+        Returns:
+            Optional[str]: Stage name, or None outside any stage
+        """
+        return getattr(self._local, "stage", None)
+    
+    @contextmanager
+    def stage(self, name: Optional[str], timed: bool = True) -> Iterator[None]:
+        """
+        Label the samples recorded by this thread with a stage name.
+        
+        Worker threads pass timed=False with the stage of the thread that
+        started them, so their samples are attributed without timing the
+        stage twice.
+        
+        Args:
+            name (Optional[str]): Stage name
+            timed (bool): Record the stage duration in stage_seconds
+        """
+        previous = self.current_stage()
+        thread_id = threading.get_ident()
+        self._local.stage = name
+        self._thread_stages[thread_id] = name
+        try:
+            if timed:
+                with self.timer("stage_seconds"):
+                    yield
+            else:
+                yield
+        finally:
+            self._local.stage = previous
+            if previous is None:
+                self._thread_stages.pop(thread_id, None)
+            else:
+                self._thread_stages[thread_id] = previous
+    
+    def thread_stages(self) -> Dict[int, str]:
+        """
+        Get the stage active in every thread, for tools that inspect other threads.
+        
+        Returns:
+            Dict[int, str]: Mapping of thread identifier to stage name
+        """
+        return dict(self._thread_stages)
+    
+    def reset(self) -> None:
+        """Drop all recorded samples."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+    
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        """
+        Copy the current values.
+        
+        Returns:
+            Dict[str, List[Dict]]: "counters" and "histograms", one entry per name and label set
+        """
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], values[:-2])),
+                    "sum": values[-2],
+                    "count": values[-1]
+                }
+                for (name, labels), values in sorted(self._histograms.items())
+            ]
+        return {"counters": counters, "histograms": histograms}
+    
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        
+        Returns:
+            str: Exposition text
+        """
+        def render_labels(labels: Dict[str, str], extra: Optional[Dict[str, str]] = None) -> str:
+            labels = {**labels, **(extra or {})}
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+        
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+        for counter in snapshot["counters"]:
+            if counter["name"] not in typed:
+                lines.append(f"# TYPE {counter['name']} counter")
+                typed.add(counter["name"])
+            lines.append(f"{counter['name']}{render_labels(counter['labels'])} {counter['value']}")
+        for histogram in snapshot["histograms"]:
+            name = histogram["name"]
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{render_labels(histogram['labels'], {'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{render_labels(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{render_labels(histogram['labels'])} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+    
+    def dump(self, output_file: str) -> None:
+        """
+        Write the metrics to a file, as JSON for .json files and Prometheus text otherwise.
+        
+        Args:
+            output_file (str): Path to the output file
+        """
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        with open(output_file, "w") as f:
+            if output_file.endswith(".json"):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+    
+    def summary(self) -> str:
+        """
+        Summarize the metrics per stage as a text table.
+        
+        Returns:
+            str: Table with counts, totals and means
+        """
+        rows = []
+        snapshot = self.snapshot()
+        for histogram in snapshot["histograms"]:
+            labels = dict(histogram["labels"])
+            stage = labels.pop("stage", "-")
+            detail = ",".join(f"{key}={value}" for key, value in labels.items())
+            mean = histogram["sum"] / histogram["count"] if histogram["count"] else 0.0
+            rows.append((stage, histogram["name"], detail, histogram["count"], f"{histogram['sum']:.3f}", f"{mean:.4f}"))
+        for counter in snapshot["counters"]:
+            labels = dict(counter["labels"])
+            stage = labels.pop("stage", "-")
+            detail = ",".join(f"{key}={value}" for key, value in labels.items())
+            rows.append((stage, counter["name"], detail, counter["value"], "", ""))
+        
+        header = ("stage", "metric", "labels", "count", "total", "mean")
+        rows = [header] + sorted(rows, key=lambda row: (row[0], row[1], row[2]))
+        widths = [max(len(str(row[i])) for row in rows) for i in range(len(header))]
+        lines = ["  ".join(str(value).ljust(width) for value, width in zip(row, widths)) for row in rows]
+        return "\n".join(line.rstrip() for line in lines)
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Sampling CPU and memory profiler for the Stock Selector project.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import CodeType
+from typing import Dict, List, Optional, Set, Tuple
+from src.utils.metrics import metrics
+
+
+def _frame_label(code: CodeType) -> str:
+    """
+    Name a stack frame the way flamegraph tools expect.
+    
+    Args:
+        code (CodeType): Code object of the frame
+    
+    Returns:
+        str: "function (file:line)"
+    """
+    name = getattr(code, "co_qualname", code.co_name)
+    try:
+        path = os.path.relpath(code.co_filename)
+    except ValueError:
+        path = code.co_filename
+    if path.startswith(".."):
+        path = os.path.basename(code.co_filename)
+    return f"{name} ({path}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """
+    Samples the stacks of all threads and the traced memory of a command.
+    
+    A background thread records the call stack of every thread at a fixed
+    interval, so worker threads are covered and the profiled code runs
+    unmodified. Memory is traced with tracemalloc, and a snapshot is kept
+    whenever traced memory reaches a new high, so the report shows what was
+    allocated at the peak rather than what survived to the end.
+    
+    With a scope, only samples taken inside a function of that name, or in a
+    thread running the pipeline stage or command of that name, are kept, and
+    stacks start at the scope.
+    """
+    
+    def __init__(
+        self,
+        scope: Optional[str] = None,
+        interval: float = 0.005,
+        memory: bool = True,
+        nframe: int = 32,
+        snapshot_interval: float = 1.0
+    ):
+        """
+        Initialize the profiler.
+        
+        Args:
+            scope (Optional[str]): Function name (e.g. extract_from_xbrl) or stage name to restrict to
+            interval (float): Seconds between stack samples
+            memory (bool): Trace memory allocations
+            nframe (int): Frames kept per traced allocation
+            snapshot_interval (float): Minimum seconds between memory snapshots
+        """
+        self.scope = scope
+        self.interval = interval
+        self.memory = memory
+        self.nframe = nframe
+        self.snapshot_interval = snapshot_interval
+        self.samples: Counter = Counter()
+        self.total_samples = 0
+        self.scope_codes: Set[CodeType] = set()
+        self.peak_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.peak_traced = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._duration = 0.0
+        self._last_snapshot = 0.0
+        self._peak_memory = 0
+    
+    def _in_scope(self, code: CodeType) -> bool:
+        """
+        Check whether a frame belongs to the scoped function.
+        
+        Args:
+            code (CodeType): Code object of the frame
+        
+        Returns:
+            bool: True if the function or qualified name equals the scope
+        """
+        return code.co_name == self.scope or getattr(code, "co_qualname", None) == self.scope
+    
+    def _sample(self) -> None:
+        """Record the current stack of every thread except the sampler."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stages = metrics.thread_stages() if self.scope else {}
+        own_id = threading.get_ident()
+        self.total_samples += 1
+        
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            
+            if self.scope:
+                start = next((i for i, code in enumerate(stack) if self._in_scope(code)), None)
+                if start is not None:
+                    self.scope_codes.add(stack[start])
+                    stack = stack[start:]
+                elif stages.get(thread_id) != self.scope:
+                    continue
+            self.samples[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+    
+    def _snapshot_if_peak(self, force: bool = False) -> None:
+        """
+        Keep a memory snapshot when traced memory is at a new high.
+        
+        Args:
+            force (bool): Check even if the last snapshot is recent
+        """
+        now = time.perf_counter()
+        if not force and now - self._last_snapshot < self.snapshot_interval:
+            return
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self.peak_traced * 1.05 or self.peak_snapshot is None:
+            self.peak_snapshot = tracemalloc.take_snapshot()
+            self.peak_traced = current
+            self._last_snapshot = time.perf_counter()
+    
+    def _run(self) -> None:
+        """Sample until stopped."""
+        while not self._stop.wait(self.interval):
+            self._sample()
+            if self.memory:
+                self._snapshot_if_peak()
+    
+    def start(self) -> "Profiler":
+        """
+        Start tracing memory and sampling stacks.
+        
+        Returns:
+            Profiler: This profiler
+        """
+        if self.memory:
+            tracemalloc.start(self.nframe)
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop sampling and tracing."""
+        self._stop.set()
+        self._thread.join()
+        self._duration = time.perf_counter() - self._started_at
+        if self.memory:
+            self._snapshot_if_peak(force=True)
+            self._peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    
+    def folded_stacks(self) -> List[str]:
+        """
+        Render the samples in the collapsed-stack format of flamegraph.pl and speedscope.
+        
+        Returns:
+            List[str]: One "thread;frame;frame count" line per distinct stack
+        """
+        lines = []
+        for (thread_name, stack), count in sorted(self.samples.items(), key=lambda item: -item[1]):
+            frames = [f"thread {thread_name}"] + [_frame_label(code) for code in stack]
+            lines.append(f"{';'.join(frame.replace(';', ':') for frame in frames)} {count}")
+        return lines
+    
+    def top_functions(self, top: int = 25) -> List[Tuple[str, int, int]]:
+        """
+        Rank functions by the samples spent in them.
+        
+        Args:
+            top (int): Number of functions to return
+        
+        Returns:
+            List[Tuple[str, int, int]]: Function label, own samples and total samples including callees
+        """
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for (_, stack), count in self.samples.items():
+            if not stack:
+                continue
+            own[stack[-1]] += count
+            for code in set(stack):
+                total[code] += count
+        ranked = sorted(total, key=lambda code: (-own[code], -total[code]))[:top]
+        return [(_frame_label(code), own[code], total[code]) for code in ranked]
+    
+    def _scope_lines(self) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Get the source line ranges of the scoped functions seen while sampling.
+        
+        Returns:
+            Dict[str, List[Tuple[int, int]]]: Mapping of file name to (first, last) line ranges
+        """
+        ranges: Dict[str, List[Tuple[int, int]]] = {}
+        for code in self.scope_codes:
+            lines = [line for _, _, line in code.co_lines() if line is not None]
+            if lines:
+                ranges.setdefault(code.co_filename, []).append((min(lines), max(lines)))
+        return ranges
+    
+    def top_allocations(self, top: int = 25) -> List[Tuple[str, int, int]]:
+        """
+        Rank the source lines holding the most memory at the traced peak.
+        
+        With a function scope, only allocations made while the scoped function
+        was on the stack are counted.
+        
+        Args:
+            top (int): Number of lines to return
+        
+        Returns:
+            List[Tuple[str, int, int]]: "file:line", bytes and number of blocks
+        """
+        if self.peak_snapshot is None:
+            return []
+        ranges = self._scope_lines()
+        if not self.scope or not ranges:
+            stats = self.peak_snapshot.statistics("lineno")[:top]
+            return [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size, stat.count)
+                    for stat in stats]
+        
+        sizes: Counter = Counter()
+        counts: Counter = Counter()
+        for stat in self.peak_snapshot.statistics("traceback"):
+            inside = any(
+                first <= frame.lineno <= last
+                for frame in stat.traceback
+                for first, last in ranges.get(frame.filename, [])
+            )
+            if inside:
+                location = f"{stat.traceback[-1].filename}:{stat.traceback[-1].lineno}"
+                sizes[location] += stat.size
+                counts[location] += stat.count
+        return [(location, size, counts[location]) for location, size in sizes.most_common(top)]
+    
+    def report(self, title: str, top: int = 25) -> str:
+        """
+        Summarize the run as text.
+        
+        Args:
+            title (str): What was profiled, e.g. the command name
+            top (int): Rows per table
+        
+        Returns:
+            str: Report with hot functions and top allocations
+        """
+        kept = sum(self.samples.values())
+        lines = [
+            f"Profile of {title}" + (f" (scope: {self.scope})" if self.scope else ""),
+            f"Duration: {self._duration:.1f}s, {self.total_samples} sampling rounds every "
+            f"{self.interval * 1000:.0f} ms, {kept} thread samples kept",
+            "",
+            "Top functions by own samples:",
+            f"  {'own':>7}  {'total':>7}  function"
+        ]
+        for label, own, total in self.top_functions(top):
+            lines.append(f"  {own:>7}  {total:>7}  {label}")
+        
+        if self.memory:
+            lines += [
+                "",
+                f"Peak traced memory: {self._peak_memory / 1024 ** 2:.1f} MB",
+                f"Top allocations in the snapshot at {self.peak_traced / 1024 ** 2:.1f} MB traced:",
+                f"  {'KB':>10}  {'blocks':>8}  location"
+            ]
+            if self.scope and not self.scope_codes:
+                lines.append("  (scope not matched by a function; allocations are process-wide)")
+            for location, size, count in self.top_allocations(top):
+                lines.append(f"  {size / 1024:>10.1f}  {count:>8}  {location}")
+        return "\n".join(lines)
+    
+    def write(self, output_dir: str, name: str, top: int = 25) -> Tuple[str, str]:
+        """
+        Write the folded stacks and the text report.
+        
+        Args:
+            output_dir (str): Directory for the output files
+            name (str): Base name of the output files
+            top (int): Rows per report table
+        
+        Returns:
+            Tuple[str, str]: Paths of the .folded stacks and the .txt report
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        folded_file = os.path.join(output_dir, f"profile-{name}-{stamp}.folded")
+        report_file = os.path.join(output_dir, f"profile-{name}-{stamp}.txt")
+        with open(folded_file, "w") as f:
+            f.write("\n".join(self.folded_stacks()) + "\n")
+        with open(report_file, "w") as f:
+            f.write(self.report(name, top) + "\n")
+        return folded_file, report_file
\ No newline at end of file
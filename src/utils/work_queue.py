@@ -0,0 +1,457 @@
+"""
+Leased work queue for the Stock Selector project.
+"""
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.utils.config import config
+from src.utils.logger import setup_logger
+from src.utils.metrics import metrics
+
+logger = setup_logger(__name__, "logs/work_queue.log")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    job TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job, unit)
+);
+CREATE INDEX IF NOT EXISTS leases_status ON leases (job, status);
+CREATE TABLE IF NOT EXISTS jobs (
+    job TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def default_worker_id() -> str:
+    """
+    Get an identifier unique to this process across hosts.
+    
+    Returns:
+        str: <hostname>:<pid>
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def partition(items: List[Any], unit_size: int) -> Dict[str, List[Any]]:
+    """
+    Split a list into work units of consecutive items.
+    
+    Unit keys depend only on the positions of the items, so every worker
+    partitioning the same list gets the same units. Lists that differ give
+    units that differ in content, which WorkQueue.add tells apart by their
+    fingerprint.
+    
+    Args:
+        items (List[Any]): Items in a stable order
+        unit_size (int): Items per unit
+    
+    Returns:
+        Dict[str, List[Any]]: Items by unit key
+    """
+    return {
+        f"{start:08d}-{min(start + unit_size, len(items)) - 1:08d}": items[start:start + unit_size]
+        for start in range(0, len(items), unit_size)
+    }
+
+
+class Lease:
+    """A worker's claim on one work unit, valid until it expires."""
+    
+    __slots__ = ("unit", "payload", "attempt")
+    
+    def __init__(self, unit: str, payload: Any, attempt: int):
+        """
+        Initialize the lease.
+        
+        Args:
+            unit (str): Work unit key
+            payload (Any): Work unit content
+            attempt (int): Number of the claim, which identifies it when the unit is claimed again
+        """
+        self.unit = unit
+        self.payload = payload
+        self.attempt = attempt
+
+
+class WorkQueue:
+    """
+    Work units of a job leased to workers through a shared SQLite table.
+    
+    Every worker adds the same units, so whichever starts first creates
+    them. The job records the fingerprint of its units: units added with a
+    different fingerprint, because the work list or its version changed,
+    replace the job's units and results, and workers still holding the old
+    list stop at their next claim. A worker claims one pending unit at a time for lease_seconds and
+    heartbeats while it works; a unit whose lease expires, because its worker
+    died or hung, can be claimed by another. Failed units go back to pending
+    until they have been tried max_attempts times. Claims happen in an
+    immediate transaction, so no unit is ever held by two live leases.
+    
+    Workers on other hosts need the database on a file system with working
+    locks. The rollback journal is used instead of WAL, which needs shared
+    memory and so only works on one host.
+    """
+    
+    def __init__(
+        self,
+        job: str,
+        db_path: str = "data/work_queue.db",
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        worker_id: Optional[str] = None
+    ):
+        """
+        Open the queue, creating the schema if needed.
+        
+        Args:
+            job (str): Job name, e.g. download_filings
+            db_path (str): Path to the shared SQLite database
+            lease_seconds (float): Time a claim is valid without a heartbeat
+            max_attempts (int): Claims of a unit before it is left failed
+            worker_id (Optional[str]): Identifier of this worker (host and process if None)
+        """
+        self.job = job
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or default_worker_id()
+        self.fingerprint: Optional[str] = None
+        self._local = threading.local()
+        
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use.
+        
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode; transactions are begun explicitly
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=DELETE")
+            self._local.connection = connection
+        return connection
+    
+    def close(self) -> None:
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+    
+    def _transaction(self, statements: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Run statements in an immediate transaction, which takes the write lock up front.
+        
+        Args:
+            statements (Callable[[sqlite3.Connection], Any]): Function running the statements
+        
+        Returns:
+            Any: Return value of statements
+        """
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+    
+    def add(self, units: Dict[str, Any], version: str = "") -> int:
+        """
+        Create the units that do not exist yet, replacing the job's units if they differ.
+        
+        Args:
+            units (Dict[str, Any]): JSON-serializable payload by unit key
+            version (str): Version of the processing, part of the fingerprint
+        
+        Returns:
+            int: Number of units created
+        """
+        now = time.time()
+        rows = [(self.job, unit, json.dumps(payload), now) for unit, payload in units.items()]
+        self.fingerprint = hashlib.sha256(
+            json.dumps([version, units], sort_keys=True).encode("utf-8")).hexdigest()
+        
+        def insert(connection):
+            stored = connection.execute("SELECT fingerprint FROM jobs WHERE job = ?", (self.job,)).fetchone()
+            if stored is None or stored[0] != self.fingerprint:
+                replaced = connection.execute("DELETE FROM leases WHERE job = ?", (self.job,)).rowcount
+                if replaced:
+                    logger.warning(f"Work list of {self.job} changed; replacing its {replaced} units")
+                connection.execute(
+                    """
+                    INSERT INTO jobs (job, fingerprint, updated_at) VALUES (?, ?, ?)
+                    ON CONFLICT (job) DO UPDATE SET
+                        fingerprint = excluded.fingerprint, updated_at = excluded.updated_at
+                    """,
+                    (self.job, self.fingerprint, now)
+                )
+            before = connection.total_changes
+            connection.executemany(
+                """
+                INSERT OR IGNORE INTO leases (job, unit, payload, status, updated_at)
+                VALUES (?, ?, ?, 'pending', ?)
+                """,
+                rows
+            )
+            return connection.total_changes - before
+        
+        created = self._transaction(insert)
+        if created:
+            logger.info(f"Added {created} work units to {self.job}")
+        return created
+    
+    def claim(self) -> Optional[Lease]:
+        """
+        Lease a pending unit, or one whose lease expired.
+        
+        Returns:
+            Optional[Lease]: Lease, or None if no unit can be claimed now
+        
+        Raises:
+            RuntimeError: If the job's units were replaced since this worker added them
+        """
+        def take(connection):
+            if self.fingerprint is not None:
+                stored = connection.execute("SELECT fingerprint FROM jobs WHERE job = ?", (self.job,)).fetchone()
+                if stored is None or stored[0] != self.fingerprint:
+                    raise RuntimeError(
+                        f"The units of {self.job} were replaced by a different work list; restart the worker")
+            now = time.time()
+            row = connection.execute(
+                """
+                SELECT unit, payload, attempts FROM leases
+                WHERE job = ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                ORDER BY unit LIMIT 1
+                """,
+                (self.job, now)
+            ).fetchone()
+            if row is None:
+                return None
+            unit, payload, attempts = row
+            if attempts >= self.max_attempts:
+                # The last holder died with the lease: give up on the unit
+                connection.execute(
+                    """
+                    UPDATE leases SET status = 'failed', owner = NULL, error = 'lease expired', updated_at = ?
+                    WHERE job = ? AND unit = ?
+                    """,
+                    (now, self.job, unit)
+                )
+                return False
+            connection.execute(
+                """
+                UPDATE leases SET status = 'leased', owner = ?, lease_expires = ?, attempts = ?, updated_at = ?
+                WHERE job = ? AND unit = ?
+                """,
+                (self.worker_id, now + self.lease_seconds, attempts + 1, now, self.job, unit)
+            )
+            return Lease(unit, json.loads(payload), attempts + 1)
+        
+        while True:
+            lease = self._transaction(take)
+            if lease is not False:
+                break
+        if lease is not None:
+            metrics.increment("work_units_total", job=self.job, event="claimed")
+            logger.debug(f"{self.worker_id} claimed {self.job}/{lease.unit} (attempt {lease.attempt})")
+        return lease
+    
+    def _update_lease(self, lease: Lease, assignments: str, values: Tuple) -> bool:
+        """
+        Update a unit if the lease still holds it.
+        
+        Args:
+            lease (Lease): Lease of this worker
+            assignments (str): SET clause
+            values (Tuple): Values of the SET clause placeholders
+        
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        cursor = self.connection.execute(
+            f"""
+            UPDATE leases SET {assignments}, updated_at = ?
+            WHERE job = ? AND unit = ? AND owner = ? AND attempts = ? AND status = 'leased'
+            """,
+            values + (time.time(), self.job, lease.unit, self.worker_id, lease.attempt)
+        )
+        return cursor.rowcount == 1
+    
+    def heartbeat(self, lease: Lease) -> bool:
+        """
+        Extend a lease.
+        
+        Args:
+            lease (Lease): Lease of this worker
+        
+        Returns:
+            bool: False if the lease expired and the unit was claimed by another worker
+        """
+        return self._update_lease(lease, "lease_expires = ?", (time.time() + self.lease_seconds,))
+    
+    def complete(self, lease: Lease, result: Any = None) -> bool:
+        """
+        Mark a leased unit as done.
+        
+        Args:
+            lease (Lease): Lease of this worker
+            result (Any): JSON-serializable result to keep with the unit
+        
+        Returns:
+            bool: False if the lease was lost, in which case the result is discarded
+        """
+        completed = self._update_lease(
+            lease, "status = 'done', owner = NULL, result = ?, error = NULL", (json.dumps(result),))
+        metrics.increment("work_units_total", job=self.job, event="done" if completed else "lost")
+        return completed
+    
+    def release(self, lease: Lease, error: str) -> bool:
+        """
+        Give a unit back after a failure, to be retried unless it used up its attempts.
+        
+        Args:
+            lease (Lease): Lease of this worker
+            error (str): Error description
+        
+        Returns:
+            bool: False if the lease was already lost
+        """
+        status = "failed" if lease.attempt >= self.max_attempts else "pending"
+        released = self._update_lease(lease, "status = ?, owner = NULL, error = ?", (status, error))
+        metrics.increment("work_units_total", job=self.job, event=status)
+        return released
+    
+    def counts(self) -> Dict[str, int]:
+        """
+        Count the units of the job by status.
+        
+        Returns:
+            Dict[str, int]: Units per status: pending, leased, done and failed
+        """
+        rows = self.connection.execute(
+            "SELECT status, COUNT(*) FROM leases WHERE job = ? GROUP BY status", (self.job,))
+        return {"pending": 0, "leased": 0, "done": 0, "failed": 0, **dict(rows)}
+    
+    def results(self) -> Dict[str, Any]:
+        """
+        Load the results of the done units.
+        
+        Returns:
+            Dict[str, Any]: Result by unit key
+        """
+        rows = self.connection.execute(
+            "SELECT unit, result FROM leases WHERE job = ? AND status = 'done' ORDER BY unit", (self.job,))
+        return {unit: json.loads(result) if result is not None else None for unit, result in rows}
+    
+    def reset(self) -> None:
+        """Forget every unit of the job and its fingerprint."""
+        def delete(connection):
+            connection.execute("DELETE FROM leases WHERE job = ?", (self.job,))
+            connection.execute("DELETE FROM jobs WHERE job = ?", (self.job,))
+        
+        self._transaction(delete)
+        logger.info(f"Reset work queue for {self.job}")
+
+
+def configured_queue(job: str, db_path: Optional[str] = None, worker_id: Optional[str] = None) -> WorkQueue:
+    """
+    Open the queue of a job with the work_queue settings of the configuration.
+    
+    Args:
+        job (str): Job name
+        db_path (Optional[str]): Path to the shared database (configured path if None)
+        worker_id (Optional[str]): Identifier of this worker (host and process if None)
+    
+    Returns:
+        WorkQueue: Queue of the job
+    """
+    return WorkQueue(
+        job,
+        db_path or config.get("work_queue.db", "data/work_queue.db"),
+        lease_seconds=config.get("work_queue.lease_seconds", 300),
+        max_attempts=config.get("work_queue.max_attempts", 3),
+        worker_id=worker_id
+    )
+
+
+def run_worker(
+    queue: WorkQueue,
+    process: Callable[[Any], Any],
+    poll_seconds: float = 5.0
+) -> int:
+    """
+    Claim and process units until none is left.
+    
+    The lease is heartbeated from a background thread while a unit is
+    processed. A unit that raises is released with the error. When nothing
+    can be claimed but other workers still hold leases, the worker waits, in
+    case one of them fails or dies and its unit comes back.
+    
+    Args:
+        queue (WorkQueue): Queue of the job
+        process (Callable[[Any], Any]): Function of a unit's payload returning its JSON-serializable result
+        poll_seconds (float): Wait between claims while other workers hold leases
+    
+    Returns:
+        int: Number of units this worker completed
+    """
+    completed = 0
+    while True:
+        lease = queue.claim()
+        if lease is None:
+            if queue.counts()["leased"] == 0:
+                break
+            time.sleep(poll_seconds)
+            continue
+        
+        # Heartbeat at a third of the lease, so two missed beats still keep it
+        stopped = threading.Event()
+        
+        def beat(current=lease):
+            while not stopped.wait(queue.lease_seconds / 3):
+                if not queue.heartbeat(current):
+                    logger.warning(f"Lost the lease on {queue.job}/{current.unit}")
+                    return
+        
+        heartbeat = threading.Thread(target=beat, name="work-queue-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            with metrics.timer("work_unit_seconds", job=queue.job):
+                result = process(lease.payload)
+        except Exception as e:
+            logger.error(f"Error processing {queue.job}/{lease.unit}: {e}")
+            queue.release(lease, str(e))
+            continue
+        finally:
+            stopped.set()
+            heartbeat.join()
+        if queue.complete(lease, result):
+            completed += 1
+    
+    logger.info(f"{queue.worker_id} completed {completed} units of {queue.job}: {queue.counts()}")
+    return completed
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Security master tests for the Stock Selector project.
+"""
+import pandas as pd
+from src.data_acquisition.security_master import SecurityMaster, build_security_master
+
+
+def _reused_ticker_master(tmp_path) -> SecurityMaster:
+    """
+    Build a master where CIK 5 traded as FB until its rename to META and CIK 3 owns FB now.
+    
+    Args:
+        tmp_path: pytest temporary directory
+    
+    Returns:
+        SecurityMaster: Indexed security master
+    """
+    history_file = tmp_path / "ticker_history.csv"
+    pd.DataFrame({
+        "cik": [5], "ticker": ["FB"], "start_date": [""], "end_date": ["2022-06-08"]
+    }).to_csv(history_file, index=False)
+    securities = pd.DataFrame({
+        "cik": [3, 5],
+        "ticker": ["FB", "META"],
+        "name": ["New FB", "Meta Platforms"],
+        "exchange": ["NASDAQ", "NASDAQ"],
+        "ipo_date": [pd.NaT, pd.NaT]
+    })
+    return SecurityMaster(build_security_master(securities, str(history_file)))
+
+
+def test_reused_ticker_resolves_to_the_owner_at_the_date(tmp_path):
+    """The former owner of a reused ticker wins before the change, though its CIK sorts higher."""
+    master = _reused_ticker_master(tmp_path)
+    
+    assert master.resolve_ticker("FB", "2020-01-01") == 5
+    assert master.resolve_ticker("FB", "2022-06-08") == 5
+    assert master.resolve_ticker("FB", "2022-06-09") == 3
+    assert master.resolve_ticker("META", "2023-01-01") == 5
+
+
+def test_reused_ticker_has_one_owner_per_date(tmp_path):
+    """The new owner's listing starts the day after the former owner's ends."""
+    master = _reused_ticker_master(tmp_path)
+    
+    current = master.table[(master.table["cik"] == 3) & (master.table["ticker"] == "FB")]
+    assert current["start_date"].iloc[0] == pd.Timestamp("2022-06-09")
+    assert master.resolve(3, "2020-01-01") is None
+    assert master.listings("2020-01-01")["ticker"].tolist() == ["FB"]
+    assert master.listings("2020-01-01")["cik"].tolist() == [5]
\ No newline at end of file